@@ -1,5 +1,20 @@
 """ABC to define what an concrete Connection object should look like."""
 import abc
+import threading
+from typing import Dict, Tuple, Union
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, url
+
+# engines created so far in this process keyed by their url (credentials included) and pool size.
+_ENGINE_REGISTRY: Dict[Tuple[str, int], Engine] = dict()
+_ENGINE_REGISTRY_LOCK = threading.Lock()
+
+# number of connections kept open by the pool of each engine unless the profile says otherwise.
+DEFAULT_POOL_SIZE = 5
+# pooled connections are reopened past this age, before the idle timeouts of warehouses and
+# firewalls close them under a long running process (serve, schedule, watch).
+POOL_RECYCLE_SECONDS = 1800
 
 
 class BaseCredentials(abc.ABC):
@@ -28,3 +43,42 @@ def check_db_type_compatibility(field: str, expected_db: str) -> str:
     """
     assert field == expected_db
     return field
+
+
+def get_engine(engine_url: Union[str, url.URL], pool_size: int = DEFAULT_POOL_SIZE) -> Engine:
+    """Returns the engine of the process for a database url, creating it on first use.
+
+    Every SheetBag of a run (or of a long running process) that targets the same database with the
+    same credentials shares one engine and therefore its pool of connections, so that we do not
+    pay a login each time a sheet is uploaded. Connections are checked before being handed out
+    and recycled every POOL_RECYCLE_SECONDS so that one closed while idling is replaced instead of
+    failing the upload that picks it up.
+
+    Args:
+        engine_url (Union[str, url.URL]): SQLAlchemy url of the database.
+        pool_size (int, optional): number of connections the pool keeps open.
+            Defaults to DEFAULT_POOL_SIZE.
+
+    Returns:
+        Engine: the shared SQLAlchemy engine.
+    """
+    registry_key = (url.make_url(engine_url).render_as_string(hide_password=False), pool_size)
+    with _ENGINE_REGISTRY_LOCK:
+        engine = _ENGINE_REGISTRY.get(registry_key)
+        if engine is None:
+            engine = create_engine(
+                engine_url,
+                pool_size=pool_size,
+                pool_pre_ping=True,
+                pool_recycle=POOL_RECYCLE_SECONDS,
+            )
+            _ENGINE_REGISTRY[registry_key] = engine
+        return engine
+
+
+def dispose_engines() -> None:
+    """Closes the pooled connections of every engine and empties the registry."""
+    with _ENGINE_REGISTRY_LOCK:
+        for engine in _ENGINE_REGISTRY.values():
+            engine.dispose()
+        _ENGINE_REGISTRY.clear()
@@ -1,10 +1,14 @@
 """Abstract definition of what a basic SQL adaptor should look like to satisfy the rest of the contracts."""
 import abc
-from typing import Any, Dict, Optional, Tuple
+import contextlib
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 import pandas
 from sqlalchemy.types import BOOLEAN, DATE, INTEGER, TIMESTAMP, VARCHAR, Numeric
 
+# suffix of the table a sheet is loaded into before it replaces the live table (`sync_mode: swap`).
+SWAP_TABLE_SUFFIX = "__sheetwork_tmp"
+
 
 class BaseSQLAdapter(abc.ABC):
     """sets up required adapter methods."""
@@ -17,8 +21,27 @@ class BaseSQLAdapter(abc.ABC):
     def close_connection(self) -> None:
         raise NotImplementedError()
 
+    @contextlib.contextmanager
+    def reuse_connection(self) -> Iterator[None]:
+        """Keeps a single connection open for everything the adapter runs within the block.
+
+        `acquire_connection()` and `close_connection()` calls made inside the block share the
+        connection opened here instead of each checking out (and logging in with) their own.
+        """
+        self.acquire_connection()
+        try:
+            yield
+        finally:
+            self.close_connection()
+
     @abc.abstractmethod
-    def upload(self, df: pandas.DataFrame, target_schema: str) -> None:
+    def upload(
+        self,
+        df: pandas.DataFrame,
+        target_schema: str,
+        inplace: bool = False,
+        append: bool = False,
+    ) -> None:
         raise NotImplementedError()
 
     @abc.abstractmethod
@@ -26,7 +49,9 @@ class BaseSQLAdapter(abc.ABC):
         raise NotImplementedError()
 
     @abc.abstractmethod
-    def check_table(self, target_schema: str, target_table: str) -> Tuple[int, int]:
+    def check_table(
+        self, target_schema: str, target_table: str, deep: bool = False
+    ) -> Tuple[int, int]:
         raise NotImplementedError()
 
     @staticmethod
@@ -0,0 +1,86 @@
+"""Concrete DuckDB Database Connector classes."""
+import importlib.util
+from pathlib import Path
+from typing import Any, Dict
+
+from pydantic import BaseModel, ValidationError, validator
+
+from sheetwork.core.adapters.base.connection import BaseConnection, check_db_type_compatibility
+from sheetwork.core.config.profile import Profile
+from sheetwork.core.exceptions import CredentialsParsingError, MissingDependencyError
+
+# the database DuckDB keeps in memory (and drops with the process) when no file is given.
+IN_MEMORY_DATABASE = ":memory:"
+
+
+class DuckDBCredentialsModel(BaseModel):
+    """Pydantic credentials validator model for duckdb adaptor."""
+
+    database: str = IN_MEMORY_DATABASE
+    target_schema: str = "main"
+
+    db_type = validator("db_type", "duckdb", allow_reuse=True, check_fields=False)(
+        check_db_type_compatibility
+    )
+
+    class Config:
+        """Handles field remapping to avoid keyword collision."""
+
+        fields = {"target_schema": "schema"}
+
+
+class DuckDBCredentials:
+    """Parses and sets up DuckDB credentials object."""
+
+    def __init__(self, profile: Profile) -> None:
+        """Constructor for DuckDB credentials."""
+        self._profile = profile.profile_dict
+        self.are_valid_credentials: bool = False
+        self._db_type: str = str()
+        self.credentials: Dict[str, str] = dict()
+        self.database: str = str()
+        self.target_schema: str = str()
+        self.parse_and_validate_credentials()
+
+    def parse_and_validate_credentials(self) -> None:
+        """Parse and validate credentials using pydandic model."""
+        try:
+            _credentials = DuckDBCredentialsModel(**self._profile)
+        except ValidationError as e:
+            raise CredentialsParsingError(f"Your profile is not valid \n {e}")
+
+        self.credentials = _credentials.dict()
+        self._db_type = self._profile.get("db_type", str())
+        self.are_valid_credentials = True
+        self.database = self.credentials.get("database", IN_MEMORY_DATABASE)
+        self.target_schema = self.credentials.get("target_schema", str())
+
+
+class DuckDBConnection(BaseConnection):
+    """Opens the DuckDB database file of the profile."""
+
+    def __init__(self, credentials: DuckDBCredentials) -> None:
+        """Constructs DuckDB connector object."""
+        self._credentials = credentials
+        self.engine: Any = None
+        self.generate_engine()
+
+    def generate_engine(self) -> None:
+        """Connects to the database, creating its file when it does not exist yet.
+
+        DuckDB shares one instance of each database file among the connections of the process so
+        the "engine" is simply a connection from which the adapter opens cursors.
+        """
+        if importlib.util.find_spec("duckdb") is None:
+            raise MissingDependencyError(
+                "The duckdb adapter requires duckdb, which needs Python 3.8 or later. Install it "
+                "with `pip install sheetwork[duckdb]`."
+            )
+        import duckdb
+
+        database = self._credentials.database
+        if database != IN_MEMORY_DATABASE:
+            database_path = Path(database).expanduser()
+            database_path.parent.mkdir(parents=True, exist_ok=True)
+            database = str(database_path)
+        self.engine = duckdb.connect(database)
@@ -0,0 +1,397 @@
+"""Concrete database implementations for DuckDB Connector."""
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas
+
+from sheetwork.core.adapters.base.impl import SWAP_TABLE_SUFFIX, BaseSQLAdapter
+from sheetwork.core.adapters.duckdb.connection import DuckDBConnection
+from sheetwork.core.config.config import ConfigLoader
+from sheetwork.core.exceptions import (
+    DatabaseError,
+    NoAcquiredConnectionError,
+    TableDoesNotExist,
+    TableValidationError,
+    UploadError,
+)
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.spans import GLOBAL_SPAN_RECORDER as spans
+from sheetwork.core.sync import ROW_HASH_COLUMN, add_row_hashes, check_merge_keys, compute_delta
+from sheetwork.core.ui.printer import green, red, timed_message, yellow
+from sheetwork.core.utils import cast_pandas_dtypes
+
+# DuckDB types of the sheetwork data types (see `BaseSQLAdapter.sqlalchemy_dtypes()`).
+DUCKDB_TYPES = dict(
+    int="INTEGER",
+    varchar="VARCHAR",
+    numeric="DECIMAL(38, 18)",
+    boolean="BOOLEAN",
+    timestamp_ntz="TIMESTAMP",
+    date="DATE",
+)
+
+# DuckDB types of the columns whose type is not set in sheets.yml, by pandas dtype kind.
+_DTYPE_KIND_TYPES = dict(b="BOOLEAN", i="BIGINT", u="UBIGINT", f="DOUBLE", M="TIMESTAMP")
+
+
+def _quote(identifier: str) -> str:
+    return '"{}"'.format(str(identifier).replace('"', '""'))
+
+
+class DuckDBAdaptor(BaseSQLAdapter):
+    """Concrete SQL adaptor for DuckDB databases."""
+
+    # name frames are registered under while they are read into a table.
+    FRAME_VIEW = "sheetwork_frame"
+
+    def __init__(self, connection: DuckDBConnection, config: ConfigLoader) -> None:
+        """Constructor for DuckDBAdaptor.
+
+        Args:
+            connection (DuckDBConnection): connection object holding the DuckDB database.
+            config (ConfigLoader): configuration class containing all params for sheetwork.
+        """
+        self._connection = connection
+        self._engine = connection.engine
+        self._config = config
+        self._database = connection._credentials.database
+        self._has_connection: bool = False
+        self._connection_users: int = 0
+        # rows inserted into tables that were fully (re)loaded, by (schema, table).
+        self.rows_loaded: Dict[Tuple[str, str], int] = dict()
+
+    def acquire_connection(self) -> None:
+        # nested calls (see `reuse_connection()`) share the cursor that is already open.
+        if self._connection_users == 0:
+            try:
+                self.con = self._engine.cursor()
+                self._has_connection = True
+            except Exception:
+                raise DatabaseError(red("Error creating DuckDB connection."))
+        self._connection_users += 1
+
+    def close_connection(self) -> None:
+        if self._connection_users == 0:
+            raise DatabaseError(
+                red("DuckDB adaptor did not create a connection so it cannot be closed.")
+            )
+        self._connection_users -= 1
+        if self._connection_users == 0:
+            self.con.close()
+            self._has_connection = False
+
+    def _create_schema(self) -> None:
+        if self._has_connection is False:
+            raise NoAcquiredConnectionError(
+                f"No acquired connection for {type(self).__name__}. "
+                "Make sure `acquire_connection is ran before."
+            )
+        try:
+            if self._config.project.object_creation_dct["create_schema"]:
+                logger.debug(yellow(f"Creating schema: {self._config.target_schema} if needed"))
+                self.con.execute(
+                    f"CREATE SCHEMA IF NOT EXISTS {_quote(self._config.target_schema)}"
+                )
+        except Exception as e:
+            raise DatabaseError(str(e))
+
+    @staticmethod
+    def _qualify_table(target_schema: str, target_table: str) -> str:
+        return f"{_quote(target_schema)}.{_quote(target_table)}"
+
+    def _column_types(self, df: pandas.DataFrame) -> Dict[str, str]:
+        sheet_columns = self._config.sheet_columns
+        return {
+            column: DUCKDB_TYPES[sheet_columns[column]]
+            if column in sheet_columns
+            else _DTYPE_KIND_TYPES.get(df[column].dtype.kind, "VARCHAR")
+            for column in df.columns
+        }
+
+    def _create_table(self, df: pandas.DataFrame, qualified_table: str, replace: bool) -> None:
+        columns = ", ".join(
+            [
+                f"{_quote(column)} {data_type}"
+                for column, data_type in self._column_types(df).items()
+            ]
+        )
+        create = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE IF NOT EXISTS"
+        self.con.execute(f"{create} {qualified_table} ({columns})")
+
+    def _select_frame(self, df: pandas.DataFrame, columns: List[str]) -> str:
+        column_types = self._column_types(df)
+        casts = ", ".join(
+            [
+                f"CAST({_quote(column)} AS {column_types[column]}) AS {_quote(column)}"
+                for column in columns
+            ]
+        )
+        return f"SELECT {casts} FROM {type(self).FRAME_VIEW}"
+
+    def _insert_into_table(self, df: pandas.DataFrame, qualified_table: str) -> int:
+        """Inserts the rows of a DataFrame into a table, straight from the memory of the frame.
+
+        The frame is registered as a view that DuckDB scans itself so that nothing is serialised
+        on the way, its columns being cast to the ones of the table by the `INSERT` itself.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame whose columns match the ones of the target table.
+            qualified_table (str): quoted (and schema qualified) name of the target table.
+
+        Returns:
+            int: number of rows inserted.
+        """
+        columns = ", ".join([_quote(column) for column in df.columns])
+        self.con.register(type(self).FRAME_VIEW, df)
+        try:
+            with spans.span("insert") as insert_span:
+                (rows_inserted,) = self.con.execute(
+                    f"INSERT INTO {qualified_table} ({columns}) "
+                    f"{self._select_frame(df, df.columns.tolist())}"
+                ).fetchone()
+                insert_span.rows = rows_inserted
+        finally:
+            self.con.unregister(type(self).FRAME_VIEW)
+        logger.debug(f"Inserted {rows_inserted} rows into {qualified_table}")
+        return rows_inserted
+
+    def upload(
+        self,
+        df: pandas.DataFrame,
+        target_schema: str,
+        inplace: bool = False,
+        append: bool = False,
+    ) -> None:
+        with spans.span("cast") as cast_span:
+            df = cast_pandas_dtypes(df, overwrite_dict=self._config.sheet_columns, inplace=inplace)
+            cast_span.rows = len(df)
+
+        self.acquire_connection()
+        self._create_schema()
+
+        # only full loads tell how many rows the table holds (see `check_table()`).
+        self.rows_loaded.pop((target_schema, self._config.target_table), None)
+        rows_loaded: Optional[int] = None
+        try:
+            # DDL and data go in the same transaction so a failed load never leaves a dropped or
+            # half filled table behind.
+            self.con.begin()
+            try:
+                if self._config.sync_mode == "merge":
+                    self._merge_into_table(add_row_hashes(df, inplace=inplace), target_schema)
+                elif self._config.sync_mode == "swap" and not append:
+                    rows_loaded = self._swap_into_table(df, target_schema)
+                else:
+                    rows_loaded = self._load_into_table(df, target_schema, append)
+            except Exception:
+                self.con.rollback()
+                raise
+            self.con.commit()
+            if rows_loaded is not None:
+                self.rows_loaded[(target_schema, self._config.target_table)] = rows_loaded
+        except Exception as e:
+            raise UploadError(str(e))
+        finally:
+            logger.debug("Closing connection")
+            self.close_connection()
+
+    def _load_into_table(
+        self, df: pandas.DataFrame, target_schema: str, append: bool
+    ) -> Optional[int]:
+        """Loads the sheet into the target table, (re)creating it first when the project says so.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame to load.
+            target_schema (str): schema in which the target table lives.
+            append (bool): when true the rows are added to the table as it is.
+
+        Returns:
+            Optional[int]: number of rows in the table when it was replaced, None when the rows
+                were added to the ones it already held.
+        """
+        qualified_table = self._qualify_table(target_schema, self._config.target_table)
+        replace = False
+        # rows appended to a table loaded before go straight in, whatever the table
+        # creation settings are.
+        if self._config.project.object_creation_dct["create_table"] is True and not append:
+            replace = bool(self._config.project.destructive_create_table)
+            if not replace:
+                logger.warning(
+                    yellow(
+                        f"{self._database}"
+                        f".{target_schema}.{self._config.target_table} already exists and was not\n"
+                        "recreated because 'destructive_create_table' is set to False in your profile \n"
+                        "APPENDING instead."
+                    )
+                )
+            self._create_table(df, qualified_table, replace=replace)
+        rows_inserted = self._insert_into_table(df, qualified_table)
+        return rows_inserted if replace else None
+
+    def _count_rows_and_columns(self, target_schema: str, target_table: str) -> Tuple[int, int]:
+        # a single round trip for both counts.
+        num_rows, num_columns = self.con.execute(
+            f"SELECT (SELECT count(*) FROM {self._qualify_table(target_schema, target_table)}), "
+            "(SELECT count(*) FROM information_schema.columns "
+            "WHERE table_schema = ? AND table_name = ?)",
+            [target_schema, target_table],
+        ).fetchone()
+        return num_rows, num_columns
+
+    def _get_column_names(self, target_schema: str, target_table: str) -> List[str]:
+        rows = self.con.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = ? AND table_name = ? ORDER BY ordinal_position",
+            [target_schema, target_table],
+        ).fetchall()
+        return [column_name for (column_name,) in rows]
+
+    def _swap_into_table(self, df: pandas.DataFrame, target_schema: str) -> int:
+        """Rebuilds the target table next to the live one and swaps them once it is validated.
+
+        Works like the swap of the Postgres adaptor: the sheet is loaded into
+        `<table>__sheetwork_tmp` which replaces the live table, in the transaction of `upload()`,
+        only once its row and column counts match the ones of the sheet.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame to load.
+            target_schema (str): schema in which the target table lives.
+
+        Raises:
+            TableValidationError: when the loaded table does not match the sheet.
+
+        Returns:
+            int: number of rows in the swapped in table.
+        """
+        target_table = self._config.target_table
+        swap_table = f"{target_table}{SWAP_TABLE_SUFFIX}"
+        qualified_swap_table = self._qualify_table(target_schema, swap_table)
+        self._create_table(df, qualified_swap_table, replace=True)
+        self._insert_into_table(df, qualified_swap_table)
+
+        num_rows, num_columns = self._count_rows_and_columns(target_schema, swap_table)
+        if (num_rows, num_columns) != (len(df), len(df.columns)):
+            raise TableValidationError(
+                f"{swap_table} has {num_rows} rows and {num_columns} columns when the sheet has "
+                f"{len(df)} rows and {len(df.columns)} columns. {target_table} was left untouched."
+            )
+        with spans.span("swap"):
+            self.con.execute(
+                f"DROP TABLE IF EXISTS {self._qualify_table(target_schema, target_table)}"
+            )
+            self.con.execute(f"ALTER TABLE {qualified_swap_table} RENAME TO {_quote(target_table)}")
+        return num_rows
+
+    def _merge_into_table(self, df: pandas.DataFrame, target_schema: str) -> None:
+        """Applies the rows of the sheet that changed since the last upload to the target table.
+
+        The rows of the table whose keys were updated or deleted in the sheet are deleted before
+        the updated and inserted rows are inserted, both straight from the frames of the delta. A
+        table that does not exist yet (or was not loaded with row hashes) is (re)created and loaded
+        in full.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame with its row hashes (see `add_row_hashes()`).
+            target_schema (str): schema in which the target table lives.
+        """
+        target_table = self._config.target_table
+        qualified_table = self._qualify_table(target_schema, target_table)
+        merge_keys = self._config.merge_keys
+        check_merge_keys(df, merge_keys)
+        quoted_keys = [_quote(key) for key in merge_keys]
+
+        if ROW_HASH_COLUMN not in self._get_column_names(target_schema, target_table):
+            logger.info(
+                yellow(f"Creating {qualified_table} and loading all the rows of the sheet.")
+            )
+            self._create_table(df, qualified_table, replace=True)
+            self._insert_into_table(df, qualified_table)
+            return
+
+        with spans.span("diff") as diff_span:
+            existing = self.con.execute(
+                f"SELECT {', '.join(quoted_keys)}, {_quote(ROW_HASH_COLUMN)} FROM {qualified_table}"
+            ).df()
+            delta = compute_delta(df, existing, merge_keys, self._config.sheet_columns)
+            diff_span.rows = len(df)
+        logger.info(
+            timed_message(
+                f"{delta.num_inserted} rows inserted, {delta.num_updated} updated and "
+                f"{len(delta.deletes)} deleted since the last upload."
+            )
+        )
+        if delta.is_empty:
+            return
+
+        changed_keys = pandas.concat(
+            [delta.upserts[merge_keys], delta.deletes[merge_keys]], ignore_index=True
+        )
+        matches_keys = " AND ".join([f"t.{key} = s.{key}" for key in quoted_keys])
+        with spans.span("merge") as merge_span:
+            self.con.register(type(self).FRAME_VIEW, changed_keys)
+            try:
+                self.con.execute(
+                    f"DELETE FROM {qualified_table} t USING "
+                    f"({self._select_frame(df, merge_keys)}) s WHERE {matches_keys}"
+                )
+            finally:
+                self.con.unregister(type(self).FRAME_VIEW)
+            self._insert_into_table(delta.upserts, qualified_table)
+            merge_span.rows = len(changed_keys)
+
+    def excecute_query(self, query: str, return_results: bool = False) -> Optional[Any]:
+        self.acquire_connection()
+        try:
+            results: Any = self.con.execute(query)
+            if return_results:
+                return results.fetchall()
+        finally:
+            self.close_connection()
+        return None
+
+    def check_table(
+        self, target_schema: str, target_table: str, deep: bool = False
+    ) -> Tuple[int, int]:
+        """Checks that the table exists and reports its number of columns and rows.
+
+        The row count of the last full load of the table is trusted unless `deep` is set, in which
+        case the table is counted like any other table, in a single query.
+
+        Args:
+            target_schema (str): schema in which the table lives.
+            target_table (str): table to check.
+            deep (bool, optional): when true the rows of the table are counted even when the
+                last load reported them. Defaults to False.
+
+        Raises:
+            TableDoesNotExist: when there is no such table.
+
+        Returns:
+            Tuple[int, int]: number of columns and number of rows of the table.
+        """
+        import duckdb
+
+        self.acquire_connection()
+        _qualified_table_name = f"{self._database}.{target_schema}.{target_table}"
+        rows_loaded = self.rows_loaded.get((target_schema, target_table))
+        try:
+            if rows_loaded is not None and not deep:
+                num_rows = rows_loaded
+                num_columns = len(self._get_column_names(target_schema, target_table))
+            else:
+                num_rows, num_columns = self._count_rows_and_columns(target_schema, target_table)
+        except duckdb.CatalogException:
+            raise TableDoesNotExist(f"Table {_qualified_table_name} does not exist.")
+        finally:
+            self.close_connection()
+        if num_columns == 0:
+            raise TableDoesNotExist(f"Table {_qualified_table_name} does not exist.")
+
+        logger.info(
+            timed_message(
+                green(
+                    f"Push successful for {_qualified_table_name} \n"
+                    f"Found {num_columns} columns and {num_rows} rows."
+                )
+            )
+        )
+        return num_columns, num_rows
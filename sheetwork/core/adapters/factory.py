@@ -45,6 +45,34 @@ class AdapterContainer:
                     "class_name": "PostgresCredentials",
                 },
             },
+            "duckdb": {
+                "sql_adapter": {
+                    "module": "sheetwork.core.adapters.duckdb.impl",
+                    "class_name": "DuckDBAdaptor",
+                },
+                "connection_adapter": {
+                    "module": "sheetwork.core.adapters.duckdb.connection",
+                    "class_name": "DuckDBConnection",
+                },
+                "credentials_adapter": {
+                    "module": "sheetwork.core.adapters.duckdb.connection",
+                    "class_name": "DuckDBCredentials",
+                },
+            },
+            "sqlite": {
+                "sql_adapter": {
+                    "module": "sheetwork.core.adapters.sqlite.impl",
+                    "class_name": "SqliteAdaptor",
+                },
+                "connection_adapter": {
+                    "module": "sheetwork.core.adapters.sqlite.connection",
+                    "class_name": "SqliteConnection",
+                },
+                "credentials_adapter": {
+                    "module": "sheetwork.core.adapters.sqlite.connection",
+                    "class_name": "SqliteCredentials",
+                },
+            },
         }
         self.adapter_name: str = str()
         self.credentials_adapter: Type[BaseCredentials] = BaseCredentials
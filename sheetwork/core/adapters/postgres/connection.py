@@ -3,9 +3,14 @@
 from typing import Dict
 
 from pydantic import BaseModel, ValidationError, validator
-from sqlalchemy.engine import create_engine, url
-
-from sheetwork.core.adapters.base.connection import BaseConnection, check_db_type_compatibility
+from sqlalchemy.engine import url
+
+from sheetwork.core.adapters.base.connection import (
+    DEFAULT_POOL_SIZE,
+    BaseConnection,
+    check_db_type_compatibility,
+    get_engine,
+)
 from sheetwork.core.config.profile import Profile
 from sheetwork.core.exceptions import CredentialsParsingError
 
@@ -19,6 +24,7 @@ class PostgresCredentialsModel(BaseModel):
     host: str = "localhost"
     port: str = "5432"
     target_schema: str
+    pool_size: int = DEFAULT_POOL_SIZE
 
     db_type = validator("db_type", "postgres", allow_reuse=True, check_fields=False)(
         check_db_type_compatibility
@@ -45,6 +51,7 @@ class PostgresCredentials:
         self.port: str = str()
         self.database: str = str()
         self.target_schema: str = str()
+        self.pool_size: int = DEFAULT_POOL_SIZE
         self.parse_and_validate_credentials()
 
     def parse_and_validate_credentials(self) -> None:
@@ -66,6 +73,7 @@ class PostgresCredentials:
         self.port = self.credentials.get("port", str())
         self.database = self.credentials.get("database", str())
         self.target_schema = self.credentials.get("target_schema", str())
+        self.pool_size = int(self.credentials.get("pool_size", DEFAULT_POOL_SIZE))
 
 
 class PostgresConnection(BaseConnection):
@@ -77,7 +85,7 @@ class PostgresConnection(BaseConnection):
         self.generate_engine()
 
     def generate_engine(self) -> None:
-        """Creates a Postgress connection engine."""
+        """Gets the Postgress connection engine shared by the process for these credentials."""
         self._engine_url = url.URL(
             drivername="postgresql+psycopg2",
             host=self._credentials.host,
@@ -86,4 +94,4 @@ class PostgresConnection(BaseConnection):
             database=self._credentials.database,
             port=self._credentials.port,
         )
-        self.engine = create_engine(self._engine_url)
+        self.engine = get_engine(self._engine_url, pool_size=self._credentials.pool_size)
@@ -1,23 +1,34 @@
 """Concrete database implementations for Postgres Connector."""
-from typing import Any, Optional, Tuple
+import io
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas
 import sqlalchemy
 from sqlalchemy import MetaData, func, select
-from sqlalchemy.engine.reflection import Inspector
-from sqlalchemy.exc import NoSuchTableError
+from sqlalchemy.exc import NoSuchTableError, ProgrammingError
 from sqlalchemy.schema import CreateSchema
 
-from sheetwork.core.adapters.base.impl import BaseSQLAdapter
+from sheetwork.core.adapters.base.impl import SWAP_TABLE_SUFFIX, BaseSQLAdapter
 from sheetwork.core.adapters.postgres.connection import PostgresConnection
 from sheetwork.core.config.config import ConfigLoader
 from sheetwork.core.exceptions import (
     DatabaseError,
     NoAcquiredConnectionError,
+    SheetWorkConfigError,
     TableDoesNotExist,
+    TableValidationError,
     UploadError,
 )
 from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.spans import GLOBAL_SPAN_RECORDER as spans
+from sheetwork.core.sync import (
+    DELETED_FLAG_COLUMN,
+    ROW_HASH_COLUMN,
+    add_row_hashes,
+    check_merge_keys,
+    compute_delta,
+    make_staged_rows,
+)
 from sheetwork.core.ui.printer import green, red, timed_message, yellow
 from sheetwork.core.utils import cast_pandas_dtypes
 
@@ -25,6 +36,9 @@ from sheetwork.core.utils import cast_pandas_dtypes
 class PostgresAdaptor(BaseSQLAdapter):
     """Concrete SQL adaptor for Postgres db."""
 
+    # number of rows serialised and sent to Postgres per COPY statement.
+    COPY_CHUNK_SIZE = 100_000
+
     def __init__(self, connection: PostgresConnection, config: ConfigLoader) -> None:
         """Constructor for PostgresAdadpor.
 
@@ -38,22 +52,29 @@ class PostgresAdaptor(BaseSQLAdapter):
         self._config = config
         self._database = connection._credentials.database
         self._has_connection: bool = False
+        self._connection_users: int = 0
+        # rows COPY reported into tables that were fully (re)loaded, by (schema, table).
+        self.rows_loaded: Dict[Tuple[str, str], int] = dict()
 
     def acquire_connection(self) -> None:
-        try:
-            self.con = self._engine.connect()
-            self._has_connection = True
-        except Exception:
-            raise DatabaseError(red("Error creating Postgres connection."))
+        # nested calls (see `reuse_connection()`) share the connection that is already open.
+        if self._connection_users == 0:
+            try:
+                self.con = self._engine.connect()
+                self._has_connection = True
+            except Exception:
+                raise DatabaseError(red("Error creating Postgres connection."))
+        self._connection_users += 1
 
     def close_connection(self) -> None:
-        try:
-            self.con.close()
-            self._has_connection = False
-        except AttributeError:
+        if self._connection_users == 0:
             raise DatabaseError(
                 red("Postgres adaptor did not create a connection so it cannot be closed.")
             )
+        self._connection_users -= 1
+        if self._connection_users == 0:
+            self.con.close()
+            self._has_connection = False
 
     def _create_schema(self) -> None:
         if self._has_connection is False:
@@ -76,18 +97,109 @@ class PostgresAdaptor(BaseSQLAdapter):
         except Exception as e:
             raise DatabaseError(str(e))
 
+    def _qualify_table(self, target_schema: str, target_table: str) -> str:
+        preparer = self.con.dialect.identifier_preparer
+        return f"{preparer.quote_schema(target_schema)}.{preparer.quote(target_table)}"
+
+    def _copy_into_table(self, df: pandas.DataFrame, qualified_table: str) -> int:
+        """Streams the rows of a DataFrame into the target table via Postgres' `COPY FROM STDIN`.
+
+        The frame is serialised to CSV in chunks of `COPY_CHUNK_SIZE` rows so that we never hold
+        more than one chunk of text in memory on top of the frame itself.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame whose columns match the ones of the target table.
+            qualified_table (str): quoted (and schema qualified) name of the target table.
+
+        Returns:
+            int: number of rows copied.
+        """
+        preparer = self.con.dialect.identifier_preparer
+        columns = ", ".join([preparer.quote(str(column)) for column in df.columns])
+        copy_statement = f"COPY {qualified_table} ({columns}) FROM STDIN WITH (FORMAT csv)"
+
+        rows_copied = 0
+        cursor = self.con.connection.cursor()
+        try:
+            chunk_size = type(self).COPY_CHUNK_SIZE
+            for chunk_start in range(0, len(df), chunk_size):
+                chunk_end = chunk_start + chunk_size
+                buffer = io.StringIO()
+                with spans.span("serialise") as serialise_span:
+                    chunk = df.iloc[chunk_start:chunk_end]
+                    chunk.to_csv(buffer, index=False, header=False)
+                    serialise_span.rows = len(chunk)
+                    serialise_span.num_bytes = buffer.tell()
+                buffer.seek(0)
+                with spans.span("copy") as copy_span:
+                    cursor.copy_expert(copy_statement, buffer)
+                    copy_span.rows = cursor.rowcount
+                    copy_span.num_bytes = serialise_span.num_bytes
+                rows_copied += cursor.rowcount
+        finally:
+            cursor.close()
+        logger.debug(f"Copied {rows_copied} rows into {qualified_table}")
+        return rows_copied
+
     # TODO: Rework the API here, I don't see a need to pass the target schema as it
     # ! THIS ACTUALLY COULD CREATE A SHITTY BUG!
     # should be accessed from the config.
-    def upload(self, df: pandas.DataFrame, target_schema: str) -> None:
-        df = cast_pandas_dtypes(df, overwrite_dict=self._config.sheet_columns)
-        dtypes_dict = self.sqlalchemy_dtypes(self._config.sheet_columns)
+    def upload(
+        self,
+        df: pandas.DataFrame,
+        target_schema: str,
+        inplace: bool = False,
+        append: bool = False,
+    ) -> None:
+        with spans.span("cast") as cast_span:
+            df = cast_pandas_dtypes(df, overwrite_dict=self._config.sheet_columns, inplace=inplace)
+            cast_span.rows = len(df)
 
         self.acquire_connection()
         self._create_schema()
 
+        # only full loads tell how many rows the table holds (see `check_table()`).
+        self.rows_loaded.pop((target_schema, self._config.target_table), None)
+        rows_loaded: Optional[int] = None
+        try:
+            # DDL and data go in the same transaction so a failed load never leaves a dropped or
+            # half filled table behind.
+            with self.con.begin():
+                if self._config.sync_mode == "merge":
+                    self._merge_into_table(add_row_hashes(df, inplace=inplace), target_schema)
+                elif self._config.sync_mode == "swap" and not append:
+                    rows_loaded = self._swap_into_table(df, target_schema)
+                else:
+                    rows_loaded = self._load_into_table(df, target_schema, append)
+            if rows_loaded is not None:
+                self.rows_loaded[(target_schema, self._config.target_table)] = rows_loaded
+        except SheetWorkConfigError:
+            raise
+        except Exception as e:
+            raise UploadError(str(e))
+        finally:
+            logger.debug("Closing connection")
+            self.close_connection()
+
+    def _load_into_table(
+        self, df: pandas.DataFrame, target_schema: str, append: bool
+    ) -> Optional[int]:
+        """Loads the sheet into the target table, (re)creating it first when the project says so.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame to load.
+            target_schema (str): schema in which the target table lives.
+            append (bool): when true the rows are added to the table as it is.
+
+        Returns:
+            Optional[int]: number of rows in the table when it was replaced, None when the rows
+                were added to the ones it already held.
+        """
+        dtypes_dict = self.sqlalchemy_dtypes(self._config.sheet_columns)
         _if_schema_exists = "append"
-        if self._config.project.object_creation_dct["create_table"] is True:
+        # rows appended to a table loaded before go straight in, whatever the table
+        # creation settings are.
+        if self._config.project.object_creation_dct["create_table"] is True and not append:
             if self._config.project.destructive_create_table:
                 _if_schema_exists = "replace"
 
@@ -100,20 +212,243 @@ class PostgresAdaptor(BaseSQLAdapter):
                         "APPENDING instead."
                     )
                 )
-            try:
-                df.to_sql(
-                    name=self._config.target_table,
-                    schema=target_schema,
-                    con=self.con,
-                    if_exists=_if_schema_exists,
-                    index=False,
-                    dtype=dtypes_dict,
-                )
-            except Exception as e:
-                raise UploadError(str(e))
-            finally:
-                logger.debug("Closing connection")
-                self.close_connection()
+            # pandas is only used for the table creation, the data itself is pushed via COPY
+            # below as pandas would send it as INSERT statements which is much slower.
+            df.head(0).to_sql(
+                name=self._config.target_table,
+                schema=target_schema,
+                con=self.con,
+                if_exists=_if_schema_exists,
+                index=False,
+                dtype=dtypes_dict,
+            )
+        rows_copied = self._copy_into_table(
+            df, self._qualify_table(target_schema, self._config.target_table)
+        )
+        return rows_copied if _if_schema_exists == "replace" else None
+
+    def _count_rows_and_columns(self, target_schema: str, target_table: str) -> Tuple[int, int]:
+        # a single round trip for both counts.
+        qualified_table = self._qualify_table(target_schema, target_table)
+        num_rows, num_columns = self.con.execute(
+            sqlalchemy.text(
+                f"SELECT (SELECT count(*) FROM {qualified_table}), "
+                "(SELECT count(*) FROM information_schema.columns "
+                "WHERE table_schema = :schema AND table_name = :table)"
+            ),
+            schema=target_schema,
+            table=target_table,
+        ).first()
+        return num_rows, num_columns
+
+    def _count_columns(self, target_schema: str, target_table: str) -> int:
+        return self.con.execute(
+            sqlalchemy.text(
+                "SELECT count(*) FROM information_schema.columns "
+                "WHERE table_schema = :schema AND table_name = :table"
+            ),
+            schema=target_schema,
+            table=target_table,
+        ).scalar()
+
+    def _get_column_names(self, target_schema: str, target_table: str) -> List[str]:
+        return [
+            row[0]
+            for row in self.con.execute(
+                sqlalchemy.text(
+                    "SELECT column_name FROM information_schema.columns "
+                    "WHERE table_schema = :schema AND table_name = :table "
+                    "ORDER BY ordinal_position"
+                ),
+                schema=target_schema,
+                table=target_table,
+            )
+        ]
+
+    def _get_dependent_views(self, qualified_table: str) -> List[str]:
+        # views (and materialised views) reference their tables through their rewrite rule.
+        return [
+            row[0]
+            for row in self.con.execute(
+                sqlalchemy.text(
+                    "SELECT DISTINCT view_namespace.nspname || '.' || view_class.relname "
+                    "FROM pg_depend "
+                    "JOIN pg_rewrite ON pg_depend.objid = pg_rewrite.oid "
+                    "JOIN pg_class AS view_class ON pg_rewrite.ev_class = view_class.oid "
+                    "JOIN pg_namespace AS view_namespace "
+                    "ON view_class.relnamespace = view_namespace.oid "
+                    "WHERE pg_depend.classid = 'pg_rewrite'::regclass "
+                    "AND pg_depend.refobjid = to_regclass(:qualified_table) "
+                    "AND view_class.oid <> pg_depend.refobjid"
+                ),
+                qualified_table=qualified_table,
+            )
+        ]
+
+    def _swap_into_table(self, df: pandas.DataFrame, target_schema: str) -> int:
+        """Rebuilds the target table next to the live one and swaps them once it is validated.
+
+        The sheet is loaded into `<table>__sheetwork_tmp`, which replaces the live table (drop and
+        rename) only once its row and column counts match the ones of the sheet. As everything
+        happens in the transaction of `upload()` readers keep seeing the previous table until the
+        swap is committed and the live table is only locked for the drop and rename.
+
+        A table that views depend on cannot be dropped, its rows are replaced by the ones of the
+        validated table instead (truncate and insert), which requires its columns to be unchanged.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame to load.
+            target_schema (str): schema in which the target table lives.
+
+        Raises:
+            TableValidationError: when the loaded table does not match the sheet.
+            SheetWorkConfigError: when views depend on the target table and the columns of the
+                sheet are not the ones of the table anymore.
+
+        Returns:
+            int: number of rows in the swapped in table.
+        """
+        preparer = self.con.dialect.identifier_preparer
+        target_table = self._config.target_table
+        swap_table = f"{target_table}{SWAP_TABLE_SUFFIX}"
+        df.head(0).to_sql(
+            name=swap_table,
+            schema=target_schema,
+            con=self.con,
+            if_exists="replace",
+            index=False,
+            dtype=self.sqlalchemy_dtypes(self._config.sheet_columns),
+        )
+        self._copy_into_table(df, self._qualify_table(target_schema, swap_table))
+
+        num_rows, num_columns = self._count_rows_and_columns(target_schema, swap_table)
+        if (num_rows, num_columns) != (len(df), len(df.columns)):
+            raise TableValidationError(
+                f"{swap_table} has {num_rows} rows and {num_columns} columns when the sheet has "
+                f"{len(df)} rows and {len(df.columns)} columns. {target_table} was left untouched."
+            )
+        qualified_table = self._qualify_table(target_schema, target_table)
+        dependent_views = self._get_dependent_views(qualified_table)
+        if dependent_views:
+            self._replace_rows(target_schema, target_table, swap_table, dependent_views)
+            return num_rows
+        with spans.span("swap"):
+            self.con.execute(f"DROP TABLE IF EXISTS {qualified_table}")
+            self.con.execute(
+                f"ALTER TABLE {self._qualify_table(target_schema, swap_table)} "
+                f"RENAME TO {preparer.quote(target_table)}"
+            )
+        return num_rows
+
+    def _replace_rows(
+        self, target_schema: str, target_table: str, swap_table: str, dependent_views: List[str]
+    ) -> None:
+        columns = self._get_column_names(target_schema, swap_table)
+        if self._get_column_names(target_schema, target_table) != columns:
+            raise SheetWorkConfigError(
+                f"{target_schema}.{target_table} cannot be swapped as {dependent_views} depend on "
+                "it and the columns of the sheet changed. Drop those views and recreate them "
+                "after the upload, or use another sync_mode."
+            )
+        logger.debug(f"{dependent_views} depend on {target_table}, replacing its rows instead.")
+        preparer = self.con.dialect.identifier_preparer
+        quoted_columns = ", ".join([preparer.quote(column) for column in columns])
+        qualified_swap_table = self._qualify_table(target_schema, swap_table)
+        with spans.span("swap"):
+            self.con.execute(f"TRUNCATE TABLE {self._qualify_table(target_schema, target_table)}")
+            self.con.execute(
+                f"INSERT INTO {self._qualify_table(target_schema, target_table)} "
+                f"({quoted_columns}) SELECT {quoted_columns} FROM {qualified_swap_table}"
+            )
+            self.con.execute(f"DROP TABLE {qualified_swap_table}")
+
+    def _merge_into_table(self, df: pandas.DataFrame, target_schema: str) -> None:
+        """Applies the rows of the sheet that changed since the last upload to the target table.
+
+        Changed rows and the keys of deleted rows are copied into a temporary table from which the
+        deletions and an `INSERT ... ON CONFLICT DO UPDATE` are applied. A table that does not exist
+        yet (or was not loaded with row hashes) is (re)created and loaded in full.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame with its row hashes (see `add_row_hashes()`).
+            target_schema (str): schema in which the target table lives.
+        """
+        preparer = self.con.dialect.identifier_preparer
+        target_table = self._config.target_table
+        qualified_table = self._qualify_table(target_schema, target_table)
+        merge_keys = self._config.merge_keys
+        check_merge_keys(df, merge_keys)
+        quoted_keys = [preparer.quote(key) for key in merge_keys]
+        keys = ", ".join(quoted_keys)
+        # ON CONFLICT needs a unique index on the keys.
+        create_keys_index = (
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {preparer.quote(f'{target_table}__sheetwork_keys')} "
+            f"ON {qualified_table} ({keys})"
+        )
+
+        inspector = sqlalchemy.inspect(self.con)
+        if not inspector.has_table(target_table, schema=target_schema) or ROW_HASH_COLUMN not in [
+            column["name"] for column in inspector.get_columns(target_table, schema=target_schema)
+        ]:
+            logger.info(
+                yellow(f"Creating {qualified_table} and loading all the rows of the sheet.")
+            )
+            dtypes_dict = self.sqlalchemy_dtypes(self._config.sheet_columns)
+            dtypes_dict[ROW_HASH_COLUMN] = sqlalchemy.types.BIGINT
+            df.head(0).to_sql(
+                name=target_table,
+                schema=target_schema,
+                con=self.con,
+                if_exists="replace",
+                index=False,
+                dtype=dtypes_dict,
+            )
+            self.con.execute(create_keys_index)
+            self._copy_into_table(df, qualified_table)
+            return
+
+        with spans.span("diff") as diff_span:
+            existing = pandas.read_sql(
+                f"SELECT {keys}, {preparer.quote(ROW_HASH_COLUMN)} FROM {qualified_table}", self.con
+            )
+            delta = compute_delta(df, existing, merge_keys, self._config.sheet_columns)
+            diff_span.rows = len(df)
+        logger.info(
+            timed_message(
+                f"{delta.num_inserted} rows inserted, {delta.num_updated} updated and "
+                f"{len(delta.deletes)} deleted since the last upload."
+            )
+        )
+        if delta.is_empty:
+            return
+
+        staging_table = preparer.quote(f"{target_table}__sheetwork_stg")
+        self.con.execute(
+            f"CREATE TEMPORARY TABLE {staging_table} ON COMMIT DROP AS "
+            f"SELECT *, FALSE AS {preparer.quote(DELETED_FLAG_COLUMN)} FROM {qualified_table} "
+            "WITH NO DATA"
+        )
+        staged_rows = make_staged_rows(delta)
+        self._copy_into_table(staged_rows, staging_table)
+
+        is_deleted = preparer.quote(DELETED_FLAG_COLUMN)
+        matches_keys = " AND ".join([f"t.{key} = s.{key}" for key in quoted_keys])
+        columns = [preparer.quote(str(column)) for column in df.columns]
+        updates = ", ".join(
+            [f"{column} = EXCLUDED.{column}" for column in columns if column not in quoted_keys]
+        )
+        with spans.span("merge") as merge_span:
+            self.con.execute(create_keys_index)
+            self.con.execute(
+                f"DELETE FROM {qualified_table} t USING {staging_table} s "
+                f"WHERE {matches_keys} AND s.{is_deleted}"
+            )
+            self.con.execute(
+                f"INSERT INTO {qualified_table} ({', '.join(columns)}) "
+                f"SELECT {', '.join(columns)} FROM {staging_table} WHERE NOT {is_deleted} "
+                f"ON CONFLICT ({keys}) DO UPDATE SET {updates}"
+            )
+            merge_span.rows = len(staged_rows)
 
     def excecute_query(self, query: str, return_results: bool = False) -> Optional[Any]:
         self.acquire_connection()
@@ -125,25 +460,56 @@ class PostgresAdaptor(BaseSQLAdapter):
         self.close_connection()
         return None
 
-    def check_table(self, target_schema: str, target_table: str) -> Tuple[int, int]:
+    def _reflect_table(self, target_schema: str, target_table: str) -> Tuple[int, int]:
+        inspector = sqlalchemy.inspect(self.con)
+        columns = inspector.get_columns(target_table, target_schema)
+        metadata = MetaData(self.con)
+        _target_table = sqlalchemy.Table(
+            target_table, metadata, autoload=True, schema=target_schema
+        )
+        rows = select([func.count("*")], from_obj=[_target_table])
+        num_rows = self.con.execute(rows).scalar()
+        return num_rows, len(columns)
+
+    def check_table(
+        self, target_schema: str, target_table: str, deep: bool = False
+    ) -> Tuple[int, int]:
+        """Checks that the table exists and reports its number of columns and rows.
+
+        The row count COPY reported when the table was last fully loaded is trusted so that only
+        the number of columns has to be read, in a single query. Other tables are counted in the
+        same query.
+
+        Args:
+            target_schema (str): schema in which the table lives.
+            target_table (str): table to check.
+            deep (bool, optional): when true the whole table is reflected and counted instead.
+                Defaults to False.
+
+        Raises:
+            TableDoesNotExist: when there is no such table.
+
+        Returns:
+            Tuple[int, int]: number of columns and number of rows of the table.
+        """
         self.acquire_connection()
         _qualified_table_name = f"{self._database}.{target_schema}.{target_table}"
+        rows_loaded = self.rows_loaded.get((target_schema, target_table))
         try:
-            inspector = Inspector.from_engine(self._engine)
-            columns = inspector.get_columns(target_table, target_schema)
-            metadata = MetaData(self.con)
-            _target_table = sqlalchemy.Table(
-                target_table, metadata, autoload=True, schema=target_schema
-            )
-            rows = select([func.count("*")], from_obj=[_target_table])
-            row_results = rows.execute()
-            num_rows = row_results.first()[0]
-            num_columns = len(columns)
-
-        except NoSuchTableError:
+            if deep:
+                num_rows, num_columns = self._reflect_table(target_schema, target_table)
+            elif rows_loaded is not None:
+                num_rows, num_columns = rows_loaded, self._count_columns(
+                    target_schema, target_table
+                )
+            else:
+                num_rows, num_columns = self._count_rows_and_columns(target_schema, target_table)
+        except (NoSuchTableError, ProgrammingError):
             raise TableDoesNotExist(f"Table {_qualified_table_name} does not exist.")
         finally:
             self.close_connection()
+        if num_columns == 0:
+            raise TableDoesNotExist(f"Table {_qualified_table_name} does not exist.")
 
         logger.info(
             timed_message(
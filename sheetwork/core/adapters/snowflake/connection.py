@@ -1,18 +1,21 @@
 """Concrete Snowflake Database Connection classes."""
-from typing import Dict
+from typing import Any, Dict
 
 from pydantic import BaseModel, ValidationError, validator
 from snowflake.sqlalchemy import URL
-from sqlalchemy import create_engine
 
 from sheetwork.core.adapters.base.connection import (
+    DEFAULT_POOL_SIZE,
     BaseConnection,
     BaseCredentials,
     check_db_type_compatibility,
+    get_engine,
 )
 from sheetwork.core.config.profile import Profile
 from sheetwork.core.exceptions import CredentialsParsingError
 
+STAGING_FORMATS = ("csv", "csv_gzip", "parquet")
+
 
 class SnowflakeCredentialsModel(BaseModel):
     """Pydantic credentials validator model for Snowflake adaptor."""
@@ -24,11 +27,24 @@ class SnowflakeCredentialsModel(BaseModel):
     database: str
     warehouse: str
     target_schema: str
+    # plain csv, gzipped by the connector on PUT. csv_gzip and parquet have to be opted into.
+    staging_format: str = "csv"
+    staging_compression_level: int = 6
+    staging_chunk_size: int = 250_000
+    staging_put_parallel: int = 4
+    pool_size: int = DEFAULT_POOL_SIZE
 
     db_type = validator("db_type", "snowflake", allow_reuse=True, check_fields=False)(
         check_db_type_compatibility
     )
 
+    @validator("staging_format")
+    def check_staging_format(cls, staging_format: str) -> str:
+        """Makes sure the requested staging file format is one the adapter knows how to write."""
+        staging_format = staging_format.lower()
+        assert staging_format in STAGING_FORMATS, f"must be one of {STAGING_FORMATS}"
+        return staging_format
+
     class Config:
         """Handles field remapping to avoid keyword collision."""
 
@@ -47,7 +63,7 @@ class SnowflakeCredentials(BaseCredentials):
         self.profile = profile.profile_dict
         self.are_valid_credentials: bool = False
         self.db_type: str = str()
-        self.credentials: Dict[str, str] = dict()
+        self.credentials: Dict[str, Any] = dict()
         self.parse_and_validate_credentials()
 
     def parse_and_validate_credentials(self) -> None:
@@ -70,6 +86,11 @@ class SnowflakeCredentials(BaseCredentials):
         self.warehouse = self.credentials["warehouse"]
         self.database = self.credentials["database"]
         self.target_schema = self.credentials["target_schema"]
+        self.staging_format = self.credentials["staging_format"]
+        self.staging_compression_level = self.credentials["staging_compression_level"]
+        self.staging_chunk_size = self.credentials["staging_chunk_size"]
+        self.staging_put_parallel = self.credentials["staging_put_parallel"]
+        self.pool_size = self.credentials["pool_size"]
 
 
 class SnowflakeConnection(BaseConnection):
@@ -87,7 +108,8 @@ class SnowflakeConnection(BaseConnection):
         self.generate_engine()
 
     def generate_engine(self):
-        self.engine = create_engine(
+        # logins are slow on Snowflake, sheets of the same process reuse the pooled connections.
+        self.engine = get_engine(
             URL(
                 account=self.credentials.account,
                 user=self.credentials.user,
@@ -96,5 +118,6 @@ class SnowflakeConnection(BaseConnection):
                 warehouse=self.credentials.warehouse,
                 database=self.credentials.database,
                 schema=self.credentials.target_schema,
-            )
+            ),
+            pool_size=self.credentials.pool_size,
         )
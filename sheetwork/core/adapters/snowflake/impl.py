@@ -1,18 +1,54 @@
 """Module containing all Database Specific classes."""
+import importlib.util
+import math
+import os
 import tempfile
-from typing import Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas
+import sqlalchemy
+from sqlalchemy.exc import NoSuchTableError, ProgrammingError
 from sqlalchemy.schema import CreateSchema
 
-from sheetwork.core.adapters.base.impl import BaseSQLAdapter
+from sheetwork.core.adapters.base.impl import SWAP_TABLE_SUFFIX, BaseSQLAdapter
 from sheetwork.core.adapters.snowflake.connection import SnowflakeConnection
 from sheetwork.core.config.config import ConfigLoader
-from sheetwork.core.exceptions import DatabaseError, NoAcquiredConnectionError, TableDoesNotExist
+from sheetwork.core.exceptions import (
+    DatabaseError,
+    MissingDependencyError,
+    NoAcquiredConnectionError,
+    TableDoesNotExist,
+    TableValidationError,
+)
 from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.spans import GLOBAL_SPAN_RECORDER as spans
+from sheetwork.core.sync import (
+    DELETED_FLAG_COLUMN,
+    ROW_HASH_COLUMN,
+    add_row_hashes,
+    check_merge_keys,
+    compute_delta,
+    make_staged_rows,
+)
 from sheetwork.core.ui.printer import green, red, timed_message, yellow
 from sheetwork.core.utils import cast_pandas_dtypes
 
+# stage file format options and extension of the staged file for each supported staging format.
+STAGING_FILE_FORMATS = {
+    "csv": (
+        "type = 'CSV' field_delimiter = '|' skip_header = 0 field_optionally_enclosed_by = '\"'",
+        ".csv",
+    ),
+    "csv_gzip": (
+        "type = 'CSV' field_delimiter = '|' skip_header = 0 field_optionally_enclosed_by = '\"' "
+        "compression = 'GZIP'",
+        ".csv.gz",
+    ),
+    "parquet": ("type = 'PARQUET'", ".parquet"),
+}
+
 
 class SnowflakeAdapter(BaseSQLAdapter):
     """Interacts with snowflake via SQLAlchemy."""
@@ -31,22 +67,33 @@ class SnowflakeAdapter(BaseSQLAdapter):
         self.config = config
         self._database: str = self.connection.credentials.credentials.get("database", str())
         self._has_connection: bool = False
+        self._connection_users: int = 0
+        # rows COPY INTO reported into tables that were fully (re)loaded, by (schema, table).
+        self.rows_loaded: Dict[Tuple[str, str], int] = dict()
+        self.staging_format: str = connection.credentials.staging_format
+        self.staging_compression_level: int = connection.credentials.staging_compression_level
+        self.staging_chunk_size: int = connection.credentials.staging_chunk_size
+        self.staging_put_parallel: int = connection.credentials.staging_put_parallel
 
     def acquire_connection(self) -> None:
-        try:
-            self.con = self.engine.connect()
-            self._has_connection = True
-        except Exception:
-            raise DatabaseError(red("Error creating Snowflake connection."))
+        # nested calls (see `reuse_connection()`) share the connection that is already open.
+        if self._connection_users == 0:
+            try:
+                self.con = self.engine.connect()
+                self._has_connection = True
+            except Exception:
+                raise DatabaseError(red("Error creating Snowflake connection."))
+        self._connection_users += 1
 
     def close_connection(self) -> None:
-        try:
-            self.con.close()
-            self._has_connection = False
-        except AttributeError:
+        if self._connection_users == 0:
             raise DatabaseError(
                 red("SnowflakeAdaptor did not create a connection so it cannot be closed")
             )
+        self._connection_users -= 1
+        if self._connection_users == 0:
+            self.con.close()
+            self._has_connection = False
 
     def _create_schema(self) -> None:
         if self._has_connection is False:
@@ -69,11 +116,241 @@ class SnowflakeAdapter(BaseSQLAdapter):
         except Exception as e:
             raise DatabaseError(str(e))
 
-    def upload(self, df: pandas.DataFrame, override_schema: str = str()) -> None:
+    def _write_staging_file(self, df: pandas.DataFrame, path: str) -> None:
+        """Serialises the DataFrame into the file that will be PUT onto the Snowflake stage.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame to stage.
+            path (str): where to write the file.
+        """
+        if self.staging_format == "parquet":
+            if importlib.util.find_spec("pyarrow") is None:
+                raise MissingDependencyError(
+                    "Staging as parquet requires pyarrow. Install it with "
+                    "`pip install sheetwork[parquet]` or choose another `staging_format`."
+                )
+            # parquet keeps numbers, booleans and timestamps typed so Snowflake does not have to
+            # parse them back from strings. Snowflake does not read nanosecond timestamps properly.
+            df.to_parquet(
+                path,
+                engine="pyarrow",
+                index=False,
+                coerce_timestamps="us",
+                allow_truncated_timestamps=True,
+            )
+        elif self.staging_format == "csv_gzip":
+            df.to_csv(
+                path,
+                index=False,
+                header=False,
+                sep="|",
+                compression={"method": "gzip", "compresslevel": self.staging_compression_level},
+            )
+        else:
+            df.to_csv(path, index=False, header=False, sep="|")
+
+    def _stage_in_chunks(self, df: pandas.DataFrame, stage_name: str, staging_dir: str) -> int:
+        """Stages the DataFrame as several files of `staging_chunk_size` rows.
+
+        Serialisation is pipelined with the upload: while a chunk is being PUT, the next one is
+        already being written on a background thread. PUTs stay on the calling thread as the
+        connection cannot be shared across threads.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame to stage.
+            stage_name (str): name of the (already created) stage to PUT the files onto.
+            staging_dir (str): local directory in which to write the chunk files.
+
+        Returns:
+            int: number of files staged.
+        """
+        _, file_suffix = STAGING_FILE_FORMATS[self.staging_format]
+        # always stage at least one file so that empty sheets go through the same path.
+        number_of_chunks = max(math.ceil(len(df) / self.staging_chunk_size), 1)
+        # compressed and parquet files are ready to load, no need for the connector to gzip them.
+        auto_compress = "true" if self.staging_format == "csv" else "false"
+        # chunks are written on another thread, their spans still belong to the current one.
+        span_context = spans.current_context()
+
+        def write_chunk(chunk_number: int) -> str:
+            chunk_start = chunk_number * self.staging_chunk_size
+            chunk_end = chunk_start + self.staging_chunk_size
+            path = str(Path(staging_dir, f"{stage_name}_{chunk_number:05d}{file_suffix}"))
+            with spans.span("serialise", parent=span_context) as serialise_span:
+                chunk = df.iloc[chunk_start:chunk_end]
+                self._write_staging_file(chunk, path)
+                serialise_span.rows = len(chunk)
+                serialise_span.num_bytes = os.path.getsize(path)
+            return path
+
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            next_chunk = writer.submit(write_chunk, 0)
+            for chunk_number in range(number_of_chunks):
+                chunk_path = next_chunk.result()
+                if chunk_number + 1 < number_of_chunks:
+                    next_chunk = writer.submit(write_chunk, chunk_number + 1)
+                logger.debug(f"Staging chunk {chunk_number + 1}/{number_of_chunks}")
+                with spans.span("put") as put_span:
+                    put_span.num_bytes = os.path.getsize(chunk_path)
+                    self.con.execute(
+                        f"put file://{chunk_path} @{stage_name} "
+                        f"auto_compress = {auto_compress} parallel = {self.staging_put_parallel}"
+                    )
+                os.remove(chunk_path)
+        return number_of_chunks
+
+    def _copy_via_stage(
+        self, df: pandas.DataFrame, qualified_table: str, staging_dir: str
+    ) -> Optional[int]:
+        """Loads the DataFrame into a table by staging it in files and copying those into it.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame whose columns match the ones of the table.
+            qualified_table (str): fully qualified name of the table to load.
+            staging_dir (str): local directory in which to write the staging files.
+
+        Returns:
+            Optional[int]: number of rows loaded as reported by `copy into`, if it did.
+        """
+        file_format, _ = STAGING_FILE_FORMATS[self.staging_format]
+        stage_name = f"{qualified_table.rsplit('.', 1)[-1]}_stg"
+        self.con.execute(
+            f"""
+            create or replace temporary stage {stage_name}
+            file_format = ({file_format})
+            """
+        )
+        with spans.span("stage") as stage_span:
+            stage_span.rows = len(df)
+            self._stage_in_chunks(df, stage_name, staging_dir)
+        copy_options = (
+            "match_by_column_name = case_insensitive" if self.staging_format == "parquet" else str()
+        )
+        with spans.span("copy_into") as copy_span:
+            copy_span.rows = len(df)
+            copy_results = self.con.execute(
+                f"copy into {qualified_table} from @{stage_name} {copy_options}"
+            )
+            rows_loaded = self._sum_rows_loaded(copy_results.keys(), copy_results.fetchall())
+        self.con.execute(f"drop stage {stage_name}")
+        return rows_loaded
+
+    @staticmethod
+    def _sum_rows_loaded(columns: Any, copy_results: Any) -> Optional[int]:
+        # copy into returns one row per file loaded, with the number of rows it loaded from it.
+        columns = [str(column).lower() for column in columns]
+        if "rows_loaded" not in columns:
+            return None
+        rows_loaded_index = columns.index("rows_loaded")
+        return sum(int(result[rows_loaded_index]) for result in copy_results)
+
+    def _merge_into_table(self, df: pandas.DataFrame, target_schema: str, staging_dir: str) -> None:
+        """Applies the rows of the sheet that changed since the last upload to the target table.
+
+        Changed rows and the keys of deleted rows are loaded into a temporary table which is then
+        merged into the target table. A table that does not exist yet, was not loaded with row
+        hashes or whose columns are no longer the ones of the sheet is (re)created and loaded in
+        full.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame with its row hashes (see `add_row_hashes()`).
+            target_schema (str): schema in which the target table lives.
+            staging_dir (str): local directory in which to write the staging files.
+        """
+        target_table = self.config.target_table
+        qualified_table = f"{self._database}.{target_schema}.{target_table}"
+        merge_keys = self.config.merge_keys
+        check_merge_keys(df, merge_keys)
+
+        columns = [str(column) for column in df.columns]
+        inspector = sqlalchemy.inspect(self.con)
+        table_columns: List[str] = list()
+        if inspector.has_table(target_table, schema=target_schema):
+            table_columns = [
+                str(column["name"]).lower()
+                for column in inspector.get_columns(target_table, schema=target_schema)
+            ]
+        if sorted(table_columns) != sorted(column.lower() for column in columns):
+            if ROW_HASH_COLUMN in table_columns:
+                logger.info(
+                    yellow(
+                        f"The columns of the sheet no longer match the ones of {qualified_table}, "
+                        "reloading all the rows of the sheet."
+                    )
+                )
+            else:
+                logger.info(
+                    yellow(f"Creating {qualified_table} and loading all the rows of the sheet.")
+                )
+            dtypes_dict = self.sqlalchemy_dtypes(self.config.sheet_columns)
+            dtypes_dict[ROW_HASH_COLUMN] = sqlalchemy.types.BIGINT
+            df.head(0).to_sql(
+                name=target_table,
+                schema=target_schema,
+                con=self.con,
+                if_exists="replace",
+                index=False,
+                dtype=dtypes_dict,
+            )
+            self._copy_via_stage(df, qualified_table, staging_dir)
+            return
+
+        with spans.span("diff") as diff_span:
+            existing = pandas.read_sql(
+                f"select {', '.join(merge_keys)}, {ROW_HASH_COLUMN} from {qualified_table}",
+                self.con,
+            )
+            delta = compute_delta(df, existing, merge_keys, self.config.sheet_columns)
+            diff_span.rows = len(df)
+        logger.info(
+            timed_message(
+                f"{delta.num_inserted} rows inserted, {delta.num_updated} updated and "
+                f"{len(delta.deletes)} deleted since the last upload."
+            )
+        )
+        if delta.is_empty:
+            return
+
+        staging_table = f"{qualified_table}__sheetwork_stg"
+        # the files are copied in by position so the staging table takes the order of the sheet's
+        # columns, and the types of the table's.
+        self.con.execute(
+            f"create or replace temporary table {staging_table} as "
+            f"select {', '.join(columns)} from {qualified_table} limit 0"
+        )
+        self.con.execute(f"alter table {staging_table} add column {DELETED_FLAG_COLUMN} boolean")
+        staged_rows = make_staged_rows(delta)
+        self._copy_via_stage(staged_rows, staging_table, staging_dir)
+
+        matches_keys = " and ".join([f"t.{key} = s.{key}" for key in merge_keys])
+        updates = ", ".join(
+            [f"t.{column} = s.{column}" for column in columns if column not in merge_keys]
+        )
+        with spans.span("merge") as merge_span:
+            self.con.execute(
+                f"""
+                merge into {qualified_table} t using {staging_table} s on {matches_keys}
+                when matched and s.{DELETED_FLAG_COLUMN} then delete
+                when matched then update set {updates}
+                when not matched and not s.{DELETED_FLAG_COLUMN} then
+                insert ({', '.join(columns)}) values ({', '.join([f's.{c}' for c in columns])})
+                """
+            )
+            merge_span.rows = len(staged_rows)
+        self.con.execute(f"drop table {staging_table}")
+
+    def upload(
+        self,
+        df: pandas.DataFrame,
+        override_schema: str = str(),
+        inplace: bool = False,
+        append: bool = False,
+    ) -> None:
         # cast columns
         # !: note integer conversion doesn't actually happen it is left as a str see #204, #205
-        df = cast_pandas_dtypes(df, overwrite_dict=self.config.sheet_columns)
-        dtypes_dict = self.sqlalchemy_dtypes(self.config.sheet_columns)
+        with spans.span("cast") as cast_span:
+            df = cast_pandas_dtypes(df, overwrite_dict=self.config.sheet_columns, inplace=inplace)
+            cast_span.rows = len(df)
 
         # potentially override target schema from config.
         if override_schema:
@@ -81,70 +358,177 @@ class SnowflakeAdapter(BaseSQLAdapter):
         else:
             target_schema = self.config.target_schema
 
-        # write to csv and try to talk to db
-        temp = tempfile.NamedTemporaryFile()
-        df.to_csv(temp.name, index=False, header=False, sep="|")
+        # staging files are written in there while they get PUT (see _stage_in_chunks)
+        staging_dir = tempfile.TemporaryDirectory()
 
         self.acquire_connection()
 
         # set up schema creation
         self._create_schema()
 
+        # only full loads tell how many rows the table holds (see `check_table()`).
+        self.rows_loaded.pop((target_schema, self.config.target_table), None)
+        rows_loaded: Optional[int] = None
         try:
-            # set the table creation behaviour
-            _if_exists = "fail"
-            if self.config.project.object_creation_dct["create_table"] is True:
-                if self.config.project.destructive_create_table:
-                    _if_exists = "replace"
-
-                # perform the create ops
-                try:
-                    df.head(0).to_sql(
-                        name=self.config.target_table,
-                        schema=target_schema,
-                        con=self.con,
-                        if_exists=_if_exists,
-                        index=False,
-                        dtype=dtypes_dict,
-                    )
-
-                # if _if_exists is fail pandas will throw a ValueError which we want to escape when
-                # destructive_create_table is set to False (or not provided) and throw a warning instead.
-                except ValueError as e:
-                    if _if_exists == "fail":
-                        logger.warning(
-                            yellow(
-                                f"{self._database}"
-                                f".{target_schema}.{self.config.target_table} already exists and was not\n"
-                                "recreated because 'destructive_create_table' is set to False in your profile \n"
-                                "APPENDING instead."
-                            )
-                        )
-                    else:
-                        raise DatabaseError(str(e))
-
-            # Now push the actual data --the pandas create above is only for creation the logic below
-            # is actually faster as pandas does it row by row
-            qualified_table = (
-                f"{self._database}.{self.config.target_schema}.{self.config.target_table}"
-            )
-            self.con.execute(
-                f"""
-                create or replace temporary stage {self.config.target_table}_stg
-                file_format = (type = 'CSV' field_delimiter = '|'
-                skip_header = 0 field_optionally_enclosed_by = '"')
-                """
-            )
-            self.con.execute(f"put file://{temp.name} @{self.config.target_table}_stg")
-            self.con.execute(f"copy into {qualified_table} from @{self.config.target_table}_stg")
-            self.con.execute(f"drop stage {self.config.target_table}_stg")
+            if self.config.sync_mode == "merge":
+                self._merge_into_table(
+                    add_row_hashes(df, inplace=inplace), target_schema, staging_dir.name
+                )
+            elif self.config.sync_mode == "swap" and not append:
+                rows_loaded = self._swap_into_table(df, target_schema, staging_dir.name)
+            else:
+                rows_loaded = self._load_into_table(df, target_schema, staging_dir.name, append)
+            if rows_loaded is not None:
+                self.rows_loaded[(target_schema, self.config.target_table)] = rows_loaded
         except Exception as e:
             raise DatabaseError(str(e))
         finally:
             logger.debug("CLOSING CONNECTION & CLEANING TMP FILE")
-            temp.close()
+            staging_dir.cleanup()
             self.close_connection()
 
+    def _load_into_table(
+        self, df: pandas.DataFrame, target_schema: str, staging_dir: str, append: bool
+    ) -> Optional[int]:
+        """Loads the sheet into the target table, (re)creating it first when the project says so.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame to load.
+            target_schema (str): schema in which the target table lives.
+            staging_dir (str): local directory in which to write the staging files.
+            append (bool): when true the rows are added to the table as it is.
+
+        Returns:
+            Optional[int]: number of rows in the table when it was replaced, None when the rows
+                were added to the ones it already held (or copy into did not report them).
+        """
+        dtypes_dict = self.sqlalchemy_dtypes(self.config.sheet_columns)
+        # set the table creation behaviour
+        _if_exists = "fail"
+        # rows appended to a table loaded before go straight in, whatever the table creation
+        # settings are.
+        if self.config.project.object_creation_dct["create_table"] is True and not append:
+            if self.config.project.destructive_create_table:
+                _if_exists = "replace"
+
+            # perform the create ops
+            try:
+                df.head(0).to_sql(
+                    name=self.config.target_table,
+                    schema=target_schema,
+                    con=self.con,
+                    if_exists=_if_exists,
+                    index=False,
+                    dtype=dtypes_dict,
+                )
+
+            # if _if_exists is fail pandas will throw a ValueError which we want to escape when
+            # destructive_create_table is set to False (or not provided) and throw a warning instead.
+            except ValueError as e:
+                if _if_exists == "fail":
+                    logger.warning(
+                        yellow(
+                            f"{self._database}"
+                            f".{target_schema}.{self.config.target_table} already exists and was not\n"
+                            "recreated because 'destructive_create_table' is set to False in your profile \n"
+                            "APPENDING instead."
+                        )
+                    )
+                else:
+                    raise DatabaseError(str(e))
+
+        # Now push the actual data --the pandas create above is only for creation the logic below
+        # is actually faster as pandas does it row by row
+        qualified_table = f"{self._database}.{self.config.target_schema}.{self.config.target_table}"
+        rows_loaded = self._copy_via_stage(df, qualified_table, staging_dir)
+        return rows_loaded if _if_exists == "replace" else None
+
+    def _count_rows_and_columns(self, target_schema: str, target_table: str) -> Tuple[int, int]:
+        # a single round trip for both counts.
+        num_rows, num_columns = self.con.execute(
+            sqlalchemy.text(
+                f"select (select count(*) from {self._database}.{target_schema}.{target_table}), "
+                f"(select count(*) from {self._database}.information_schema.columns "
+                "where table_schema = :schema and table_name = :table)"
+            ),
+            schema=target_schema.upper(),
+            table=target_table.upper(),
+        ).first()
+        return num_rows, num_columns
+
+    def _count_columns(self, target_schema: str, target_table: str) -> int:
+        return self.con.execute(
+            sqlalchemy.text(
+                f"select count(*) from {self._database}.information_schema.columns "
+                "where table_schema = :schema and table_name = :table"
+            ),
+            schema=target_schema.upper(),
+            table=target_table.upper(),
+        ).scalar()
+
+    def _reflect_table(self, target_schema: str, target_table: str) -> Tuple[int, int]:
+        columns = sqlalchemy.inspect(self.con).get_columns(target_table, schema=target_schema)
+        if not columns:
+            raise NoSuchTableError(target_table)
+        num_rows = self.con.execute(
+            f"select count(*) from {self._database}.{target_schema}.{target_table}"
+        ).scalar()
+        return num_rows, len(columns)
+
+    def _swap_into_table(self, df: pandas.DataFrame, target_schema: str, staging_dir: str) -> int:
+        """Rebuilds the target table next to the live one and swaps them once it is validated.
+
+        The sheet is loaded into `<table>__sheetwork_tmp` which is swapped with the live table
+        (`alter table ... swap with`) only once its row and column counts match the ones of the
+        sheet. Readers keep seeing the previous table until then and a failed load never touches
+        it.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame to load.
+            target_schema (str): schema in which the target table lives.
+            staging_dir (str): local directory in which to write the staging files.
+
+        Raises:
+            TableValidationError: when the loaded table does not match the sheet.
+
+        Returns:
+            int: number of rows in the swapped in table.
+        """
+        target_table = self.config.target_table
+        swap_table = f"{target_table}{SWAP_TABLE_SUFFIX}"
+        qualified_table = f"{self._database}.{target_schema}.{target_table}"
+        qualified_swap_table = f"{self._database}.{target_schema}.{swap_table}"
+        df.head(0).to_sql(
+            name=swap_table,
+            schema=target_schema,
+            con=self.con,
+            if_exists="replace",
+            index=False,
+            dtype=self.sqlalchemy_dtypes(self.config.sheet_columns),
+        )
+        try:
+            self._copy_via_stage(df, qualified_swap_table, staging_dir)
+            num_rows, num_columns = self._count_rows_and_columns(target_schema, swap_table)
+            if (num_rows, num_columns) != (len(df), len(df.columns)):
+                raise TableValidationError(
+                    f"{swap_table} has {num_rows} rows and {num_columns} columns when the sheet "
+                    f"has {len(df)} rows and {len(df.columns)} columns. {target_table} was left "
+                    "untouched."
+                )
+            with spans.span("swap"):
+                if sqlalchemy.inspect(self.con).has_table(target_table, schema=target_schema):
+                    # the swap table ends up holding the previous version of the table.
+                    self.con.execute(
+                        f"alter table {qualified_table} swap with {qualified_swap_table}"
+                    )
+                else:
+                    self.con.execute(
+                        f"alter table {qualified_swap_table} rename to {qualified_table}"
+                    )
+        finally:
+            self.con.execute(f"drop table if exists {qualified_swap_table}")
+        return num_rows
+
     def excecute_query(self, query: str, return_results: bool = False) -> Optional[Any]:
         self.acquire_connection()
         results: Any = self.con.execute(query)
@@ -155,32 +539,52 @@ class SnowflakeAdapter(BaseSQLAdapter):
         self.close_connection()
         return None
 
-    def check_table(self, target_schema: str, target_table: str) -> Tuple[int, int]:
-        # TODO: Rework this into a non injectible query
-        columns_query = f"""
-                select count(*)
-                from {self._database}.information_schema.columns
-                where table_catalog = '{self._database.upper()}'
-                and table_schema = '{target_schema.upper()}'
-                and table_name = '{target_table.upper()}'
-                ;
-                """
-        # TODO: Rework this into a non injectible query
-        rows_query = rows_query = f"select count(*) from {target_schema}.{target_table};"
-        columns = self.excecute_query(columns_query, return_results=True)
-        rows = self.excecute_query(rows_query, return_results=True)
-        if columns and rows:
-            logger.info(
-                timed_message(
-                    green(
-                        f"Push successful for "
-                        f"{self._database}.{target_schema}.{target_table} \n"
-                        f"Found {columns[0][0]} columns and {rows[0][0]} rows."
-                    )
+    def check_table(
+        self, target_schema: str, target_table: str, deep: bool = False
+    ) -> Tuple[int, int]:
+        """Checks that the table exists and reports its number of columns and rows.
+
+        The row count copy into reported when the table was last fully loaded is trusted so that
+        only the number of columns has to be read, in a single query. Other tables are counted in
+        the same query.
+
+        Args:
+            target_schema (str): schema in which the table lives.
+            target_table (str): table to check.
+            deep (bool, optional): when true the whole table is reflected and counted instead.
+                Defaults to False.
+
+        Raises:
+            TableDoesNotExist: when there is no such table.
+
+        Returns:
+            Tuple[int, int]: number of columns and number of rows of the table.
+        """
+        qualified_table = f"{self._database}.{target_schema}.{target_table}"
+        rows_loaded = self.rows_loaded.get((target_schema, target_table))
+        self.acquire_connection()
+        try:
+            if deep:
+                num_rows, num_columns = self._reflect_table(target_schema, target_table)
+            elif rows_loaded is not None:
+                num_rows, num_columns = rows_loaded, self._count_columns(
+                    target_schema, target_table
+                )
+            else:
+                num_rows, num_columns = self._count_rows_and_columns(target_schema, target_table)
+        except (NoSuchTableError, ProgrammingError):
+            raise TableDoesNotExist(f"Table {qualified_table} does not exist.")
+        finally:
+            self.close_connection()
+        if num_columns == 0:
+            raise TableDoesNotExist(f"Table {qualified_table} does not exist.")
+
+        logger.info(
+            timed_message(
+                green(
+                    f"Push successful for {qualified_table} \n"
+                    f"Found {num_columns} columns and {num_rows} rows."
                 )
             )
-            return columns[0][0], rows[0][0]
-        else:
-            raise TableDoesNotExist(
-                f"Table {self._database}.{target_schema}.{target_table} seems empty"
-            )
+        )
+        return num_columns, num_rows
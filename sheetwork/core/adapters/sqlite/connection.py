@@ -0,0 +1,120 @@
+"""Concrete SQLite Database Connector classes."""
+from pathlib import Path
+from typing import Any, Dict
+
+from pydantic import BaseModel, ValidationError, validator
+from sqlalchemy import create_engine, event
+
+from sheetwork.core.adapters.base.connection import BaseConnection, check_db_type_compatibility
+from sheetwork.core.config.profile import Profile
+from sheetwork.core.exceptions import CredentialsParsingError
+
+# the database SQLite keeps in memory (and drops with the connection) when no file is given.
+IN_MEMORY_DATABASE = ":memory:"
+
+
+class SqliteCredentialsModel(BaseModel):
+    """Pydantic credentials validator model for sqlite adaptor."""
+
+    database: str = IN_MEMORY_DATABASE
+    target_schema: str = "main"
+
+    db_type = validator("db_type", "sqlite", allow_reuse=True, check_fields=False)(
+        check_db_type_compatibility
+    )
+
+    class Config:
+        """Handles field remapping to avoid keyword collision."""
+
+        fields = {"target_schema": "schema"}
+
+
+class SqliteCredentials:
+    """Parses and sets up SQLite credentials object."""
+
+    def __init__(self, profile: Profile) -> None:
+        """Constructor for SQLite credentials."""
+        self._profile = profile.profile_dict
+        self.are_valid_credentials: bool = False
+        self._db_type: str = str()
+        self.credentials: Dict[str, str] = dict()
+        self.database: str = str()
+        self.target_schema: str = str()
+        self.parse_and_validate_credentials()
+
+    def parse_and_validate_credentials(self) -> None:
+        """Parse and validate credentials using pydandic model."""
+        try:
+            _credentials = SqliteCredentialsModel(**self._profile)
+        except ValidationError as e:
+            raise CredentialsParsingError(f"Your profile is not valid \n {e}")
+
+        self.credentials = _credentials.dict()
+        self._db_type = self._profile.get("db_type", str())
+        self.are_valid_credentials = True
+        self.database = self.credentials.get("database", IN_MEMORY_DATABASE)
+        self.target_schema = self.credentials.get("target_schema", str())
+
+
+def schema_database(database: str, target_schema: str) -> str:
+    """Path of the database file holding a schema (other than `main`) of an SQLite database.
+
+    SQLite has no schemas: each one is a database file of its own, `<database>.<schema>.db`, which
+    sits next to the one of the profile and is attached to the connections under its name.
+    """
+    if database == IN_MEMORY_DATABASE:
+        return IN_MEMORY_DATABASE
+    database_path = Path(database).expanduser()
+    return str(database_path.with_name(f"{database_path.stem}.{target_schema}.db"))
+
+
+def _quote(identifier: str) -> str:
+    return '"{}"'.format(identifier.replace('"', '""'))
+
+
+def _set_up_connection(database: str, dbapi_connection: Any) -> None:
+    # let SQLAlchemy, not pysqlite, open transactions so that DDL is part of them as well.
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    # writers no longer block readers and commits skip most fsyncs.
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    if database != IN_MEMORY_DATABASE:
+        database_path = Path(database)
+        schema_start = len(database_path.stem) + 1
+        for schema_path in database_path.parent.glob(f"{database_path.stem}.*.db"):
+            target_schema = schema_path.name[schema_start:-3]
+            cursor.execute(f"ATTACH DATABASE ? AS {_quote(target_schema)}", (str(schema_path),))
+    cursor.close()
+
+
+def _begin_transaction(connection: Any) -> None:
+    connection.exec_driver_sql("BEGIN")
+
+
+class SqliteConnection(BaseConnection):
+    """Sets up SQLite connector engine."""
+
+    def __init__(self, credentials: SqliteCredentials) -> None:
+        """Constructs SQLite connector object."""
+        self._credentials = credentials
+        self.generate_engine()
+
+    def generate_engine(self) -> None:
+        """Creates the engine of the database file, and the file itself when it does not exist.
+
+        Opening an SQLite file costs next to nothing so, unlike the ones of server databases, the
+        engine is not shared (see `get_engine()`) and connections are not pooled.
+        """
+        database = self._credentials.database
+        if database != IN_MEMORY_DATABASE:
+            database_path = Path(database).expanduser()
+            database_path.parent.mkdir(parents=True, exist_ok=True)
+            database = str(database_path)
+        self.engine = create_engine(f"sqlite:///{database}")
+
+        def set_up_connection(dbapi_connection: Any, connection_record: Any) -> None:
+            _set_up_connection(database, dbapi_connection)
+
+        event.listen(self.engine, "connect", set_up_connection)
+        event.listen(self.engine, "begin", _begin_transaction)
@@ -0,0 +1,443 @@
+"""Concrete database implementations for SQLite Connector."""
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas
+import sqlalchemy
+from sqlalchemy import MetaData, func, select
+from sqlalchemy.exc import NoSuchTableError, OperationalError
+
+from sheetwork.core.adapters.base.impl import SWAP_TABLE_SUFFIX, BaseSQLAdapter
+from sheetwork.core.adapters.sqlite.connection import SqliteConnection, schema_database
+from sheetwork.core.config.config import ConfigLoader
+from sheetwork.core.exceptions import (
+    DatabaseError,
+    NoAcquiredConnectionError,
+    TableDoesNotExist,
+    TableValidationError,
+    UploadError,
+)
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.spans import GLOBAL_SPAN_RECORDER as spans
+from sheetwork.core.sync import ROW_HASH_COLUMN, add_row_hashes, check_merge_keys, compute_delta
+from sheetwork.core.ui.printer import green, red, timed_message, yellow
+from sheetwork.core.utils import cast_pandas_dtypes
+
+# schemas that always exist in an SQLite connection.
+_BUILTIN_SCHEMAS = ("main", "temp")
+
+# how SQLAlchemy stores (and expects to read back) dates and timestamps in SQLite.
+_DATE_FORMAT = "%Y-%m-%d"
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+class SqliteAdaptor(BaseSQLAdapter):
+    """Concrete SQL adaptor for SQLite databases.
+
+    Schemas other than `main` are database files of their own (see `schema_database()`).
+    """
+
+    # number of rows converted and sent to SQLite per `executemany()`.
+    INSERT_CHUNK_SIZE = 100_000
+
+    def __init__(self, connection: SqliteConnection, config: ConfigLoader) -> None:
+        """Constructor for SqliteAdaptor.
+
+        Args:
+            connection (SqliteConnection): connection object containing the SQLAlchemy engine of
+                the database file.
+            config (ConfigLoader): configuration class containing all params for sheetwork.
+        """
+        self._connection = connection
+        self._engine = connection.engine
+        self._config = config
+        self._database = connection._credentials.database
+        self._has_connection: bool = False
+        self._connection_users: int = 0
+        # rows inserted into tables that were fully (re)loaded, by (schema, table).
+        self.rows_loaded: Dict[Tuple[str, str], int] = dict()
+
+    def acquire_connection(self) -> None:
+        # nested calls (see `reuse_connection()`) share the connection that is already open.
+        if self._connection_users == 0:
+            try:
+                self.con = self._engine.connect()
+                self._has_connection = True
+            except Exception:
+                raise DatabaseError(red("Error creating SQLite connection."))
+        self._connection_users += 1
+
+    def close_connection(self) -> None:
+        if self._connection_users == 0:
+            raise DatabaseError(
+                red("SQLite adaptor did not create a connection so it cannot be closed.")
+            )
+        self._connection_users -= 1
+        if self._connection_users == 0:
+            self.con.close()
+            self._has_connection = False
+
+    def _attach_schema(self, target_schema: str) -> None:
+        # schemas that already exist are attached when connecting (see `SqliteConnection`).
+        if target_schema in _BUILTIN_SCHEMAS:
+            return
+        attached_schemas = [row[1] for row in self.con.exec_driver_sql("PRAGMA database_list")]
+        if target_schema in attached_schemas:
+            return
+        quoted_schema = self.con.dialect.identifier_preparer.quote(target_schema)
+        # ATTACH cannot run in a transaction, this happens before `upload()` opens one.
+        self.con.exec_driver_sql(
+            f"ATTACH DATABASE ? AS {quoted_schema}",
+            (schema_database(self._database, target_schema),),
+        )
+        self.con.exec_driver_sql(f"PRAGMA {quoted_schema}.journal_mode=WAL")
+
+    def _create_schema(self) -> None:
+        if self._has_connection is False:
+            raise NoAcquiredConnectionError(
+                f"No acquired connection for {type(self).__name__}. "
+                "Make sure `acquire_connection is ran before."
+            )
+        try:
+            if self._config.project.object_creation_dct["create_schema"]:
+                logger.debug(yellow(f"Creating schema: {self._config.target_schema} if needed"))
+                self._attach_schema(self._config.target_schema)
+        except Exception as e:
+            raise DatabaseError(str(e))
+
+    def _qualify_table(self, target_schema: str, target_table: str) -> str:
+        preparer = self.con.dialect.identifier_preparer
+        return f"{preparer.quote_schema(target_schema)}.{preparer.quote(target_table)}"
+
+    def _make_rows(self, df: pandas.DataFrame) -> List[Tuple[Any, ...]]:
+        # sqlite3 only binds plain python values: no numpy scalars, NaN or pandas timestamps.
+        columns = list()
+        for column_name, column in df.items():
+            if pandas.api.types.is_datetime64_any_dtype(column):
+                is_date = self._config.sheet_columns.get(column_name) == "date"
+                column = column.dt.strftime(_DATE_FORMAT if is_date else _TIMESTAMP_FORMAT)
+            columns.append(column.astype(object).where(column.notna(), None).tolist())
+        return list(zip(*columns))
+
+    def _insert_into_table(self, df: pandas.DataFrame, qualified_table: str) -> int:
+        """Inserts the rows of a DataFrame into the target table via `executemany()`.
+
+        Rows are converted and sent in chunks of `INSERT_CHUNK_SIZE` rows, each with a single
+        prepared `INSERT` statement, in the transaction the connection is in.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame whose columns match the ones of the target table.
+            qualified_table (str): quoted (and schema qualified) name of the target table.
+
+        Returns:
+            int: number of rows inserted.
+        """
+        preparer = self.con.dialect.identifier_preparer
+        columns = ", ".join([preparer.quote(str(column)) for column in df.columns])
+        placeholders = ", ".join(["?"] * len(df.columns))
+        insert_statement = f"INSERT INTO {qualified_table} ({columns}) VALUES ({placeholders})"
+
+        rows_inserted = 0
+        cursor = self.con.connection.cursor()
+        try:
+            chunk_size = type(self).INSERT_CHUNK_SIZE
+            for chunk_start in range(0, len(df), chunk_size):
+                chunk_end = chunk_start + chunk_size
+                with spans.span("serialise") as serialise_span:
+                    rows = self._make_rows(df.iloc[chunk_start:chunk_end])
+                    serialise_span.rows = len(rows)
+                with spans.span("insert") as insert_span:
+                    cursor.executemany(insert_statement, rows)
+                    insert_span.rows = len(rows)
+                rows_inserted += len(rows)
+        finally:
+            cursor.close()
+        logger.debug(f"Inserted {rows_inserted} rows into {qualified_table}")
+        return rows_inserted
+
+    def upload(
+        self,
+        df: pandas.DataFrame,
+        target_schema: str,
+        inplace: bool = False,
+        append: bool = False,
+    ) -> None:
+        with spans.span("cast") as cast_span:
+            df = cast_pandas_dtypes(df, overwrite_dict=self._config.sheet_columns, inplace=inplace)
+            cast_span.rows = len(df)
+
+        self.acquire_connection()
+        self._create_schema()
+
+        # only full loads tell how many rows the table holds (see `check_table()`).
+        self.rows_loaded.pop((target_schema, self._config.target_table), None)
+        rows_loaded: Optional[int] = None
+        try:
+            # DDL and data go in the same transaction so a failed load never leaves a dropped or
+            # half filled table behind.
+            with self.con.begin():
+                if self._config.sync_mode == "merge":
+                    self._merge_into_table(add_row_hashes(df, inplace=inplace), target_schema)
+                elif self._config.sync_mode == "swap" and not append:
+                    rows_loaded = self._swap_into_table(df, target_schema)
+                else:
+                    rows_loaded = self._load_into_table(df, target_schema, append)
+            if rows_loaded is not None:
+                self.rows_loaded[(target_schema, self._config.target_table)] = rows_loaded
+        except Exception as e:
+            raise UploadError(str(e))
+        finally:
+            logger.debug("Closing connection")
+            self.close_connection()
+
+    def _load_into_table(
+        self, df: pandas.DataFrame, target_schema: str, append: bool
+    ) -> Optional[int]:
+        """Loads the sheet into the target table, (re)creating it first when the project says so.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame to load.
+            target_schema (str): schema in which the target table lives.
+            append (bool): when true the rows are added to the table as it is.
+
+        Returns:
+            Optional[int]: number of rows in the table when it was replaced, None when the rows
+                were added to the ones it already held.
+        """
+        dtypes_dict = self.sqlalchemy_dtypes(self._config.sheet_columns)
+        _if_schema_exists = "append"
+        # rows appended to a table loaded before go straight in, whatever the table
+        # creation settings are.
+        if self._config.project.object_creation_dct["create_table"] is True and not append:
+            if self._config.project.destructive_create_table:
+                _if_schema_exists = "replace"
+
+            if _if_schema_exists == "append":
+                logger.warning(
+                    yellow(
+                        f"{self._database}"
+                        f".{target_schema}.{self._config.target_table} already exists and was not\n"
+                        "recreated because 'destructive_create_table' is set to False in your profile \n"
+                        "APPENDING instead."
+                    )
+                )
+            # pandas is only used for the table creation, the rows are inserted with a single
+            # prepared statement below instead of going through SQLAlchemy one by one.
+            df.head(0).to_sql(
+                name=self._config.target_table,
+                schema=target_schema,
+                con=self.con,
+                if_exists=_if_schema_exists,
+                index=False,
+                dtype=dtypes_dict,
+            )
+        rows_inserted = self._insert_into_table(
+            df, self._qualify_table(target_schema, self._config.target_table)
+        )
+        return rows_inserted if _if_schema_exists == "replace" else None
+
+    def _count_rows_and_columns(self, target_schema: str, target_table: str) -> Tuple[int, int]:
+        # a single round trip for both counts.
+        qualified_table = self._qualify_table(target_schema, target_table)
+        num_rows, num_columns = self.con.execute(
+            sqlalchemy.text(
+                f"SELECT (SELECT count(*) FROM {qualified_table}), "
+                "(SELECT count(*) FROM pragma_table_info(:table, :schema))"
+            ),
+            schema=target_schema,
+            table=target_table,
+        ).first()
+        return num_rows, num_columns
+
+    def _count_columns(self, target_schema: str, target_table: str) -> int:
+        return self.con.execute(
+            sqlalchemy.text("SELECT count(*) FROM pragma_table_info(:table, :schema)"),
+            schema=target_schema,
+            table=target_table,
+        ).scalar()
+
+    def _swap_into_table(self, df: pandas.DataFrame, target_schema: str) -> int:
+        """Rebuilds the target table next to the live one and swaps them once it is validated.
+
+        Works like the swap of the Postgres adaptor: the sheet is loaded into
+        `<table>__sheetwork_tmp` which replaces the live table, in the transaction of `upload()`,
+        only once its row and column counts match the ones of the sheet.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame to load.
+            target_schema (str): schema in which the target table lives.
+
+        Raises:
+            TableValidationError: when the loaded table does not match the sheet.
+
+        Returns:
+            int: number of rows in the swapped in table.
+        """
+        preparer = self.con.dialect.identifier_preparer
+        target_table = self._config.target_table
+        swap_table = f"{target_table}{SWAP_TABLE_SUFFIX}"
+        df.head(0).to_sql(
+            name=swap_table,
+            schema=target_schema,
+            con=self.con,
+            if_exists="replace",
+            index=False,
+            dtype=self.sqlalchemy_dtypes(self._config.sheet_columns),
+        )
+        self._insert_into_table(df, self._qualify_table(target_schema, swap_table))
+
+        num_rows, num_columns = self._count_rows_and_columns(target_schema, swap_table)
+        if (num_rows, num_columns) != (len(df), len(df.columns)):
+            raise TableValidationError(
+                f"{swap_table} has {num_rows} rows and {num_columns} columns when the sheet has "
+                f"{len(df)} rows and {len(df.columns)} columns. {target_table} was left untouched."
+            )
+        with spans.span("swap"):
+            self.con.execute(
+                f"DROP TABLE IF EXISTS {self._qualify_table(target_schema, target_table)}"
+            )
+            self.con.execute(
+                f"ALTER TABLE {self._qualify_table(target_schema, swap_table)} "
+                f"RENAME TO {preparer.quote(target_table)}"
+            )
+        return num_rows
+
+    def _merge_into_table(self, df: pandas.DataFrame, target_schema: str) -> None:
+        """Applies the rows of the sheet that changed since the last upload to the target table.
+
+        The keys of the rows updated or deleted in the sheet are inserted into a temporary table,
+        the rows of the target table matching them are deleted and the updated and inserted rows
+        are then inserted. A table that does not exist yet (or was not loaded with row hashes) is
+        (re)created and loaded in full.
+
+        Args:
+            df (pandas.DataFrame): cast DataFrame with its row hashes (see `add_row_hashes()`).
+            target_schema (str): schema in which the target table lives.
+        """
+        preparer = self.con.dialect.identifier_preparer
+        target_table = self._config.target_table
+        qualified_table = self._qualify_table(target_schema, target_table)
+        merge_keys = self._config.merge_keys
+        check_merge_keys(df, merge_keys)
+        keys = ", ".join([preparer.quote(key) for key in merge_keys])
+
+        inspector = sqlalchemy.inspect(self.con)
+        if not inspector.has_table(target_table, schema=target_schema) or ROW_HASH_COLUMN not in [
+            column["name"] for column in inspector.get_columns(target_table, schema=target_schema)
+        ]:
+            logger.info(
+                yellow(f"Creating {qualified_table} and loading all the rows of the sheet.")
+            )
+            dtypes_dict = self.sqlalchemy_dtypes(self._config.sheet_columns)
+            dtypes_dict[ROW_HASH_COLUMN] = sqlalchemy.types.BIGINT
+            df.head(0).to_sql(
+                name=target_table,
+                schema=target_schema,
+                con=self.con,
+                if_exists="replace",
+                index=False,
+                dtype=dtypes_dict,
+            )
+            self._insert_into_table(df, qualified_table)
+            return
+
+        with spans.span("diff") as diff_span:
+            existing = pandas.read_sql(
+                f"SELECT {keys}, {preparer.quote(ROW_HASH_COLUMN)} FROM {qualified_table}", self.con
+            )
+            delta = compute_delta(df, existing, merge_keys, self._config.sheet_columns)
+            diff_span.rows = len(df)
+        logger.info(
+            timed_message(
+                f"{delta.num_inserted} rows inserted, {delta.num_updated} updated and "
+                f"{len(delta.deletes)} deleted since the last upload."
+            )
+        )
+        if delta.is_empty:
+            return
+
+        staging_table = f"temp.{preparer.quote(f'{target_table}__sheetwork_stg')}"
+        changed_keys = pandas.concat(
+            [delta.upserts[merge_keys], delta.deletes[merge_keys]], ignore_index=True
+        )
+        with spans.span("merge") as merge_span:
+            # the staging table takes the types of the keys of the target table.
+            self.con.execute(
+                f"CREATE TABLE {staging_table} AS SELECT {keys} FROM {qualified_table} WHERE 0"
+            )
+            self._insert_into_table(changed_keys, staging_table)
+            self.con.execute(
+                f"DELETE FROM {qualified_table} WHERE ({keys}) IN (SELECT {keys} FROM {staging_table})"
+            )
+            self.con.execute(f"DROP TABLE {staging_table}")
+            self._insert_into_table(delta.upserts, qualified_table)
+            merge_span.rows = len(changed_keys)
+
+    def excecute_query(self, query: str, return_results: bool = False) -> Optional[Any]:
+        self.acquire_connection()
+        results: Any = self.con.execute(query)
+        if return_results:
+            results = results.fetchall()
+            self.close_connection()
+            return results
+        self.close_connection()
+        return None
+
+    def _reflect_table(self, target_schema: str, target_table: str) -> Tuple[int, int]:
+        inspector = sqlalchemy.inspect(self.con)
+        columns = inspector.get_columns(target_table, target_schema)
+        metadata = MetaData(self.con)
+        _target_table = sqlalchemy.Table(
+            target_table, metadata, autoload=True, schema=target_schema
+        )
+        rows = select([func.count("*")], from_obj=[_target_table])
+        num_rows = self.con.execute(rows).scalar()
+        return num_rows, len(columns)
+
+    def check_table(
+        self, target_schema: str, target_table: str, deep: bool = False
+    ) -> Tuple[int, int]:
+        """Checks that the table exists and reports its number of columns and rows.
+
+        The row count of the last full load of the table is trusted so that only the number of
+        columns has to be read, in a single query. Other tables are counted in the same query.
+
+        Args:
+            target_schema (str): schema in which the table lives.
+            target_table (str): table to check.
+            deep (bool, optional): when true the whole table is reflected and counted instead.
+                Defaults to False.
+
+        Raises:
+            TableDoesNotExist: when there is no such table.
+
+        Returns:
+            Tuple[int, int]: number of columns and number of rows of the table.
+        """
+        self.acquire_connection()
+        _qualified_table_name = f"{self._database}.{target_schema}.{target_table}"
+        rows_loaded = self.rows_loaded.get((target_schema, target_table))
+        try:
+            if deep:
+                num_rows, num_columns = self._reflect_table(target_schema, target_table)
+            elif rows_loaded is not None:
+                num_rows, num_columns = rows_loaded, self._count_columns(
+                    target_schema, target_table
+                )
+            else:
+                num_rows, num_columns = self._count_rows_and_columns(target_schema, target_table)
+        except (NoSuchTableError, OperationalError):
+            raise TableDoesNotExist(f"Table {_qualified_table_name} does not exist.")
+        finally:
+            self.close_connection()
+        if num_columns == 0:
+            raise TableDoesNotExist(f"Table {_qualified_table_name} does not exist.")
+
+        logger.info(
+            timed_message(
+                green(
+                    f"Push successful for {_qualified_table_name} \n"
+                    f"Found {num_columns} columns and {num_rows} rows."
+                )
+            )
+        )
+        return num_columns, num_rows
@@ -1,36 +1,91 @@
 """Cleaning module. Holds SheetCleaner which holds df kinds of cleanings."""
+import importlib.util
 import re
-from typing import List, Union
+from typing import Any, List, Union
 
 import inflection
 import numpy as np
 import pandas
 
+# pyarrow is optional (see the `parquet` extra) when it is there we use its string kernels.
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+def _strip_and_nullify_field(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return value if value else np.nan
+    return np.nan if value is None else value
+
+
+_strip_and_nullify_numpy = np.frompyfunc(_strip_and_nullify_field, 1, 1)
+
+
+def _strip_and_nullify_arrow(values: np.ndarray) -> np.ndarray:
+    import pyarrow
+    import pyarrow.compute
+
+    trimmed = pyarrow.compute.utf8_trim_whitespace(
+        pyarrow.array(values, type=pyarrow.string(), from_pandas=True)
+    )
+    is_empty = pyarrow.compute.equal(trimmed, "").fill_null(True)
+    # going through pandas lets arrow deduplicate the python strings it has to create.
+    cleaned_values = trimmed.to_pandas().to_numpy()
+    # arrow hands nulls back as None but the rest of sheetwork (e.g. handle_booleans) expects NaN.
+    cleaned_values[is_empty.to_numpy(zero_copy_only=False)] = np.nan
+    return cleaned_values
+
+
+def strip_and_nullify(values: np.ndarray) -> np.ndarray:
+    """Strips surrounding whitespace of all strings and turns the ones left empty into NaN.
+
+    Everything happens in a single pass over the values, on arrow string arrays when pyarrow is
+    installed and with a numpy ufunc otherwise. Values that are not strings are left untouched.
+
+    Args:
+        values (np.ndarray): object array of the values of a column.
+
+    Returns:
+        np.ndarray: new object array with cleaned values.
+    """
+    if HAS_PYARROW:
+        try:
+            return _strip_and_nullify_arrow(values)
+        except (TypeError, ValueError):
+            # arrow refuses columns that mix strings with other types (pyarrow's errors are
+            # subclasses of these), the ufunc deals with those.
+            pass
+    return _strip_and_nullify_numpy(values).astype(object)
+
 
 class SheetCleaner:
     """Class containing all sheet cleaning related methods and ochestrators for such cleaning."""
 
-    def __init__(self, df: pandas.DataFrame, casing: bool = False) -> None:
+    def __init__(self, df: pandas.DataFrame, casing: bool = False, inplace: bool = False) -> None:
         """Constructor for SheetCleaner.
 
         Args:
             df (pandas.DataFrame): dataframe to clean up
             casing (bool, optional): When true case-related operations (see self.cleanup()) are
                 performed. Defaults to False.
+            inplace (bool, optional): When true the cleanups mutate df instead of working on a
+                copy of it. Only use it when nothing else needs the raw frame. Defaults to False.
         """
         self.df = df
         self.casing = casing
+        self.inplace = inplace
         assert isinstance(
             self.df, pandas.DataFrame
         ), f"SheetCleaner can only process a pandas.DataFrame. You are feeding a {type(self.df)}."
 
     def cleanup(self) -> pandas.DataFrame:
-        clean_df = self.df.copy(deep=True)
+        # at most one copy is made here, every step below then works on it in place.
+        clean_df = self.df if self.inplace else self.df.copy(deep=True)
 
         if self.casing:
             clean_df = self.camel_to_snake(clean_df)
-        clean_df = self.columns_cleanups(clean_df)
-        clean_df = self.fields_cleanups(clean_df)
+        clean_df = self.columns_cleanups(clean_df, inplace=True)
+        clean_df = self.fields_cleanups(clean_df, inplace=True)
 
         return clean_df
 
@@ -40,8 +95,10 @@ class SheetCleaner:
         df: pandas.DataFrame,
         default_replacement: str = "_",
         characters_to_replace: Union[List[str], str] = list(),
+        inplace: bool = False,
     ) -> pandas.DataFrame:
-        df = df.copy()
+        if not inplace:
+            df = df.copy()
         # when provided, ensure characters_to_replace is a list
         if isinstance(characters_to_replace, str):
             characters_to_replace = [characters_to_replace]
@@ -68,23 +125,34 @@ class SheetCleaner:
 
         # remove empty cols
         if "" in df.columns:
-            df = df.drop([""], axis=1)
+            df.drop([""], axis=1, inplace=True)
 
         # make all columns lowercase
         df.columns = list(map(str.lower, df.columns))
         return df
 
     @staticmethod
-    def fields_cleanups(df: pandas.DataFrame) -> pandas.DataFrame:
-        # convert empty strings with missing value
-        df = df.replace("", np.nan)  # type: ignore
-
-        # clean trailing spaces in fields
-        for col in df.columns:  # type: ignore
-            if df[col].dtype == "object":  # type: ignore
-                df[col] = df[col].str.strip()  # type: ignore
+    def fields_cleanups(df: pandas.DataFrame, inplace: bool = False) -> pandas.DataFrame:
+        # clean surrounding spaces in fields and convert what is left empty to missing values.
+        if inplace:
+            for _, series in df.items():
+                if series.dtype == "object":
+                    # the series' values are a view on df's block: writing them back cleans df
+                    # without moving its columns around.
+                    values = series.to_numpy()
+                    values[:] = strip_and_nullify(values)
+            return df
+
+        # The frame is rebuilt in one go as replacing columns one by one makes pandas split its
+        # blocks over and over, which gets very slow on wide sheets.
+        columns = {
+            position: strip_and_nullify(series.to_numpy()) if series.dtype == "object" else series
+            for position, (_, series) in enumerate(df.items())
+        }
+        clean_df = pandas.DataFrame(columns, index=df.index)
+        clean_df.columns = df.columns
 
-        return df
+        return clean_df
 
     @staticmethod
     def camel_to_snake(df: pandas.DataFrame) -> pandas.DataFrame:
@@ -1,11 +1,17 @@
 """Houses classes and methods to help interacting with Google Spreasheet API. Uses `gspread` mainly."""
+import functools
+import json
+import threading
 from pathlib import Path
-from typing import Any, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import gspread
 import pandas
 from gspread.exceptions import SpreadsheetNotFound
+from gspread.urls import DRIVE_FILES_API_V3_URL
+from gspread.utils import absolute_range_name, fill_gaps, rowcol_to_a1
 
+from sheetwork.core.clients.quota import GOOGLE_QUOTA
 from sheetwork.core.config.profile import Profile
 from sheetwork.core.exceptions import (
     GoogleClientNotAuthenticatedError,
@@ -18,6 +24,35 @@ from sheetwork.core.logger import GLOBAL_LOGGER as logger
 from sheetwork.core.ui.printer import green, yellow
 from sheetwork.core.utils import check_dupe_cols
 
+DRIVE_CHANGES_API_V3_URL = "https://www.googleapis.com/drive/v3/changes"
+# most changes Drive hands out per page of its changes feed.
+DRIVE_CHANGES_PAGE_SIZE = 1000
+
+
+class GoogleClientPool:
+    """Keeps authenticated gspread clients around so that they are only authenticated once.
+
+    Clients are kept per thread, as their session is not meant to be shared across threads, and
+    per credentials. This is what keeps `sheetwork serve` from logging into Google on each run.
+    """
+
+    def __init__(self) -> None:
+        """Constructs an empty GoogleClientPool."""
+        self._local = threading.local()
+
+    def get(
+        self, key: Tuple[str, ...], make_client: Callable[[], gspread.Client]
+    ) -> gspread.Client:
+        """Returns the client of this thread for key, made with make_client on first use."""
+        clients: Optional[Dict[Tuple[str, ...], gspread.Client]] = getattr(
+            self._local, "clients", None
+        )
+        if clients is None:
+            clients = self._local.clients = dict()
+        if key not in clients:
+            clients[key] = make_client()
+        return clients[key]
+
 
 class GoogleSpreadsheet:
     """Takes care of the interaction with a Google Sheet like you've never seen before!
@@ -36,7 +71,13 @@ class GoogleSpreadsheet:
 
     CREDS_EXT = ".json"
 
-    def __init__(self, profile: Profile, workbook_key: str = str(), workbook_name: str = str()):
+    def __init__(
+        self,
+        profile: Profile,
+        workbook_key: str = str(),
+        workbook_name: str = str(),
+        client_pool: Optional[GoogleClientPool] = None,
+    ):
         """Constructor of GoogleSpreadsheet.
 
         Mainly just sets up auth.
@@ -46,14 +87,24 @@ class GoogleSpreadsheet:
                 other goodness.
             workbook_key (str, optional): Unique google sheet key (found in URL). Defaults to str().
             workbook_name (str, optional): Name of the workbook in your drive. Defaults to str().
+            client_pool (Optional[GoogleClientPool], optional): pool to take an already
+                authenticated client from, authenticates every time when None. Defaults to None.
         """
         self._profile = profile
+        self.client_pool = client_pool
         self.is_service_account = profile.profile_dict.get("is_service_account", True)
         self.credential_file_exists, self.creds_path = self._check_google_creds_exist()
         self.workbook_key = workbook_key
         self.workbook_name = workbook_name
         self.client = profile.profile_dict.get("guser")
         self.is_authenticated: bool = False
+        self.workbook_revision: Optional[str] = None
+        GOOGLE_QUOTA.configure(
+            reads_per_minute_per_project=profile.profile_dict.get(
+                "google_reads_per_minute_per_project"
+            ),
+            reads_per_minute_per_user=profile.profile_dict.get("google_reads_per_minute_per_user"),
+        )
 
     def _check_google_creds_exist(self) -> Tuple[bool, Path]:
         creds_path = Path(
@@ -68,6 +119,14 @@ class GoogleSpreadsheet:
         )
 
     def authenticate(self) -> None:
+        if self.client_pool is not None:
+            client_key = (str(self.creds_path), str(self.is_service_account), str(self.client))
+            self.google_client = self.client_pool.get(client_key, self._make_client)
+        else:
+            self.google_client = self._make_client()
+        self.is_authenticated = True
+
+    def _make_client(self) -> gspread.Client:
         if self.is_service_account:
             logger.debug("Using SERVICE_ACCOUNT auth")
             self.google_client = gspread.service_account(self.creds_path)
@@ -77,7 +136,34 @@ class GoogleSpreadsheet:
             # ! https://github.com/burnash/gspread/issues/826
             self._override_gspread_default_creds()
             self.google_client = gspread.oauth()
-        self.is_authenticated = True
+        self._apply_quota()
+        return self.google_client
+
+    def _get_project_id(self) -> str:
+        # service account keys hold the id of their project at the top, oauth clients under
+        # "installed" (or "web").
+        try:
+            credentials = json.loads(self.creds_path.read_text())
+        except (OSError, ValueError):
+            return str()
+        for section in (credentials, credentials.get("installed"), credentials.get("web")):
+            if isinstance(section, dict) and section.get("project_id"):
+                return str(section["project_id"])
+        return str()
+
+    def _apply_quota(self) -> None:
+        """Sends every request of the client through the rate limiter of the process.
+
+        gspread sends all of its requests (and so do we, see `get_workbook_revision()`) via
+        `Client.request()` which is wrapped so that each of them waits for the read quotas of the
+        project and of the user, and is retried on quota and server errors (see `GoogleQuota`).
+        """
+        self.google_client.request = functools.partial(
+            GOOGLE_QUOTA.call,
+            self.google_client.request,
+            project=self._get_project_id(),
+            user=str(self.client),
+        )
 
     def _override_gspread_default_creds(self) -> None:
         """Temporary workaround to allow `gspread.oauth()` to look for credentials in another location.
@@ -135,13 +221,172 @@ class GoogleSpreadsheet:
                 "You are not authenticated yet. Make sure you run `authenticate()` successfully"
             )
 
+    def get_workbook_revision(self) -> str:
+        """Asks Drive for the version of the workbook without downloading any of its content.
+
+        Drive bumps the `version` of a file every time anything in it changes, this makes it a cheap
+        way to know whether a sheet needs to be downloaded again. Drive is only asked once, sheets
+        sharing this workbook (see `upload --all`) get the same answer.
+
+        Returns:
+            str: Drive version of the workbook (or its last modification time when Drive does not
+                report a version). Empty when the workbook was not referred to by its key.
+        """
+        if not self.is_authenticated:
+            raise GoogleClientNotAuthenticatedError(
+                "You are not authenticated yet. Make sure you run `authenticate()` successfully"
+            )
+        if not self.workbook_key:
+            return str()
+        if self.workbook_revision is None:
+            response = self.google_client.request(
+                "get",
+                f"{DRIVE_FILES_API_V3_URL}/{self.workbook_key}",
+                params={"fields": "version,modifiedTime", "supportsAllDrives": True},
+            )
+            file_metadata = response.json()
+            self.workbook_revision = str(
+                file_metadata.get("version") or file_metadata.get("modifiedTime", str())
+            )
+        return self.workbook_revision
+
+    def get_start_page_token(self) -> str:
+        """Asks Drive for the token pointing to the end of its changes feed, i.e. to "now".
+
+        Returns:
+            str: page token to list the changes made from now on with `list_changed_files()`.
+        """
+        if not self.is_authenticated:
+            raise GoogleClientNotAuthenticatedError(
+                "You are not authenticated yet. Make sure you run `authenticate()` successfully"
+            )
+        response = self.google_client.request(
+            "get",
+            f"{DRIVE_CHANGES_API_V3_URL}/startPageToken",
+            params={"supportsAllDrives": True},
+        )
+        return str(response.json()["startPageToken"])
+
+    def list_changed_files(self, page_token: str) -> Tuple[Set[str], str]:
+        """Lists the files visible to the client that changed since a page token was handed out.
+
+        Reads the whole Drive changes feed from page_token on, which costs a request per
+        DRIVE_CHANGES_PAGE_SIZE changes however many files are watched.
+
+        Args:
+            page_token (str): token from `get_start_page_token()` or from a previous call.
+
+        Raises:
+            APIError: when Drive refuses the token, e.g. because it expired.
+
+        Returns:
+            Tuple[Set[str], str]: ids (i.e. keys) of the changed files and the token to pass to
+                the next call.
+        """
+        if not self.is_authenticated:
+            raise GoogleClientNotAuthenticatedError(
+                "You are not authenticated yet. Make sure you run `authenticate()` successfully"
+            )
+        changed_files: Set[str] = set()
+        while True:
+            response = self.google_client.request(
+                "get",
+                DRIVE_CHANGES_API_V3_URL,
+                params={
+                    "pageToken": page_token,
+                    "pageSize": DRIVE_CHANGES_PAGE_SIZE,
+                    "fields": "nextPageToken,newStartPageToken,changes(fileId)",
+                    "includeItemsFromAllDrives": True,
+                    "supportsAllDrives": True,
+                },
+            )
+            changes_page = response.json()
+            changed_files.update(
+                change["fileId"]
+                for change in changes_page.get("changes", list())
+                if change.get("fileId")
+            )
+            # the last page holds the token to start from next time instead of a next page.
+            if changes_page.get("newStartPageToken"):
+                return changed_files, str(changes_page["newStartPageToken"])
+            page_token = str(changes_page["nextPageToken"])
+
+    def _get_worksheet_title(self, worksheet_name: str) -> str:
+        return worksheet_name or self.workbook.get_worksheet(0).title
+
+    @staticmethod
+    def _find_column_blocks(
+        header: List[str], columns: Optional[List[str]] = None
+    ) -> List[Tuple[int, int]]:
+        """Finds the blocks of contiguous columns holding the given column names.
+
+        Args:
+            header (List[str]): first row of the worksheet.
+            columns (Optional[List[str]], optional): names of the columns to fetch. Names not in
+                the header are ignored. Defaults to None which means all the columns of the header.
+
+        Returns:
+            List[Tuple[int, int]]: first and last (1-based) position of each block, left to right.
+        """
+        if columns:
+            wanted_columns = set(columns)
+            positions = [i + 1 for i, name in enumerate(header) if name in wanted_columns]
+        else:
+            positions = list(range(1, len(header) + 1))
+        blocks: List[Tuple[int, int]] = list()
+        for position in positions:
+            if blocks and blocks[-1][1] == position - 1:
+                blocks[-1] = (blocks[-1][0], position)
+            else:
+                blocks.append((position, position))
+        return blocks
+
+    @staticmethod
+    def _make_column_range(first: int, last: int, first_row: int = 1) -> str:
+        # rowcol_to_a1 gives "C1" when asked for the 1st row of the 3rd column. Ranges are left
+        # open at the bottom to get all the rows there are, "C:E" or "C5:E".
+        start_row = str(first_row) if first_row > 1 else str()
+        return f"{rowcol_to_a1(1, first)[:-1]}{start_row}:{rowcol_to_a1(1, last)[:-1]}"
+
+    @staticmethod
+    def _stitch_column_ranges(
+        value_ranges: List[Dict[str, Any]], widths: List[int]
+    ) -> List[List[Any]]:
+        # the API trims trailing empty cells and rows of each range, pad them back before putting
+        # the blocks of columns side by side.
+        blocks = [value_range.get("values", list()) for value_range in value_ranges]
+        num_rows = max([len(block) for block in blocks], default=0)
+        values: List[List[Any]] = [list() for _ in range(num_rows)]
+        for block, width in zip(blocks, widths):
+            for i, row in enumerate(values):
+                block_row = list(block[i]) if i < len(block) else list()
+                row.extend(block_row + [str()] * (width - len(block_row)))
+        return values
+
+    @staticmethod
+    def _make_df_from_values(values: List[List[Any]], grab_header: bool = True) -> pandas.DataFrame:
+        if grab_header:
+            check_dupe_cols(values[0])
+            return pandas.DataFrame(values[1:], columns=values[0])
+        return pandas.DataFrame(values)
+
     def make_df_from_worksheet(
-        self, worksheet_name: str = str(), grab_header: bool = True
+        self,
+        worksheet_name: str = str(),
+        grab_header: bool = True,
+        included_columns: Optional[List[str]] = None,
+        skip_rows: int = 0,
     ) -> pandas.DataFrame:
         if not self.workbook:
             raise NoWorkbookLoadedError(
                 "Workbook object seems empty, cannot turn a None object into a dataframe"
             )
+        if grab_header and (included_columns or skip_rows):
+            return self.make_dfs_from_worksheets(
+                [worksheet_name],
+                included_columns={worksheet_name: included_columns or list()},
+                skip_rows={worksheet_name: skip_rows},
+            )[worksheet_name]
         try:
             if worksheet_name:
                 worksheet = self.workbook.worksheet(worksheet_name)
@@ -149,13 +394,124 @@ class GoogleSpreadsheet:
                 worksheet_name = "default sheet"
                 worksheet = self.workbook.get_worksheet(0)
             logger.debug(green("Sheet loaded successfully"))
-            if grab_header:
-                values: List[Any] = worksheet.get_all_values()
-                check_dupe_cols(values[0])
-                df = pandas.DataFrame(values[1:], columns=values[0])
-            else:
-                df = pandas.DataFrame(worksheet.get_all_values())
+            df = self._make_df_from_values(worksheet.get_all_values(), grab_header)
             logger.debug(yellow(f"Raw obtained google sheet: \n {df.head()}"))
             return df
         except Exception as e:
             raise SheetLoadingError(f"Error loading sheet: \n {e}")
+
+    def make_dfs_from_worksheets(
+        self,
+        worksheet_names: List[str],
+        grab_header: bool = True,
+        included_columns: Optional[Dict[str, List[str]]] = None,
+        skip_rows: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, pandas.DataFrame]:
+        """Downloads several worksheets of the workbook in a single `values.batchGet` request.
+
+        When only some columns or only the bottom rows of a worksheet are needed, the header rows
+        of those worksheets are fetched first (in one `values.batchGet` too) to know where the
+        columns are so that the rest of the worksheet is never downloaded. Columns that cannot be
+        found are skipped and when none of them can be found all the columns are downloaded.
+
+        Args:
+            worksheet_names (List[str]): names of the worksheets to download. An empty name stands
+                for the first worksheet, like in `make_df_from_worksheet()`.
+            grab_header (bool, optional): When true the first row of each worksheet is used as
+                column names. Defaults to True.
+            included_columns (Optional[Dict[str, List[str]]], optional): names of the columns to
+                download by worksheet name. Only used along with grab_header, worksheets left out
+                are downloaded in full. Defaults to None.
+            skip_rows (Optional[Dict[str, int]], optional): number of rows under the header not to
+                download by worksheet name. Only used along with grab_header. Defaults to None.
+
+        Returns:
+            Dict[str, pandas.DataFrame]: one DataFrame per (distinct) worksheet name.
+        """
+        if not self.workbook:
+            raise NoWorkbookLoadedError(
+                "Workbook object seems empty, cannot turn a None object into a dataframe"
+            )
+        worksheet_names = list(dict.fromkeys(worksheet_names))
+        included_columns = (included_columns or dict()) if grab_header else dict()
+        skip_rows = (skip_rows or dict()) if grab_header else dict()
+        try:
+            titles = {name: self._get_worksheet_title(name) for name in worksheet_names}
+            headers = self._get_headers(
+                titles,
+                [
+                    name
+                    for name in worksheet_names
+                    if included_columns.get(name) or skip_rows.get(name)
+                ],
+            )
+            ranges: List[str] = list()
+            column_blocks: Dict[str, List[Tuple[int, int]]] = dict()
+            for worksheet_name in worksheet_names:
+                # data starts on the row after the header (and the skipped rows) when skipping.
+                first_row = skip_rows[worksheet_name] + 2 if skip_rows.get(worksheet_name) else 1
+                if worksheet_name in headers:
+                    header = headers[worksheet_name]
+                    blocks = self._find_column_blocks(header, included_columns.get(worksheet_name))
+                    if blocks or first_row > 1:
+                        column_blocks[worksheet_name] = blocks or self._find_column_blocks(header)
+                        worksheet_ranges = [
+                            absolute_range_name(
+                                titles[worksheet_name],
+                                self._make_column_range(first, last, first_row),
+                            )
+                            for first, last in column_blocks[worksheet_name]
+                        ]
+                        logger.debug(f"Ranges to download: {worksheet_ranges}")
+                        ranges.extend(worksheet_ranges)
+                        continue
+                ranges.append(absolute_range_name(titles[worksheet_name]))
+            # value ranges come back in the order they were asked for. Empty worksheets have no
+            # values at all.
+            value_ranges = iter(
+                self.workbook.values_batch_get(ranges)["valueRanges"] if ranges else list()
+            )
+            dfs: Dict[str, pandas.DataFrame] = dict()
+            for worksheet_name in worksheet_names:
+                if worksheet_name in column_blocks:
+                    blocks = column_blocks[worksheet_name]
+                    values = self._stitch_column_ranges(
+                        [next(value_ranges) for _ in blocks],
+                        [last - first + 1 for first, last in blocks],
+                    )
+                    if skip_rows.get(worksheet_name):
+                        # the ranges start under the header, put it back on top.
+                        header = headers[worksheet_name]
+                        values.insert(
+                            0,
+                            [
+                                header[position - 1]
+                                for first, last in blocks
+                                for position in range(first, last + 1)
+                            ],
+                        )
+                else:
+                    values = fill_gaps(next(value_ranges).get("values", [[]]))
+                dfs[worksheet_name] = self._make_df_from_values(values, grab_header)
+            logger.debug(
+                green(f"{len(dfs)} worksheets loaded in one batch from {self.workbook_key}")
+            )
+            return dfs
+        except Exception as e:
+            raise SheetLoadingError(f"Error loading sheets: \n {e}")
+
+    def _get_headers(
+        self, titles: Dict[str, str], worksheet_names: List[str]
+    ) -> Dict[str, List[str]]:
+        if not worksheet_names:
+            return dict()
+        response = self.workbook.values_batch_get(
+            [absolute_range_name(titles[name], "1:1") for name in worksheet_names]
+        )
+        headers: Dict[str, List[str]] = dict()
+        for worksheet_name, value_range in zip(worksheet_names, response["valueRanges"]):
+            header = (value_range.get("values") or [[]])[0]
+            # same check as when the whole worksheet is downloaded.
+            check_dupe_cols(header)
+            headers[worksheet_name] = header
+        return headers
@@ -0,0 +1,276 @@
+"""Shared rate limiting and retries of the calls made to the Google APIs (see `GOOGLE_QUOTA`).
+
+Google caps read requests per minute for the whole Cloud project and for each user (or service
+account) of it. Every request sheetwork sends, whichever thread or sheet it comes from, first takes
+a token from the bucket of its project and the one of its user so that a process stays under both.
+When Google answers with a quota error anyway (other processes use the same quota) or fails on its
+side, the request is retried after a jittered exponential backoff, or as long as Google asks to via
+`Retry-After`, and the buckets are paused meanwhile so that other threads back off too.
+"""
+import email.utils
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import requests
+from gspread.exceptions import APIError
+
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.spans import GLOBAL_SPAN_RECORDER as spans
+from sheetwork.core.ui.printer import yellow
+
+# default read quotas of the Sheets API, in requests per minute. Drive's are much larger.
+DEFAULT_READS_PER_MINUTE_PER_PROJECT = 300
+DEFAULT_READS_PER_MINUTE_PER_USER = 60
+DEFAULT_MAX_RETRIES = 6
+
+# errors Google sends when a quota is exhausted: 429 everywhere and 403 with these reasons on Drive.
+_QUOTA_STATUS_CODES = {429}
+_QUOTA_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "RESOURCE_EXHAUSTED"}
+# errors on Google's side that are worth trying again.
+_TRANSIENT_STATUS_CODES = {500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Hands out `rate` tokens per second, up to `capacity` of them at once."""
+
+    def __init__(self, capacity: float, rate: float):
+        """Constructs a full TokenBucket.
+
+        Args:
+            capacity (float): most tokens that can be taken in a burst.
+            rate (float): tokens added per second.
+        """
+        self.capacity = capacity
+        self.rate = rate
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token, possibly ahead of time.
+
+        Tokens are handed out in the order they are asked for: when there are none left the token
+        is borrowed from the refill to come so that callers never race for them.
+
+        Returns:
+            float: seconds to wait before the token can be used.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def pause(self, seconds: float) -> None:
+        """Stops handing out tokens for a while, e.g. once the quota it stands for ran out."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+
+class QuotaMetrics(NamedTuple):
+    """What the Google quotas cost so far."""
+
+    num_requests: int = 0
+    num_throttled: int = 0
+    num_retries: int = 0
+    # seconds spent waiting for a token of a bucket or before retrying.
+    throttled_time: float = 0.0
+
+
+def _parse_retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time()) if retry_at else None
+
+
+def _get_error_reasons(response: Optional[requests.Response]) -> set:
+    try:
+        error = response.json()["error"]  # type: ignore
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return set()
+    reasons = {error.get("status")}
+    reasons.update([detail.get("reason") for detail in error.get("errors", list())])
+    return reasons
+
+
+def classify_error(error: Exception) -> str:
+    """Tells what kind of failure a Google API call ended with.
+
+    Args:
+        error (Exception): what the call raised.
+
+    Returns:
+        str: "quota" when a quota ran out, "transient" when trying again may help and "fatal"
+            otherwise (e.g. missing permissions or sheet).
+    """
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return "transient"
+    if not isinstance(error, APIError):
+        return "fatal"
+    status_code = error.response.status_code
+    if status_code in _QUOTA_STATUS_CODES:
+        return "quota"
+    if status_code == 403 and _get_error_reasons(error.response) & _QUOTA_REASONS:
+        return "quota"
+    if status_code in _TRANSIENT_STATUS_CODES:
+        return "transient"
+    return "fatal"
+
+
+class GoogleQuota:
+    """Rate limits and retries the Google API calls of the whole process."""
+
+    def __init__(
+        self,
+        reads_per_minute_per_project: int = DEFAULT_READS_PER_MINUTE_PER_PROJECT,
+        reads_per_minute_per_user: int = DEFAULT_READS_PER_MINUTE_PER_USER,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = 1.0,
+        max_delay: float = 64.0,
+    ):
+        """Constructs GoogleQuota.
+
+        Args:
+            reads_per_minute_per_project (int, optional): requests per minute allowed to a Cloud
+                project. Defaults to DEFAULT_READS_PER_MINUTE_PER_PROJECT.
+            reads_per_minute_per_user (int, optional): requests per minute allowed to each user of
+                a project. Defaults to DEFAULT_READS_PER_MINUTE_PER_USER.
+            max_retries (int, optional): times a call is tried again before giving up.
+                Defaults to DEFAULT_MAX_RETRIES.
+            base_delay (float, optional): seconds the backoff starts from. Defaults to 1.0.
+            max_delay (float, optional): longest backoff in seconds. Defaults to 64.0.
+        """
+        self.reads_per_minute_per_project = reads_per_minute_per_project
+        self.reads_per_minute_per_user = reads_per_minute_per_user
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = dict()
+        self._metrics = QuotaMetrics()
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        reads_per_minute_per_project: Optional[int] = None,
+        reads_per_minute_per_user: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ) -> None:
+        """Changes the quotas (e.g. to the ones of the profile), left as they are when not given."""
+        with self._lock:
+            quotas = (self.reads_per_minute_per_project, self.reads_per_minute_per_user)
+            self.reads_per_minute_per_project = (
+                reads_per_minute_per_project or self.reads_per_minute_per_project
+            )
+            self.reads_per_minute_per_user = (
+                reads_per_minute_per_user or self.reads_per_minute_per_user
+            )
+            if max_retries is not None:
+                self.max_retries = max_retries
+            # buckets are made again, with the new quotas, on their next use.
+            if quotas != (self.reads_per_minute_per_project, self.reads_per_minute_per_user):
+                self._buckets = dict()
+
+    @property
+    def metrics(self) -> QuotaMetrics:
+        return self._metrics
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets = dict()
+            self._metrics = QuotaMetrics()
+
+    def _add_to_metrics(self, **increments: Any) -> None:
+        with self._lock:
+            self._metrics = self._metrics._replace(
+                **{name: getattr(self._metrics, name) + value for name, value in increments.items()}
+            )
+
+    def _get_buckets(self, project: str, user: str) -> Tuple[TokenBucket, TokenBucket]:
+        with self._lock:
+            buckets = list()
+            for key, reads_per_minute in (
+                (("project", project), self.reads_per_minute_per_project),
+                (("user", f"{project}/{user}"), self.reads_per_minute_per_user),
+            ):
+                if key not in self._buckets:
+                    self._buckets[key] = TokenBucket(reads_per_minute, reads_per_minute / 60)
+                buckets.append(self._buckets[key])
+            return buckets[0], buckets[1]
+
+    def _wait(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        with spans.span("google_throttle"):
+            time.sleep(seconds)
+        self._add_to_metrics(throttled_time=seconds)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        # "full jitter": spreads the retries of concurrent callers over the whole window.
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def call(
+        self,
+        request: Callable[..., Any],
+        *args: Any,
+        project: str = str(),
+        user: str = str(),
+        **kwargs: Any,
+    ) -> Any:
+        """Sends a request to a Google API within the quotas, retrying it when it is worth it.
+
+        Args:
+            request (Callable[..., Any]): function sending the request, e.g. `Client.request`.
+            *args (Any): positional arguments of `request`.
+            project (str, optional): Cloud project whose quota the request counts against.
+                Defaults to str().
+            user (str, optional): user (or service account) sending the request. Defaults to str().
+            **kwargs (Any): keyword arguments of `request`.
+
+        Raises:
+            APIError: the last error, once the call is not worth trying again.
+
+        Returns:
+            Any: what `request` returned.
+        """
+        project_bucket, user_bucket = self._get_buckets(project, user)
+        attempt = 0
+        while True:
+            self._wait(max(project_bucket.reserve(), user_bucket.reserve()))
+            self._add_to_metrics(num_requests=1)
+            try:
+                return request(*args, **kwargs)
+            except (APIError, requests.ConnectionError, requests.Timeout) as e:
+                error_kind = classify_error(e)
+                if error_kind == "fatal" or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, _parse_retry_after(getattr(e, "response", None)))
+                if error_kind == "quota":
+                    # other threads would only hit the same wall.
+                    self._add_to_metrics(num_throttled=1)
+                    project_bucket.pause(delay)
+                    user_bucket.pause(delay)
+                logger.debug(
+                    yellow(
+                        f"Google API call failed ({error_kind}: {e}), "
+                        f"retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})."
+                    )
+                )
+            self._add_to_metrics(num_retries=1)
+            self._wait(delay)
+            attempt += 1
+
+
+GOOGLE_QUOTA = GoogleQuota()
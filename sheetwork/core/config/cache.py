@@ -0,0 +1,158 @@
+"""Cache of the parsed, validated and compiled yml config files (see `load_compiled_yaml()`).
+
+Parsing a large sheets.yml and validating it with cerberus is what costs the most when sheetwork
+starts up. What comes out of it only depends on the content of the file so it is stored as JSON
+in the project's state directory and reused for as long as the file stays the same: its mtime and
+size are checked first and, when they changed, its content hash decides whether it really did.
+JSON rather than pickle means that reading a cache, even one tampered with, never runs any code.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from sheetwork import __version__
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.yaml.yaml_helpers import parse_yaml, validate_yaml
+
+CACHE_DIRNAME = "config_cache"
+# bump whenever what gets compiled out of the files changes shape.
+CACHE_FORMAT_VERSION = 2
+
+# ValueError covers malformed JSON, the others a cache that does not have the expected shape.
+_CACHE_READ_ERRORS = (OSError, AttributeError, IndexError, KeyError, TypeError, ValueError)
+
+
+def _identity(config: Dict[Any, Any]) -> Any:
+    return config
+
+
+def _make_cache_path(cache_dir: Path, path: Path) -> Path:
+    # one cache per file so that projects pointing to several config dirs don't thrash it.
+    path_hash = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir, f"{path.stem}-{path_hash}.json")
+
+
+def _make_compiler_key(validation_schema: Dict[Any, Any], compile_config: Callable) -> str:
+    # a cache made by another sheetwork, schema or compiler is no good even if the file is the same.
+    compiler = f"{compile_config.__module__}.{compile_config.__qualname__}"
+    return f"{CACHE_FORMAT_VERSION}:{__version__}:{compiler}:{validation_schema!r}"
+
+
+def _read_cache(cache_path: Path) -> Dict[str, Any]:
+    try:
+        with cache_path.open("r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return dict()
+    except _CACHE_READ_ERRORS as e:
+        logger.debug(f"Ignoring the config cache {cache_path}: {e}")
+        return dict()
+    return cache if isinstance(cache, dict) else dict()
+
+
+def _write_cache(cache_path: Path, cache: Dict[str, Any]) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # serialised first so that a config JSON cannot represent never leaves a partial file.
+        serialised_cache = json.dumps(cache)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as f:
+            f.write(serialised_cache)
+        os.replace(temp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        # a read-only project, or a config holding e.g. dates, still runs, just without the cache.
+        logger.debug(f"Could not write the config cache {cache_path}: {e}")
+
+
+def load_compiled_yaml(
+    path: Path,
+    validation_schema: Dict[Any, Any],
+    cache_dir: Optional[Path] = None,
+    compile_config: Callable[[Dict[Any, Any]], Any] = _identity,
+    dump_config: Callable[[Any], Any] = _identity,
+    load_config: Callable[[Any], Any] = _identity,
+) -> Any:
+    """Reads, validates and compiles a yml file, or gets what that gave from the cache.
+
+    Args:
+        path (Path): yml file to load.
+        validation_schema (Dict[Any, Any]): cerberus schema the file is validated against.
+        cache_dir (Optional[Path], optional): folder holding the cache, not cached when None.
+            Defaults to None.
+        compile_config (Callable[[Dict[Any, Any]], Any], optional): turns the validated content
+            of the file into what is cached and returned, e.g. indexes it. Defaults to returning
+            the validated content as is.
+        dump_config (Callable[[Any], Any], optional): turns what `compile_config` returns into
+            plain dicts, lists and scalars that JSON can hold. Defaults to storing it as is.
+        load_config (Callable[[Any], Any], optional): rebuilds what `compile_config` returns
+            from what `dump_config` made of it. Defaults to returning it as is.
+
+    Raises:
+        FileNotFoundError: when the file does not exist.
+        YAMLFileEmptyError: when the file is empty.
+        SheetConfigParsingError: when the file does not follow the schema.
+
+    Returns:
+        Any: what `compile_config` made out of the validated content of the file.
+    """
+    if not path.is_file():
+        raise FileNotFoundError(f"File {path.resolve()} was not found.")
+    if cache_dir is None:
+        return compile_config(_parse_and_validate(path, path.read_bytes(), validation_schema))
+
+    cache_path = _make_cache_path(cache_dir, path)
+    compiler_key = _make_compiler_key(validation_schema, compile_config)
+    stat = path.stat()
+    # a list, as that is what JSON gives back.
+    file_stamp = [stat.st_mtime_ns, stat.st_size]
+    cache = _read_cache(cache_path)
+    is_same_compiler = cache.get("compiler_key") == compiler_key
+    if is_same_compiler and cache.get("file_stamp") == file_stamp:
+        compiled_config = _load_cached_config(cache_path, cache, load_config)
+        if compiled_config is not None:
+            logger.debug(f"Config of {path} read from cache.")
+            return compiled_config
+
+    content = path.read_bytes()
+    content_hash = hashlib.sha256(content).hexdigest()
+    if is_same_compiler and cache.get("content_hash") == content_hash:
+        compiled_config = _load_cached_config(cache_path, cache, load_config)
+        if compiled_config is not None:
+            # touched but not changed, only the stamp needs refreshing.
+            logger.debug(f"Config of {path} read from cache, refreshing its stamp.")
+            cache["file_stamp"] = file_stamp
+            _write_cache(cache_path, cache)
+            return compiled_config
+
+    compiled_config = compile_config(_parse_and_validate(path, content, validation_schema))
+    _write_cache(
+        cache_path,
+        dict(
+            compiler_key=compiler_key,
+            file_stamp=file_stamp,
+            content_hash=content_hash,
+            compiled_config=dump_config(compiled_config),
+        ),
+    )
+    return compiled_config
+
+
+def _load_cached_config(
+    cache_path: Path, cache: Dict[str, Any], load_config: Callable[[Any], Any]
+) -> Optional[Any]:
+    try:
+        return load_config(cache["compiled_config"])
+    except _CACHE_READ_ERRORS as e:
+        logger.debug(f"Ignoring the config cache {cache_path}: {e}")
+        return None
+
+
+def _parse_and_validate(
+    path: Path, content: bytes, validation_schema: Dict[Any, Any]
+) -> Dict[Any, Any]:
+    config = parse_yaml(content, path)
+    validate_yaml(config, validation_schema)
+    return config
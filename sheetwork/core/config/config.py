@@ -1,7 +1,11 @@
 """Configuration class module. Loads project-wide params and all that fun stuff."""
+import copy
+import hashlib
+import json
 from pathlib import Path
-from typing import Any, Dict, List, Sequence, Union
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Union
 
+from sheetwork.core.config.cache import CACHE_DIRNAME, load_compiled_yaml
 from sheetwork.core.config.project import Project
 from sheetwork.core.exceptions import (
     SheetConfigParsingError,
@@ -11,25 +15,55 @@ from sheetwork.core.exceptions import (
 )
 from sheetwork.core.flags import FlagParser
 from sheetwork.core.logger import GLOBAL_LOGGER as logger
-from sheetwork.core.ui.printer import yellow
-from sheetwork.core.yaml.yaml_helpers import open_yaml, validate_yaml
 from sheetwork.core.yaml.yaml_schema import config_schema
 
 
+class CompiledSheet(NamedTuple):
+    """Config of one sheet from sheets.yml, resolved ahead of time."""
+
+    # with the column names lowercased.
+    sheet_config: Dict[str, Any]
+    # {column name: datatype} to cast the columns into.
+    sheet_columns: Dict[str, str]
+    # {name in the sheet: column name} to rename the columns with.
+    sheet_column_rename_dict: Dict[str, str]
+
+
+class CompiledSheetsConfig(NamedTuple):
+    """Validated content of a sheets.yml along with its sheets indexed by name."""
+
+    config: Dict[str, List[Dict[str, Any]]]
+    sheets: Dict[str, CompiledSheet]
+    # declared more than once, which is only an error when one of them is asked for.
+    duplicated_sheet_names: FrozenSet[str]
+
+
 class ConfigLoader:
     """Loads sheet configuraltions.
 
     Basically all that lives in sheets.yml.
     """
 
-    def __init__(self, flags: FlagParser, project: Project):
+    def __init__(
+        self,
+        flags: FlagParser,
+        project: Project,
+        sheets_config: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        compiled_config: Optional[CompiledSheetsConfig] = None,
+    ):
         """Construct config loader.
 
         Args:
             flags (FlagParser): Inited flags
             project (Project): Parsed project object.
+            sheets_config (Optional[Dict[str, List[Dict[str, Any]]]], optional): Already read and
+                validated content of a sheets.yml. When provided the file is not read again. This
+                is what allows batch runs to parse sheets.yml only once. Defaults to None.
+            compiled_config (Optional[CompiledSheetsConfig], optional): sheets_config compiled by
+                `compile_sheets_config()`, compiled again when not provided. Defaults to None.
         """
-        self.config: Dict[str, List[Dict[str, Any]]] = dict()
+        self.config: Dict[str, List[Dict[str, Any]]] = sheets_config or dict()
+        self.compiled_config = compiled_config
         self.sheet_config: Dict[str, Union[str, bool, List[Union[str, Dict[str, str]]]]] = dict(
             sheet_key=flags.sheet_key,
             target_schema=flags.target_schema,
@@ -41,6 +75,10 @@ class ConfigLoader:
         self.sheet_columns: Dict[str, str] = dict()
         self.excluded_columns: Dict = dict()
         self.included_columns: Sequence[str] = []
+        # "merge" only pushes the rows that changed since the last upload, see `sync.py`. "swap"
+        # rebuilds the table next to the live one and swaps them once loaded.
+        self.sync_mode: str = "full"
+        self.merge_keys: List[str] = list()
         self.flags = flags
         self.project = project
         self.yml_folder: Path = project.sheet_config_dir
@@ -50,6 +88,8 @@ class ConfigLoader:
     def set_config(self):
         if self.flags.sheet_name:
             self.load_config_from_file()
+        elif self.flags.run_all:
+            self.read_config_file()
         elif self.flags.sheet_key and self.flags.target_schema and self.flags.target_table:
             logger.debug("Reading config from command line.")
         elif self.flags.sheet_key and (not self.flags.target_schema or not self.target_table):
@@ -65,26 +105,93 @@ class ConfigLoader:
             )
 
     def load_config_from_file(self):
+        if not self.config:
+            self.read_config_file()
+        self.get_sheet_config()
+        self._generate_sync_config()
+        self._override_cli_args()
+
+    def read_config_file(self):
         logger.debug("Reading config from config file.")
         filename = Path(self.yml_folder, "sheets.yml")
         logger.debug(f"SHEET FILENAME: {filename}")
-        if filename.exists():
-            config_yaml = open_yaml(filename)
-        else:
+        if not filename.exists():
             raise SheetWorkConfigMissingError(
                 """
                 Are you in a sheetwork folder? Cannot find 'sheets.yml' to import config from.
                 If you plan to run sheetwork from a different folder than current you'll have to
                 provide a custom path to the config files. See --help for arguments."""
             )
-        if config_yaml:
-            is_valid_yaml = validate_yaml(config_yaml, config_schema)
-        if is_valid_yaml:
-            self.config = config_yaml
-            self.get_sheet_config()
-            self._generate_column_type_override_dict()
-            self._generate_column_rename_dict()
-            self._override_cli_args()
+        self.compiled_config = load_compiled_yaml(
+            filename,
+            config_schema,
+            cache_dir=Path(self.project.state_dir, CACHE_DIRNAME),
+            compile_config=compile_sheets_config,
+            dump_config=dump_compiled_sheets_config,
+            load_config=load_compiled_sheets_config,
+        )
+        self.config = self.compiled_config.config
+
+    @property
+    def sheet_names(self) -> List[str]:
+        """Names of all the sheets declared in sheets.yml, in the order they were declared."""
+        return [str(sheet.get("sheet_name")) for sheet in self.config.get("sheets", list())]
+
+    @property
+    def sheet_names_by_workbook(self) -> Dict[str, List[str]]:
+        """Names of the sheets declared in sheets.yml grouped by the sheet_key they are read from.
+
+        Sheets read from a `source` rather than from Google Sheets are left out.
+        """
+        sheet_names_by_workbook: Dict[str, List[str]] = dict()
+        for sheet in self.config.get("sheets", list()):
+            if not sheet.get("sheet_key"):
+                continue
+            sheet_names_by_workbook.setdefault(str(sheet.get("sheet_key")), list()).append(
+                str(sheet.get("sheet_name"))
+            )
+        return sheet_names_by_workbook
+
+    @property
+    def sheet_names_by_tag(self) -> Dict[str, List[str]]:
+        """Names of the sheets declared in sheets.yml grouped by each of their tags."""
+        sheet_names_by_tag: Dict[str, List[str]] = dict()
+        for sheet in self.config.get("sheets", list()):
+            tags: Union[str, List[str]] = sheet.get("tags", list())
+            if isinstance(tags, str):
+                tags = [tags]
+            for tag in tags:
+                sheet_names_by_tag.setdefault(tag, list()).append(str(sheet.get("sheet_name")))
+        return sheet_names_by_tag
+
+    def for_sheet(self, flags: FlagParser) -> "ConfigLoader":
+        """Makes a config loader for the sheet named in flags without reading sheets.yml again.
+
+        Args:
+            flags (FlagParser): flags whose `sheet_name` points to the sheet to resolve.
+
+        Returns:
+            ConfigLoader: config loader resolved for that one sheet.
+        """
+        return ConfigLoader(
+            flags, self.project, sheets_config=self.config, compiled_config=self.compiled_config
+        )
+
+    def make_config_hash(self) -> str:
+        """Hashes everything from the resolved sheet config that shapes what ends up in the database.
+
+        Returns:
+            str: hex digest that changes whenever the resolved config of the sheet changes.
+        """
+        resolved_config = dict(
+            sheet_config=self.sheet_config,
+            target_schema=self.target_schema,
+            target_table=self.target_table,
+            sheet_columns=self.sheet_columns,
+            sheet_column_rename_dict=self.sheet_column_rename_dict,
+        )
+        serialised_config = json.dumps(resolved_config, sort_keys=True, default=str)
+        return hashlib.sha256(serialised_config.encode("utf-8")).hexdigest()
 
     @staticmethod
     def lowercase(obj: Dict[str, str]) -> Dict[str, str]:
@@ -102,73 +209,55 @@ class ConfigLoader:
 
     def get_sheet_config(self):
         if self.flags.sheet_name:
-            sheets = self.config["sheets"]
-            sheet_config = [
-                sheet for sheet in sheets if sheet.get("sheet_name") == self.flags.sheet_name
-            ]
-            if len(sheet_config) > 1:
+            if self.compiled_config is None:
+                self.compiled_config = compile_sheets_config(self.config)
+            if self.flags.sheet_name in self.compiled_config.duplicated_sheet_names:
                 raise SheetConfigParsingError(
                     f"Found more than one config for {self.flags.sheet_name}. "
                     "Check your sheets.yml file."
                 )
-            if not sheet_config:
+            compiled_sheet = self.compiled_config.sheets.get(self.flags.sheet_name)
+            if not compiled_sheet:
                 raise SheetConfigParsingError(
                     f"No configuration was found for {self.flags.sheet_name}. "
                     "Check your sheets.yml file."
                 )
-            self.sheet_config = sheet_config[0]
+            # copy so that resolving the config never mutates the (possibly shared) compiled one
+            self.sheet_config = copy.deepcopy(compiled_sheet.sheet_config)
             logger.debug(f"Sheet config dict: {self.sheet_config}")
-            if self.sheet_config.get("columns"):
-                self.sheet_config["columns"] = [
-                    self.lowercase(column_dict) for column_dict in self.sheet_config.get("columns")  # type: ignore
-                ]
-                logger.debug(f"Cols after lowercasing: {self.sheet_config.get('columns')}")
-
-    def _generate_column_type_override_dict(self):
-        """Generates {col: dtype} dict for data type casting.
+            if compiled_sheet.sheet_columns:
+                logger.debug(f"colums operations dict: {compiled_sheet.sheet_columns}")
+                self.sheet_columns = dict(compiled_sheet.sheet_columns)
+            if compiled_sheet.sheet_column_rename_dict:
+                logger.debug(f"column renaming dict {compiled_sheet.sheet_column_rename_dict}")
+                self.sheet_column_rename_dict = dict(compiled_sheet.sheet_column_rename_dict)
 
-        Generates a dictionary of key, value where key is the name of a column and value is the
-        name of the datatype into that column should be cast on table creation.
-        """
-        try:
-            if self.sheet_config and self.sheet_config.get("columns"):
-                columns: List[Dict[str, str]] = self.sheet_config.get("columns", list())  # type: ignore
-                column_dict: Dict[str, str] = dict()
-                for column in columns:
-                    column_dict.update({column.get("name", str()): column.get("datatype", str())})
-                if column_dict:
-                    logger.debug(f"colums operations dict: {column_dict}")
-                    self.sheet_columns = column_dict
-        except KeyError as e:
-            logger.warning(
-                yellow(
-                    f"No {str(e)} data for {self.flags.sheet_name}. But that might be intentional."
-                )
+    def _generate_sync_config(self):
+        """Reads how the sheet is synced with its table and checks merged sheets have keys."""
+        self.sync_mode = str(self.sheet_config.get("sync_mode", "full"))
+        if self.sync_mode != "merge":
+            return
+        merge_keys: Union[str, List[str]] = self.sheet_config.get("merge_keys", list())  # type: ignore
+        if isinstance(merge_keys, str):
+            merge_keys = [merge_keys]
+        # keys refer to columns as they end up in the table, which are lowercased like in `columns`.
+        self.merge_keys = [key.lower() for key in merge_keys]
+        if not self.merge_keys:
+            raise SheetConfigParsingError(
+                f"{self.flags.sheet_name} uses 'sync_mode: merge' but has no 'merge_keys' to "
+                "identify its rows. Check your sheets.yml file."
+            )
+        if self.sheet_config.get("append_only"):
+            raise SheetConfigParsingError(
+                f"{self.flags.sheet_name} cannot be both 'append_only' and 'sync_mode: merge'."
             )
-
-    def _generate_column_rename_dict(self):
-        """Makes a pandas rename dict {old_col_name: new_col_name}.
-
-        Generates a dictionary of key values where key is the original name in the sheet and
-        value is the target name.
-        """
-        if self.sheet_config:
-            columns: List[Dict[str, str]] = self.sheet_config.get("columns", list())  # type: ignore
-            if columns:
-                column_rename_dict: Dict[str, str] = dict()
-                for column in columns:
-                    if column.get("identifier"):
-                        column_rename_dict.update(dict({column["identifier"]: column["name"]}))
-                    if column_rename_dict:
-                        logger.debug(f"column renaming dict {column_rename_dict}")
-                        self.sheet_column_rename_dict = column_rename_dict
 
     def _override_cli_args(self):
         """Overrides any CLI argument that may have been passed.
 
         NOTE: This is one of the only times where CLI args do not have precedence.
         """
-        self.sheet_key = self.sheet_config["sheet_key"]
+        self.sheet_key = self.sheet_config.get("sheet_key", str())
         if not self.target_table:
             self.target_table = str(self.sheet_config.get("target_table", str()))
         if not self.target_schema:
@@ -179,3 +268,70 @@ class ConfigLoader:
             raise TargetSchemaMissing(
                 "No target schema found. You must provide one either in the project, sheet or CLI"
             )
+
+
+def compile_sheet_config(sheet_config: Dict[str, Any]) -> CompiledSheet:
+    """Resolves what a sheet's config says about its columns.
+
+    Args:
+        sheet_config (Dict[str, Any]): config of the sheet as found in sheets.yml.
+
+    Returns:
+        CompiledSheet: the config with lowercased column names, the {column: datatype} dict for
+            data type casting and the {name in sheet: column} dict for renaming.
+    """
+    sheet_config = dict(sheet_config)
+    sheet_columns: Dict[str, str] = dict()
+    sheet_column_rename_dict: Dict[str, str] = dict()
+    if sheet_config.get("columns"):
+        sheet_config["columns"] = [
+            ConfigLoader.lowercase(column_dict) for column_dict in sheet_config["columns"]
+        ]
+        for column in sheet_config["columns"]:
+            sheet_columns[column.get("name", str())] = column.get("datatype", str())
+            if column.get("identifier"):
+                sheet_column_rename_dict[column["identifier"]] = column["name"]
+    return CompiledSheet(sheet_config, sheet_columns, sheet_column_rename_dict)
+
+
+def compile_sheets_config(config: Dict[str, List[Dict[str, Any]]]) -> CompiledSheetsConfig:
+    """Compiles the config of every sheet of a sheets.yml and indexes them by name.
+
+    Args:
+        config (Dict[str, List[Dict[str, Any]]]): validated content of a sheets.yml.
+
+    Returns:
+        CompiledSheetsConfig: the content along with its compiled sheets.
+    """
+    sheets: Dict[str, CompiledSheet] = dict()
+    duplicated_sheet_names = set()
+    for sheet_config in config.get("sheets", list()):
+        sheet_name = str(sheet_config.get("sheet_name"))
+        if sheet_name in sheets:
+            duplicated_sheet_names.add(sheet_name)
+        sheets[sheet_name] = compile_sheet_config(sheet_config)
+    return CompiledSheetsConfig(config, sheets, frozenset(duplicated_sheet_names))
+
+
+def dump_compiled_sheets_config(compiled_config: CompiledSheetsConfig) -> Dict[str, Any]:
+    """Turns a compiled sheets.yml into plain dicts and lists so that it can be cached as JSON."""
+    return dict(
+        config=compiled_config.config,
+        sheets={
+            sheet_name: compiled_sheet._asdict()
+            for sheet_name, compiled_sheet in compiled_config.sheets.items()
+        },
+        duplicated_sheet_names=sorted(compiled_config.duplicated_sheet_names),
+    )
+
+
+def load_compiled_sheets_config(dumped_config: Dict[str, Any]) -> CompiledSheetsConfig:
+    """Rebuilds a compiled sheets.yml from what `dump_compiled_sheets_config()` made of it."""
+    return CompiledSheetsConfig(
+        dumped_config["config"],
+        {
+            sheet_name: CompiledSheet(**compiled_sheet)
+            for sheet_name, compiled_sheet in dumped_config["sheets"].items()
+        },
+        frozenset(dumped_config["duplicated_sheet_names"]),
+    )
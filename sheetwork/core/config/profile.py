@@ -1,6 +1,6 @@
 """Houses Profile class which parses information from profiles.yml such as db type, creds etc."""
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict
 
 from sheetwork.core.config.project import Project
 from sheetwork.core.exceptions import InvalidProfileError, ProfileParserError
@@ -32,7 +32,7 @@ class Profile:
         """
         self.profile_name = project.project_name
         self.target_name = target_name
-        self.profile_dict: Dict[str, str] = dict()
+        self.profile_dict: Dict[str, Any] = dict()
         self.cannot_be_none = {"db_type", "guser"}
         self.profile_dir: Path = project.profile_dir
         self.google_credentials_dir = Path(project.profile_dir, "google").resolve()
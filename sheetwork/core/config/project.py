@@ -19,6 +19,9 @@ class Project:
     """
 
     PROJECT_FILENAME = "sheetwork_project.yml"
+    STATE_DIRNAME = "sheetwork_state"
+    # how big the cache of cleaned sheets (see `upload --use-cache`) may grow, in megabytes.
+    DEFAULT_FRAME_CACHE_MAX_SIZE_MB = 1024
     # this is some garbage to make sure we don't sleep when we test the deprecation handling
     # ! DEPRECATION "always_create"
     IS_TEST = False
@@ -40,6 +43,8 @@ class Project:
         self.project_file_fullpath: Path = Path("dumpy_path")
         self.profile_dir: Path = Path("~/.sheetwork/").expanduser()
         self.sheet_config_dir: Path = Path.cwd()
+        self.state_dir: Path = Path.cwd()
+        self.frame_cache_max_size: int = type(self).DEFAULT_FRAME_CACHE_MAX_SIZE_MB * 1024**2
 
         # override defaults
         self.override_paths_from_flags()
@@ -59,6 +64,11 @@ class Project:
             self.project_dict = project_yaml
             self.project_name = project_yaml.get("name")
             self.target_schema = project_yaml.get("target_schema", self.target_schema)
+            self.state_dir = Path(self.project_file_fullpath.parent, type(self).STATE_DIRNAME)
+            frame_cache_max_size_mb = project_yaml.get(
+                "frame_cache_max_size_mb", type(self).DEFAULT_FRAME_CACHE_MAX_SIZE_MB
+            )
+            self.frame_cache_max_size = int(frame_cache_max_size_mb * 1024**2)
             if project_yaml.get("paths"):
                 self.profile_dir = (
                     Path(project_yaml["paths"].get("profile_dir", self.profile_dir))
@@ -70,6 +80,11 @@ class Project:
                     .expanduser()
                     .resolve()
                 )
+                self.state_dir = (
+                    Path(project_yaml["paths"].get("state_dir", self.state_dir))
+                    .expanduser()
+                    .resolve()
+                )
         else:
             raise ProjectFileParserError(
                 f"Error trying to load project config from {self.project_file_fullpath}. "
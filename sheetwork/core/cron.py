@@ -0,0 +1,136 @@
+"""Cron expressions, as used by the `schedule` of a sheet, and when they next fire.
+
+Supports the five standard fields (minute, hour, day of month, month, day of week) with `*`, lists,
+ranges, steps and month or day names, as well as the `@hourly`, `@daily` etc. shortcuts. As in
+cron, when both the day of month and the day of week are restricted a day matching either fires.
+"""
+import datetime
+from typing import Dict, FrozenSet, NamedTuple, Set, Tuple
+
+_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+_MONTH_NAMES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+_DAY_NAMES = ["sun", "mon", "tue", "wed", "thu", "fri", "sat"]
+
+
+class _Field(NamedTuple):
+    name: str
+    low: int
+    high: int
+    names: Dict[str, int] = dict()
+
+
+_FIELDS = (
+    _Field("minute", 0, 59),
+    _Field("hour", 0, 23),
+    _Field("day of month", 1, 31),
+    _Field("month", 1, 12, {name: i + 1 for i, name in enumerate(_MONTH_NAMES)}),
+    # 7 is sunday too.
+    _Field("day of week", 0, 7, {name: i for i, name in enumerate(_DAY_NAMES)}),
+)
+# an expression that has not fired in this many years never will, e.g. "0 0 30 2 *".
+_MAX_YEARS_AHEAD = 5
+
+
+def _parse_value(value: str, field: _Field) -> int:
+    number = field.names.get(value.lower()) if not value.isdigit() else int(value)
+    if number is None or not field.low <= number <= field.high:
+        raise ValueError(f"{value!r} is not a valid {field.name}")
+    return number
+
+
+def _parse_field(expression: str, field: _Field) -> Tuple[FrozenSet[int], bool]:
+    """Parses one field of an expression.
+
+    Returns:
+        Tuple[FrozenSet[int], bool]: values the field matches and whether it matches them all.
+    """
+    values: Set[int] = set()
+    for part in expression.split(","):
+        values_range, _, step = part.partition("/")
+        if values_range == "*":
+            low, high = field.low, field.high
+        elif "-" in values_range:
+            first, _, last = values_range.partition("-")
+            low, high = _parse_value(first, field), _parse_value(last, field)
+        else:
+            low = _parse_value(values_range, field)
+            # "5/15" is every 15 starting from 5.
+            high = field.high if step else low
+        if step and (not step.isdigit() or int(step) < 1):
+            raise ValueError(f"{step!r} is not a valid step for the {field.name}")
+        if low > high:
+            raise ValueError(f"{part!r} is not a valid range of {field.name}")
+        values.update(range(low, high + 1, int(step or 1)))
+    return frozenset(values), expression == "*"
+
+
+class CronExpression:
+    """Parsed cron expression."""
+
+    def __init__(self, expression: str):
+        """Parses a cron expression.
+
+        Args:
+            expression (str): five space separated fields or one of the `@` shortcuts.
+
+        Raises:
+            ValueError: when the expression cannot be parsed.
+        """
+        self.expression = expression
+        fields = _ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != len(_FIELDS):
+            raise ValueError(f"{expression!r} should have {len(_FIELDS)} fields")
+        parsed_fields = [_parse_field(value, field) for value, field in zip(fields, _FIELDS)]
+        self.minutes, self.hours = parsed_fields[0][0], parsed_fields[1][0]
+        self.days_of_month, self.months = parsed_fields[2][0], parsed_fields[3][0]
+        self.days_of_week = frozenset(day % 7 for day in parsed_fields[4][0])
+        self._any_day_of_month, self._any_day_of_week = parsed_fields[2][1], parsed_fields[4][1]
+
+    def __repr__(self) -> str:  # noqa D105
+        return f"CronExpression({self.expression!r})"
+
+    def _matches_day(self, moment: datetime.datetime) -> bool:
+        # python's weekday() starts on monday, cron's on sunday.
+        day_of_month = moment.day in self.days_of_month
+        day_of_week = (moment.weekday() + 1) % 7 in self.days_of_week
+        if self._any_day_of_month or self._any_day_of_week:
+            return day_of_month and day_of_week
+        return day_of_month or day_of_week
+
+    def next_after(self, moment: datetime.datetime) -> datetime.datetime:
+        """Finds the first minute strictly after moment at which the expression fires.
+
+        Args:
+            moment (datetime.datetime): time to start from.
+
+        Raises:
+            ValueError: when the expression never fires, e.g. on the 30th of February.
+
+        Returns:
+            datetime.datetime: next firing time, in the timezone of moment.
+        """
+        candidate = moment.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        last_year = moment.year + _MAX_YEARS_AHEAD
+        while candidate.year <= last_year:
+            if candidate.month not in self.months:
+                next_month = datetime.datetime(
+                    candidate.year + candidate.month // 12, candidate.month % 12 + 1, 1
+                )
+                candidate = next_month.replace(tzinfo=candidate.tzinfo)
+            elif not self._matches_day(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + datetime.timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += datetime.timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"{self.expression!r} never fires")
@@ -119,3 +119,19 @@ class EmptyHeaderError(SheetWorkError):
 
 class UploadError(SheetWorkError):
     """when an error happens during upload."""
+
+
+class BatchUploadError(SheetWorkError):
+    """when at least one sheet of a batch upload failed."""
+
+
+class MissingDependencyError(SheetWorkError):
+    """when a feature needs an optional dependency that is not installed."""
+
+
+class DuplicatedMergeKeysError(SheetWorkError):
+    """when the key columns of a merged sheet do not identify its rows uniquely."""
+
+
+class TableValidationError(SheetWorkError):
+    """when a freshly loaded table does not hold what was pushed to it."""
@@ -7,6 +7,15 @@ import sys
 from argparse import ArgumentParser
 from typing import List
 
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_SERVE_HOST = "127.0.0.1"
+DEFAULT_SERVE_PORT = 8765
+# the Google read quotas are per minute, a minute of jitter spreads sheets sharing a schedule over it.
+DEFAULT_SCHEDULE_JITTER = 60.0
+DEFAULT_WATCH_POLL_INTERVAL = 30.0
+# a burst of edits of a workbook is uploaded once it has been left alone for this long.
+DEFAULT_WATCH_DEBOUNCE = 10.0
+
 
 class FlagParser:
     """Sets flags from defaults or by parsing CLI arguments.
@@ -58,6 +67,18 @@ class FlagParser:
         self.project_name = project_name
         self.force_credentials = False
         self.full_tracebacks = False
+        self.run_all = False
+        self.force = False
+        self.max_workers: int = DEFAULT_MAX_WORKERS
+        self.low_memory = False
+        self.full_refresh = False
+        self.deep_verify = False
+        self.use_cache = False
+        self.host = DEFAULT_SERVE_HOST
+        self.port = DEFAULT_SERVE_PORT
+        self.jitter = DEFAULT_SCHEDULE_JITTER
+        self.poll_interval = DEFAULT_WATCH_POLL_INTERVAL
+        self.debounce = DEFAULT_WATCH_DEBOUNCE
 
     def consume_cli_arguments(self, test_cli_args: List[str] = list()) -> None:
         if test_cli_args:
@@ -81,6 +102,37 @@ class FlagParser:
             self.dry_run = self.args.dry_run
             self.sheet_config_dir = self.args.sheet_config_dir
             self.target = self.args.target
+            self.run_all = self.args.run_all
+            self.force = self.args.force
+            self.max_workers = self.args.max_workers
+            self.low_memory = self.args.low_memory
+            self.full_refresh = self.args.full_refresh
+            self.deep_verify = self.args.deep_verify
+            self.use_cache = self.args.use_cache
+        elif self.task == "serve":
+            # every sheet of sheets.yml can be asked for while serving.
+            self.run_all = True
+            self.sheet_config_dir = self.args.sheet_config_dir
+            self.max_workers = self.args.max_workers
+            self.low_memory = self.args.low_memory
+            self.deep_verify = self.args.deep_verify
+            self.host = self.args.host
+            self.port = self.args.port
+        elif self.task == "schedule":
+            self.run_all = True
+            self.sheet_config_dir = self.args.sheet_config_dir
+            self.max_workers = self.args.max_workers
+            self.low_memory = self.args.low_memory
+            self.deep_verify = self.args.deep_verify
+            self.jitter = self.args.jitter
+        elif self.task == "watch":
+            self.run_all = True
+            self.sheet_config_dir = self.args.sheet_config_dir
+            self.max_workers = self.args.max_workers
+            self.low_memory = self.args.low_memory
+            self.deep_verify = self.args.deep_verify
+            self.poll_interval = self.args.poll_interval
+            self.debounce = self.args.debounce
         elif self.task == "init":
             self.project_name = self.args.project_name
             self.force_credentials = self.args.force_credentials_folders
@@ -0,0 +1,118 @@
+"""Content addressed cache of cleaned sheets, kept as Parquet files in the project's state directory.
+
+Pushing a sheet that did not change again (after the database refused the previous push or to
+another target) can then skip downloading and cleaning it. Entries are named after a hash of
+everything that went into them so they never go stale, the least recently used ones are dropped
+once the cache grows past its maximum size.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+import pandas
+
+from sheetwork.core.exceptions import MissingDependencyError
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
+
+FRAME_CACHE_DIRNAME = "frame_cache"
+_FRAME_SUFFIX = ".parquet"
+# what pyarrow raises on frames it cannot write or files it cannot read derives from those.
+_FRAME_ERRORS = (OSError, ValueError, TypeError)
+
+
+def make_frame_key(**parts: Any) -> str:
+    """Hashes everything a cleaned frame depends on into the name of its cache entry.
+
+    Returns:
+        str: hex digest that changes whenever any of the parts does.
+    """
+    serialised_parts = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(serialised_parts.encode("utf-8")).hexdigest()
+
+
+class FrameCache:
+    """Stores DataFrames on disk under a key and evicts the least recently used past a size."""
+
+    # shared by all instances as several sheets uploading in one process may evict at once.
+    _LOCK = threading.Lock()
+
+    def __init__(self, cache_dir: Path, max_size: int):
+        """Constructs the cache. Its folder is only created on the first write.
+
+        Args:
+            cache_dir (Path): folder holding the cached frames.
+            max_size (int): bytes the cached frames may take on disk altogether.
+
+        Raises:
+            MissingDependencyError: when pyarrow is not installed.
+        """
+        if importlib.util.find_spec("pyarrow") is None:
+            raise MissingDependencyError(
+                "--use-cache requires pyarrow. Install it with `pip install sheetwork[parquet]`."
+            )
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def _make_path(self, key: str) -> Path:
+        return Path(self.cache_dir, f"{key}{_FRAME_SUFFIX}")
+
+    def get(self, key: str) -> Optional[pandas.DataFrame]:
+        path = self._make_path(key)
+        try:
+            df = pandas.read_parquet(path, engine="pyarrow")
+            # the modification time tells how recently an entry was used.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except _FRAME_ERRORS as e:
+            logger.debug(f"Ignoring the cached frame {path}: {e}")
+            return None
+        return df
+
+    def put(self, key: str, df: pandas.DataFrame) -> bool:
+        """Caches a frame under key, evicting older ones if the cache grows too big.
+
+        Returns:
+            bool: False when the frame could not be written, e.g. a column mixing types.
+        """
+        path = self._make_path(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            os.close(file_descriptor)
+            try:
+                df.to_parquet(temp_path, engine="pyarrow")
+                os.replace(temp_path, path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        except _FRAME_ERRORS as e:
+            logger.debug(f"Could not cache the frame {path}: {e}")
+            return False
+        self.evict()
+        return True
+
+    def evict(self) -> None:
+        with type(self)._LOCK:
+            entries: List[Tuple[int, int, Path]] = list()
+            for path in self.cache_dir.glob(f"*{_FRAME_SUFFIX}"):
+                try:
+                    file_stats = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((file_stats.st_mtime_ns, file_stats.st_size, path))
+            total_size = sum(size for _, size, _ in entries)
+            # a frame bigger than the whole cache does not stay either.
+            for _, size, path in sorted(entries):
+                if total_size <= self.max_size:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                total_size -= size
@@ -56,6 +56,7 @@ class LogManager:
 
         self.logger = logger
         self.f_format = f_format
+        self.log_file_path = Path(log_file_path)
 
     def set_debug(self):
         """Set all loggers handlers to debug level."""
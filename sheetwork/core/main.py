@@ -1,20 +1,36 @@
-"""Main module for sheetwork. Sets up Arguments to parse and task handling. That's it!"""
+"""Main module for sheetwork. Sets up Arguments to parse and task handling. That's it!
+
+Heavy dependencies (pandas, gspread, SQLAlchemy and the database drivers) are only imported by
+`handle` once it knows which task it runs so that `--help`, `--version` or `init` start instantly.
+"""
 import argparse
 import sys
-from typing import List, Union
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, List, Union
 
-import sheetwork.core.sheetwork as upload_task
-import sheetwork.core.task.init as init_task
 from sheetwork.core._version import __version__
-from sheetwork.core.config.config import ConfigLoader
-from sheetwork.core.config.profile import Profile
-from sheetwork.core.config.project import Project
-from sheetwork.core.flags import FlagParser
+from sheetwork.core.flags import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_SCHEDULE_JITTER,
+    DEFAULT_SERVE_HOST,
+    DEFAULT_SERVE_PORT,
+    DEFAULT_WATCH_DEBOUNCE,
+    DEFAULT_WATCH_POLL_INTERVAL,
+    FlagParser,
+)
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
 from sheetwork.core.logger import log_manager
-from sheetwork.core.sheetwork import SheetBag
-from sheetwork.core.task.init import InitTask
+from sheetwork.core.spans import GLOBAL_SPAN_RECORDER, SPANS_FILENAME
 from sheetwork.core.ui.traceback_manager import SheetworkTracebackManager
-from sheetwork.core.utils import check_and_compare_version
+from sheetwork.core.version_check import check_and_compare_version
+
+if TYPE_CHECKING:
+    from sheetwork.core.sheetwork import SheetBag
+    from sheetwork.core.task.batch import BatchUploadTask
+    from sheetwork.core.task.init import InitTask
+    from sheetwork.core.task.schedule import ScheduleTask
+    from sheetwork.core.task.serve import ServeTask
+    from sheetwork.core.task.watch import WatchTask
 
 
 def check_and_print_version() -> str:
@@ -31,6 +47,24 @@ def check_and_print_version() -> str:
     return installed_version_message
 
 
+class VersionAction(argparse.Action):
+    """Prints the version, only checking what the latest one is when `--version` is asked for."""
+
+    def __init__(self, option_strings: List[str], dest: str = argparse.SUPPRESS, **kwargs: Any):
+        """Constructs VersionAction, a flag that takes no value like argparse's own version action.
+
+        Args:
+            option_strings (List[str]): flags triggering the action.
+            dest (str, optional): unused, nothing is stored. Defaults to argparse.SUPPRESS.
+        """
+        super().__init__(
+            option_strings, dest, nargs=0, default=argparse.SUPPRESS, help=kwargs.get("help")
+        )
+
+    def __call__(self, parser, namespace, values, option_string=None):  # noqa D102
+        parser.exit(message=f"{check_and_print_version()}\n")
+
+
 # general parser
 parser = argparse.ArgumentParser(
     prog="sheetwork",
@@ -38,7 +72,9 @@ parser = argparse.ArgumentParser(
     description="CLI tool to load google sheets onto a DB.",
     epilog="Select one of these sub-commands to find specific help for those.",
 )
-parser.add_argument("-v", "--version", action="version", version=check_and_print_version())
+parser.add_argument(
+    "-v", "--version", action=VersionAction, help="show program's version number and exit"
+)
 
 # base sub parser
 base_subparser = argparse.ArgumentParser(add_help=False)
@@ -67,7 +103,7 @@ subs = parser.add_subparsers(title="Available sub commands", dest="command")
 upload_sub = subs.add_parser(
     "upload", parents=[base_subparser], help="Pull, sanitize and upload a google sheet."
 )
-upload_sub.set_defaults(cls=upload_task.SheetBag, which="upload")
+upload_sub.set_defaults(which="upload")
 upload_sub.add_argument("--schema", help="Target Schema Name", type=str, default=None)
 upload_sub.add_argument("--table", help="Target Table Name", type=str, default=None)
 upload_sub.add_argument(
@@ -115,12 +151,201 @@ upload_sub.add_argument(
     action="store_true",
     default=False,
 )
+upload_sub.add_argument(
+    "--force",
+    help="Uploads the sheet even if it has not changed since its last successful upload.",
+    action="store_true",
+    default=False,
+)
+upload_sub.add_argument(
+    "--all",
+    dest="run_all",
+    help="Uploads every sheet declared in your 'sheets.yml' in one go.",
+    action="store_true",
+    default=False,
+)
+upload_sub.add_argument(
+    "--max-workers",
+    help=(
+        "Maximum number of sheets uploaded concurrently when running with --all. "
+        f"Defaults to {DEFAULT_MAX_WORKERS}."
+    ),
+    type=int,
+    default=DEFAULT_MAX_WORKERS,
+)
+upload_sub.add_argument(
+    "--low-memory",
+    help=(
+        "Cleans and casts the sheet in place instead of on copies of it. Keeps peak memory close "
+        "to the size of the sheet, which matters for very large sheets."
+    ),
+    action="store_true",
+    default=False,
+)
+upload_sub.add_argument(
+    "--full-refresh",
+    help=(
+        "Reloads 'append_only' sheets from their first row instead of only loading the rows added "
+        "since their last upload."
+    ),
+    action="store_true",
+    default=False,
+)
+upload_sub.add_argument(
+    "--deep-verify",
+    help=(
+        "Reflects and counts the whole table after the upload instead of trusting the number of "
+        "rows reported by the load. Slower."
+    ),
+    action="store_true",
+    default=False,
+)
+upload_sub.add_argument(
+    "--use-cache",
+    help=(
+        "Reuses the cleaned sheet cached by a previous run when the sheet and its config did not "
+        "change since, instead of downloading and cleaning it again. Requires pyarrow."
+    ),
+    action="store_true",
+    default=False,
+)
+
+# Serve task parser
+serve_sub = subs.add_parser(
+    "serve",
+    parents=[base_subparser],
+    help="Keep sheetwork running and upload sheets when asked to over a local HTTP API.",
+)
+serve_sub.set_defaults(which="serve")
+serve_sub.add_argument(
+    "--host",
+    help=f"Address to listen on. Defaults to {DEFAULT_SERVE_HOST}.",
+    default=DEFAULT_SERVE_HOST,
+)
+serve_sub.add_argument(
+    "--port",
+    help=f"Port to listen on. Defaults to {DEFAULT_SERVE_PORT}.",
+    type=int,
+    default=DEFAULT_SERVE_PORT,
+)
+serve_sub.add_argument(
+    "--sheet-config-dir",
+    help="Unusual path to the directory in which the 'sheets.yml' can be found",
+    default=str(),
+)
+serve_sub.add_argument(
+    "--max-workers",
+    help=f"Maximum number of sheets uploaded concurrently. Defaults to {DEFAULT_MAX_WORKERS}.",
+    type=int,
+    default=DEFAULT_MAX_WORKERS,
+)
+serve_sub.add_argument(
+    "--low-memory",
+    help="Cleans and casts sheets in place instead of on copies of them.",
+    action="store_true",
+    default=False,
+)
+serve_sub.add_argument(
+    "--deep-verify",
+    help="Reflects and counts the whole table after each upload. Slower.",
+    action="store_true",
+    default=False,
+)
+
+# Schedule task parser
+schedule_sub = subs.add_parser(
+    "schedule",
+    parents=[base_subparser],
+    help="Keep sheetwork running and upload the sheets that have a 'schedule' when it fires.",
+)
+schedule_sub.set_defaults(which="schedule")
+schedule_sub.add_argument(
+    "--sheet-config-dir",
+    help="Unusual path to the directory in which the 'sheets.yml' can be found",
+    default=str(),
+)
+schedule_sub.add_argument(
+    "--max-workers",
+    help=f"Maximum number of sheets uploaded concurrently. Defaults to {DEFAULT_MAX_WORKERS}.",
+    type=int,
+    default=DEFAULT_MAX_WORKERS,
+)
+schedule_sub.add_argument(
+    "--jitter",
+    help=(
+        "Most seconds a scheduled upload is randomly delayed by so that sheets sharing a schedule "
+        f"do not all hit the Google quotas at once. Defaults to {DEFAULT_SCHEDULE_JITTER:.0f}."
+    ),
+    type=float,
+    default=DEFAULT_SCHEDULE_JITTER,
+)
+schedule_sub.add_argument(
+    "--low-memory",
+    help="Cleans and casts sheets in place instead of on copies of them.",
+    action="store_true",
+    default=False,
+)
+schedule_sub.add_argument(
+    "--deep-verify",
+    help="Reflects and counts the whole table after each upload. Slower.",
+    action="store_true",
+    default=False,
+)
+
+# Watch task parser
+watch_sub = subs.add_parser(
+    "watch",
+    parents=[base_subparser],
+    help="Keep sheetwork running and upload sheets shortly after their Google Sheet is edited.",
+)
+watch_sub.set_defaults(which="watch")
+watch_sub.add_argument(
+    "--sheet-config-dir",
+    help="Unusual path to the directory in which the 'sheets.yml' can be found",
+    default=str(),
+)
+watch_sub.add_argument(
+    "--max-workers",
+    help=f"Maximum number of sheets uploaded concurrently. Defaults to {DEFAULT_MAX_WORKERS}.",
+    type=int,
+    default=DEFAULT_MAX_WORKERS,
+)
+watch_sub.add_argument(
+    "--poll-interval",
+    help=(
+        "Seconds between two reads of the Google Drive changes feed. "
+        f"Defaults to {DEFAULT_WATCH_POLL_INTERVAL:.0f}."
+    ),
+    type=float,
+    default=DEFAULT_WATCH_POLL_INTERVAL,
+)
+watch_sub.add_argument(
+    "--debounce",
+    help=(
+        "Seconds a workbook must be left alone before its sheets are uploaded, so that a burst "
+        f"of edits leads to a single upload. Defaults to {DEFAULT_WATCH_DEBOUNCE:.0f}."
+    ),
+    type=float,
+    default=DEFAULT_WATCH_DEBOUNCE,
+)
+watch_sub.add_argument(
+    "--low-memory",
+    help="Cleans and casts sheets in place instead of on copies of them.",
+    action="store_true",
+    default=False,
+)
+watch_sub.add_argument(
+    "--deep-verify",
+    help="Reflects and counts the whole table after each upload. Slower.",
+    action="store_true",
+    default=False,
+)
 
 # Init task parser
 init_sub = subs.add_parser(
     "init", parents=[base_subparser], help="Initialise your sheetwork project"
 )
-init_sub.set_defaults(cls=init_task.InitTask, which="init")
+init_sub.set_defaults(which="init")
 init_sub.add_argument("--project-name", help="Name you want to init your dbt project with")
 init_sub.add_argument(
     "--force-credentials-folders",
@@ -132,7 +357,9 @@ init_sub.add_argument(
 
 def handle(
     parser: argparse.ArgumentParser, test_cli_args: List[str] = list(), run_task: bool = True
-) -> Union[InitTask, SheetBag, None]:
+) -> Union[
+    "InitTask", "SheetBag", "BatchUploadTask", "ServeTask", "ScheduleTask", "WatchTask", None
+]:
     """Sheetwork's main orchestrator function.
 
     Calls pipeline based on the command asked for. It also sets up log levels and calls for CLI arg
@@ -142,7 +369,8 @@ def handle(
         parser (argparse.ArgumentParser): parser module to use for CLI parsing
 
     Returns:
-        Union[InitTask, SheetBag, None]: Ran object of type Task (need to rework TODO)
+        Union[InitTask, SheetBag, BatchUploadTask, ServeTask, ScheduleTask, WatchTask, None]: Ran
+            object of type Task (need to rework TODO)
     """
     flag_parser = FlagParser(parser)
     flag_parser.consume_cli_arguments(test_cli_args=test_cli_args)
@@ -154,22 +382,98 @@ def handle(
         log_manager.set_debug()
 
     if flag_parser.args.command == "init":
-        task: Union[init_task.InitTask, upload_task.SheetBag] = init_task.InitTask(flag_parser)
+        from sheetwork.core.task.init import InitTask
+
+        task: Union[
+            InitTask, SheetBag, BatchUploadTask, ServeTask, ScheduleTask, WatchTask
+        ] = InitTask(flag_parser)
         if run_task:
             return task.run()
         return task
 
     if flag_parser.args.command == "upload":
+        from sheetwork.core.config.config import ConfigLoader
+        from sheetwork.core.config.profile import Profile
+        from sheetwork.core.config.project import Project
+        from sheetwork.core.sheetwork import SheetBag
+        from sheetwork.core.task.batch import BatchUploadTask
+
         project = Project(flag_parser)
         config = ConfigLoader(flag_parser, project)
         profile = Profile(project)
-        task = upload_task.SheetBag(config, flag_parser, profile)
+        if flag_parser.run_all:
+            task = BatchUploadTask(config, flag_parser, profile)
+        else:
+            task = SheetBag(config, flag_parser, profile)
         if run_task:
-            return task.run()
+            try:
+                return task.run()
+            finally:
+                report_spans()
+                report_google_quota()
+        return task
+
+    if flag_parser.args.command == "serve":
+        from sheetwork.core.config.config import ConfigLoader
+        from sheetwork.core.config.profile import Profile
+        from sheetwork.core.config.project import Project
+        from sheetwork.core.task.serve import ServeTask
+
+        project = Project(flag_parser)
+        task = ServeTask(ConfigLoader(flag_parser, project), flag_parser, Profile(project))
+        if run_task:
+            task.run()
+        return task
+
+    if flag_parser.args.command == "schedule":
+        from sheetwork.core.config.config import ConfigLoader
+        from sheetwork.core.config.profile import Profile
+        from sheetwork.core.config.project import Project
+        from sheetwork.core.task.schedule import ScheduleTask
+
+        project = Project(flag_parser)
+        task = ScheduleTask(ConfigLoader(flag_parser, project), flag_parser, Profile(project))
+        if run_task:
+            task.run()
+        return task
+
+    if flag_parser.args.command == "watch":
+        from sheetwork.core.config.config import ConfigLoader
+        from sheetwork.core.config.profile import Profile
+        from sheetwork.core.config.project import Project
+        from sheetwork.core.task.watch import WatchTask
+
+        project = Project(flag_parser)
+        task = WatchTask(ConfigLoader(flag_parser, project), flag_parser, Profile(project))
+        if run_task:
+            task.run()
         return task
     return None
 
 
+def report_spans() -> None:
+    """Shows how long each stage of the run took and dumps the details next to the logs."""
+    if not GLOBAL_SPAN_RECORDER.records:
+        return
+    logger.info("\n" + GLOBAL_SPAN_RECORDER.make_summary_table())
+    spans_path = Path(log_manager.log_file_path, SPANS_FILENAME)
+    GLOBAL_SPAN_RECORDER.write_json(spans_path)
+    logger.debug(f"Stage timings written to {spans_path}")
+
+
+def report_google_quota() -> None:
+    """Shows how much the Google API quotas slowed the run down, when they did."""
+    from sheetwork.core.clients.quota import GOOGLE_QUOTA
+
+    metrics = GOOGLE_QUOTA.metrics
+    if not metrics.throttled_time:
+        return
+    logger.info(
+        f"Google API: {metrics.num_requests} requests, {metrics.num_throttled} throttled and "
+        f"{metrics.num_retries} retried, {metrics.throttled_time:.1f}s spent waiting on quotas."
+    )
+
+
 def main(parser: argparse.ArgumentParser = parser, test_cli_args: List[str] = list()) -> int:
     """Just your boring main."""
     _cli_args = list()
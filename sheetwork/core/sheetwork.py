@@ -1,24 +1,32 @@
 """Sheetwork main orchestration module containing."""
 import sys
+from pathlib import Path
 from typing import List, Optional, Tuple, Union
 
 import pandas
 from gspread.exceptions import APIError
-from retrying import retry
 
+from sheetwork import __version__
 from sheetwork.core.adapters.base.connection import BaseConnection, BaseCredentials
 from sheetwork.core.adapters.base.impl import BaseSQLAdapter
 from sheetwork.core.adapters.factory import AdapterContainer
 from sheetwork.core.cleaner import SheetCleaner
-from sheetwork.core.clients.google import GoogleSpreadsheet
+from sheetwork.core.clients.google import GoogleClientPool, GoogleSpreadsheet
 from sheetwork.core.config.config import ConfigLoader
 from sheetwork.core.config.profile import Profile
-from sheetwork.core.exceptions import SheetWorkConfigError
+from sheetwork.core.exceptions import SheetLoadingError, SheetWorkConfigError
 from sheetwork.core.flags import FlagParser
+from sheetwork.core.frame_cache import FRAME_CACHE_DIRNAME, FrameCache, make_frame_key
 from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.sources import BaseSource, make_source
+from sheetwork.core.spans import GLOBAL_SPAN_RECORDER as spans
+from sheetwork.core.state import StateStore
 from sheetwork.core.ui.printer import red, timed_message, yellow
 from sheetwork.core.utils import assert_no_empty_header_cols, check_columns_in_df
 
+REVISIONS_STATE_FILENAME = "sheet_revisions.json"
+WATERMARKS_STATE_FILENAME = "append_watermarks.json"
+
 
 class SheetBag:
     """Main object orchestrates sheet loading, cleaning, and db pushing.
@@ -31,7 +39,14 @@ class SheetBag:
         SheetBag: Loaded, and possibly cleaned sheet object with db interaction methods.
     """
 
-    def __init__(self, config: ConfigLoader, flags: FlagParser, profile: Profile):
+    def __init__(
+        self,
+        config: ConfigLoader,
+        flags: FlagParser,
+        profile: Profile,
+        connection_adapter: Optional[BaseConnection] = None,
+        google_client_pool: Optional[GoogleClientPool] = None,
+    ):
         """Constructor of SheetBag class.
 
         Args:
@@ -40,6 +55,10 @@ class SheetBag:
             flags (FlagParser): class containing defaults or parsed CLI arguments
             profile (Profile): class containing info such as credentials db type etc required for
                 SheetBag to know what to do.
+            connection_adapter (Optional[BaseConnection], optional): already initialised
+                connection (and its engine) to reuse instead of creating a new one. Defaults to None.
+            google_client_pool (Optional[GoogleClientPool], optional): pool of authenticated
+                Google clients to download the sheet with. Defaults to None.
         """
         self.sheet_df: pandas.DataFrame = pandas.DataFrame()
         self.flags = flags
@@ -49,19 +68,51 @@ class SheetBag:
         self.profile = profile
         self.push_anyway = False
         self.sheet_key: str = str(config.sheet_config.get("sheet_key", str()))
+        self.worksheet: str = str(config.sheet_config.get("worksheet", str()))
+        # set when the sheet is not read from Google Sheets but from a file or a DataFrame.
+        self.source: Optional[BaseSource] = make_source(
+            config.sheet_config, config.project.sheet_config_dir, self.worksheet
+        )
+        if self.source is not None:
+            self.sheet_key = self.source.location
+        self.sheet_revision: str = str()
+        self.is_up_to_date: bool = False
+        # set when the sheet was downloaded along with others from the same workbook (upload --all)
+        self.prefetched_df: Optional[pandas.DataFrame] = None
+        self.revisions_store = StateStore(Path(config.project.state_dir, REVISIONS_STATE_FILENAME))
+        # append_only sheets only load the rows past the ones loaded by their previous uploads.
+        self.append_only: bool = bool(config.sheet_config.get("append_only", False))
+        self.watermarks_store = StateStore(
+            Path(config.project.state_dir, WATERMARKS_STATE_FILENAME)
+        )
+        self.watermark: int = self._get_watermark()
+        self.fetched_rows: int = 0
+        # append_only sheets already only download their new rows, the other ones can reuse the
+        # frame a previous run cleaned. Interactive runs may skip the cleanup so they cannot.
+        self.frame_cache: Optional[FrameCache] = None
+        if self.flags.use_cache and not (
+            self.append_only or self.flags.interactive or self.flags.dry_run
+        ):
+            self.frame_cache = FrameCache(
+                Path(config.project.state_dir, FRAME_CACHE_DIRNAME),
+                config.project.frame_cache_max_size,
+            )
+        self.is_loaded_from_cache: bool = False
         self.credentials_adapter: Optional[BaseCredentials] = None
-        self.connection_adapter: Optional[BaseConnection] = None
+        self.connection_adapter: Optional[BaseConnection] = connection_adapter
+        self.google_client_pool = google_client_pool
         self.sql_adapter: Optional[BaseSQLAdapter] = None
         self.init_adapters()
 
     def init_adapters(self) -> None:
         adapter_container = self._get_adapter_modules()
-        self.credentials_adapter = adapter_container.credentials_adapter(  # type:ignore
-            self.profile
-        )
-        self.connection_adapter = adapter_container.connection_adapter(  # type:ignore
-            self.credentials_adapter
-        )
+        if self.connection_adapter is None:
+            self.credentials_adapter = adapter_container.credentials_adapter(  # type:ignore
+                self.profile
+            )
+            self.connection_adapter = adapter_container.connection_adapter(  # type:ignore
+                self.credentials_adapter
+            )
         self.sql_adapter = adapter_container.sql_adapter(  # type:ignore
             self.connection_adapter, self.config
         )
@@ -72,22 +123,174 @@ class SheetBag:
         adapters.load_plugins()
         return adapters
 
-    @retry(stop_max_attempt_number=3, wait_exponential_multiplier=1000, wait_exponential_max=10000)
+    @property
+    def _revision_key(self) -> str:
+        return f"{self.sheet_key}/{self.worksheet}"
+
+    @property
+    def _revision_config_hash(self) -> str:
+        # the same sheet can be pushed by several configs or to several targets so each of those
+        # combinations gets its own revision.
+        return f"{self.profile.target_name}:{self.config.make_config_hash()}"
+
+    @property
+    def _watermark_key(self) -> str:
+        return f"{self.profile.target_name}:{self.target_schema}.{self.target_table}"
+
+    def _get_watermark(self) -> int:
+        """Number of rows of an append_only sheet already loaded into its target table.
+
+        Returns:
+            int: rows to skip. 0 (load everything) for other sheets, with --full-refresh or when
+                the table was last loaded from another sheet or with another config.
+        """
+        if not self.append_only or self.flags.full_refresh:
+            return 0
+        watermark = self.watermarks_store.get(self._watermark_key)
+        if not watermark:
+            return 0
+        loaded_from = (watermark.get("sheet"), watermark.get("config_hash"))
+        if loaded_from != (self._revision_key, self.config.make_config_hash()):
+            logger.warning(
+                yellow(
+                    f"{self._watermark_key} was last loaded from another sheet or config, "
+                    "reloading all the rows of the sheet."
+                )
+            )
+            return 0
+        return int(watermark.get("rows", 0))
+
+    def _record_watermark(self) -> None:
+        if not self.append_only:
+            return
+        self.watermarks_store.set(
+            self._watermark_key,
+            dict(
+                sheet=self._revision_key,
+                config_hash=self.config.make_config_hash(),
+                rows=self.watermark + self.fetched_rows,
+            ),
+        )
+
+    def check_if_up_to_date(self, google_sheet: Union[GoogleSpreadsheet, BaseSource]) -> bool:
+        """Finds out whether the sheet changed since it was last pushed (unless --force is used).
+
+        Args:
+            google_sheet (Union[GoogleSpreadsheet, BaseSource]): authenticated client on the
+                workbook of the sheet, or the source the sheet is read from.
+
+        Returns:
+            bool: True when the sheet does not need to be uploaded again.
+        """
+        if not (self.flags.force or self.flags.full_refresh) and self._is_sheet_unchanged(
+            google_sheet
+        ):
+            self.is_up_to_date = True
+        return self.is_up_to_date
+
+    def _is_sheet_unchanged(self, google_sheet: Union[GoogleSpreadsheet, BaseSource]) -> bool:
+        try:
+            self.sheet_revision = google_sheet.get_workbook_revision()
+        except APIError as e:
+            logger.debug(f"Could not obtain the revision of {self.sheet_key}: {e}")
+            return False
+        if not self.sheet_revision:
+            return False
+        last_revisions = self.revisions_store.get(self._revision_key, dict())
+        return last_revisions.get(self._revision_config_hash) == self.sheet_revision
+
+    def _record_sheet_revision(self) -> None:
+        if not self.sheet_revision:
+            return
+        last_revisions = self.revisions_store.get(self._revision_key, dict())
+        last_revisions[self._revision_config_hash] = self.sheet_revision
+        self.revisions_store.set(self._revision_key, last_revisions)
+
+    @property
+    def _frame_cache_key(self) -> str:
+        # the revision stands for the raw values of the sheet, downloading them to hash them would
+        # defeat the purpose. The target and the casting are left out as they apply after.
+        return make_frame_key(
+            sheet=self._revision_key,
+            revision=self.sheet_revision,
+            source=self.config.sheet_config.get("source"),
+            included_columns=self.included_columns,
+            excluded_columns=self._get_columns_from_config("excluded_columns"),
+            sheet_column_rename_dict=self.config.sheet_column_rename_dict,
+            snake_case_camel=bool(self.config.sheet_config.get("snake_case_camel", False)),
+            sheetwork_version=__version__,
+        )
+
+    def load_cached_frame(self, google_sheet: Union[GoogleSpreadsheet, BaseSource]) -> bool:
+        """Picks up the frame a previous run cleaned, when the sheet did not change since.
+
+        Args:
+            google_sheet (Union[GoogleSpreadsheet, BaseSource]): authenticated client on the
+                workbook of the sheet, or the source the sheet is read from.
+
+        Returns:
+            bool: True when the cleaned sheet was found in the cache.
+        """
+        if self.frame_cache is None:
+            return False
+        if not self.sheet_revision:
+            # --force skips the revision check, the cache still needs to know it.
+            try:
+                self.sheet_revision = google_sheet.get_workbook_revision()
+            except APIError as e:
+                logger.debug(f"Could not obtain the revision of {self.sheet_key}: {e}")
+                return False
+        if not self.sheet_revision:
+            return False
+        cached_df = self.frame_cache.get(self._frame_cache_key)
+        if cached_df is None:
+            return False
+        self.sheet_df = cached_df
+        self.is_loaded_from_cache = True
+        return True
+
+    def _cache_frame(self) -> None:
+        if self.frame_cache is None or not self.sheet_revision:
+            return
+        with spans.span("cache_frame") as cache_span:
+            cache_span.rows = len(self.sheet_df)
+            self.frame_cache.put(self._frame_cache_key, self.sheet_df)
+
     def _obtain_googlesheet(self) -> pandas.DataFrame:
+        # quota and server errors are retried by the client itself (see `GoogleQuota`), anything
+        # else that goes wrong fails the sheet instead of pushing an empty one.
         df = pandas.DataFrame()
+        if self.is_up_to_date or self.is_loaded_from_cache:
+            return df
+        if self.prefetched_df is not None:
+            # hand the frame over so that it can be freed once pushed.
+            df, self.prefetched_df = self.prefetched_df, None
+            return df
         try:
-            worksheet = str(self.config.sheet_config.get("worksheet", str()))
-            google_sheet = GoogleSpreadsheet(self.profile, self.sheet_key)
+            google_sheet = GoogleSpreadsheet(
+                self.profile, self.sheet_key, client_pool=self.google_client_pool
+            )
             google_sheet.authenticate()
+            if self.check_if_up_to_date(google_sheet) or self.load_cached_frame(google_sheet):
+                return df
             google_sheet.open_workbook()
-            df = google_sheet.make_df_from_worksheet(worksheet_name=worksheet)
+            return google_sheet.make_df_from_worksheet(
+                worksheet_name=self.worksheet,
+                included_columns=self.included_columns,
+                skip_rows=self.watermark,
+            )
         except APIError as e:
-            error = str(e)
-            if any(x in error for x in ["RESOURCE_EXHAUSTED", "UNAVAILABLE", "INTERNAL"]) and any(
-                x in error for x in ["100", "500", "503"]
-            ):
-                raise
-        return df
+            raise SheetLoadingError(
+                f"Google refused to hand over {self.sheet_key} "
+                f"(HTTP {e.response.status_code}): {e}"
+            )
+
+    def _obtain_from_source(self, source: BaseSource) -> pandas.DataFrame:
+        if self.is_up_to_date or self.is_loaded_from_cache:
+            return pandas.DataFrame()
+        if self.check_if_up_to_date(source) or self.load_cached_frame(source):
+            return pandas.DataFrame()
+        return source.make_df(included_columns=self.included_columns, skip_rows=self.watermark)
 
     def load_sheet(self):
         """Loads a google sheet, and calls clean up steps if applicable.
@@ -99,35 +302,79 @@ class SheetBag:
             DataFrame a type error will be raised.
             EmptyHeaderError: when at least 1 column header is made of whitespaces only.
         """
-        if self.flags.sheet_name:
-            logger.info(timed_message(f"Importing: {self.flags.sheet_name}"))
-            logger.debug(f"Importing data from: {self.config.sheet_config['sheet_key']}")
-        else:
-            logger.info(
-                timed_message(f"Importing data from: {self.config.sheet_config.get('sheet_key')}")
-            )
-        df = self._obtain_googlesheet()
-        if not isinstance(df, pandas.DataFrame):
-            raise TypeError("import_sheet did not return a pandas DataFrame")
-        logger.debug(f"Columns imported from sheet: {df.columns.tolist()}")
-
-        # Check that headers are in the 1st row
-        _ = assert_no_empty_header_cols(df)
-
-        # Perform exclusions, renamings and cleanups before releasing the sheet.
-        df = self.exclude_or_include_columns(df)
-        df = self.rename_columns(df)
-        self.push_anyway, df = self.run_cleanup(df)
-        logger.debug(f"Columns after cleanups and exclusions: {df.columns}")
-        logger.debug(f"Loaded SHEET HEAD: {df}")
-        self.sheet_df = df
+        with spans.span("load_sheet") as load_span:
+            if self.flags.sheet_name:
+                logger.info(timed_message(f"Importing: {self.flags.sheet_name}"))
+                logger.debug(f"Importing data from: {self.sheet_key}")
+            else:
+                logger.info(timed_message(f"Importing data from: {self.sheet_key}"))
+            if self.source is not None:
+                with spans.span("source_fetch") as fetch_span:
+                    df = self._obtain_from_source(self.source)
+                    fetch_span.rows = len(df)
+            else:
+                with spans.span("google_fetch") as fetch_span:
+                    df = self._obtain_googlesheet()
+                    fetch_span.rows = len(df)
+            self.fetched_rows = len(df)
+            if self.is_up_to_date:
+                logger.info(
+                    timed_message(
+                        yellow(
+                            "Sheet has not changed since its last upload, skipping it. "
+                            "Use --force to upload it anyway."
+                        )
+                    )
+                )
+                return
+            if self.is_loaded_from_cache:
+                logger.info(
+                    timed_message("Sheet is unchanged since it was last cleaned, reusing it.")
+                )
+                self.push_anyway = True
+                load_span.rows = len(self.sheet_df)
+                return
+            if self.watermark:
+                logger.info(
+                    timed_message(
+                        f"Loading {len(df)} rows added since the last {self.watermark} rows."
+                    )
+                )
+            if not isinstance(df, pandas.DataFrame):
+                raise TypeError("import_sheet did not return a pandas DataFrame")
+            logger.debug(f"Columns imported from sheet: {df.columns.tolist()}")
+
+            # Check that headers are in the 1st row
+            _ = assert_no_empty_header_cols(df)
+
+            # Perform exclusions, renamings and cleanups before releasing the sheet.
+            df = self.exclude_or_include_columns(df)
+            df = self.rename_columns(df)
+            self.push_anyway, df = self.run_cleanup(df)
+            logger.debug(f"Columns after cleanups and exclusions: {df.columns}")
+            logger.debug(f"Loaded SHEET HEAD: {df}")
+            load_span.rows = len(df)
+            self.sheet_df = df
+        # written before the push as low memory mode casts the frame in place.
+        self._cache_frame()
 
     def rename_columns(self, df: pandas.DataFrame):
         if self.config.sheet_column_rename_dict:
             _, _ = check_columns_in_df(df, list(self.config.sheet_column_rename_dict.keys()))
-            df = df.rename(columns=self.config.sheet_column_rename_dict)  # type: ignore
+            df = df.rename(columns=self.config.sheet_column_rename_dict, copy=False)  # type: ignore
         return df
 
+    def _get_columns_from_config(self, key: str) -> List[str]:
+        columns: Union[str, List[str]] = self.config.sheet_config.get(key, list())  # type: ignore
+        if isinstance(columns, str):
+            columns = [columns]
+        return columns
+
+    @property
+    def included_columns(self) -> List[str]:
+        """Columns to keep, only those are downloaded from the sheet. Empty to keep them all."""
+        return self._get_columns_from_config("included_columns")
+
     def exclude_or_include_columns(self, df: pandas.DataFrame) -> pandas.DataFrame:
         """Drops or keeps columns referred to by their identifier.
 
@@ -142,14 +389,8 @@ class SheetBag:
             pandas.DataFrame: Either the same dataframe as originally provided or a filtered
             dataframe based on the inclusion or exlusion lists provided in the config.
         """
-        cols_to_exclude: Union[str, List[str]] = self.config.sheet_config.get(  # type: ignore
-            "excluded_columns", list(str())
-        )
-        if isinstance(cols_to_exclude, str):
-            cols_to_exclude = [cols_to_exclude]
-        cols_to_include: Union[str, List[str]] = self.config.sheet_config.get("included_columns", [])  # type: ignore
-        if isinstance(cols_to_include, str):
-            cols_to_include = [cols_to_include]
+        cols_to_exclude = self._get_columns_from_config("excluded_columns")
+        cols_to_include = self.included_columns
 
         # check if the lists are mutually exclusive if not raise?
         if cols_to_include and cols_to_exclude:
@@ -170,8 +411,7 @@ class SheetBag:
             _, filtered_columns_to_include = check_columns_in_df(
                 df, cols_to_include, warn_only=True
             )
-            print(filtered_columns_to_include)
-            print(df.head())
+            logger.debug(f"Columns kept from the sheet: {filtered_columns_to_include}")
             if filtered_columns_to_include:
                 df = df[filtered_columns_to_include]
         return df
@@ -215,9 +455,13 @@ class SheetBag:
 
         if clean_up is True:
             logger.debug("Performing clean ups")
-            clean_df = SheetCleaner(
-                df, bool(self.config.sheet_config.get("snake_case_camel", False))
-            ).cleanup()
+            with spans.span("cleanup") as cleanup_span:
+                clean_df = SheetCleaner(
+                    df,
+                    bool(self.config.sheet_config.get("snake_case_camel", False)),
+                    inplace=self.flags.low_memory,
+                ).cleanup()
+                cleanup_span.rows = len(clean_df)
             if self.flags.dry_run or self.flags.interactive:
                 logger.info(yellow("\nPOST-CLEANING PREVIEW:"))
                 self._show_dry_run_preview(clean_df)
@@ -233,15 +477,36 @@ class SheetBag:
         logger.debug(f"Column override dict is a {type(self.config.sheet_columns)}")
         logger.debug(f"Sheet columns: {self.config.sheet_columns}")
         logger.debug(f"Columns in final df: {self.sheet_df.columns.tolist()}")
-        self.sql_adapter.upload(self.sheet_df, self.target_schema)
+        with spans.span("push_sheet") as push_span:
+            push_span.rows = len(self.sheet_df)
+            # in low memory mode the SheetBag hands its frame over to be cast in place.
+            self.sql_adapter.upload(
+                self.sheet_df,
+                self.target_schema,
+                inplace=self.flags.low_memory,
+                append=self.watermark > 0,
+            )
 
     def check_table(self):
-        _, _ = self.sql_adapter.check_table(self.target_schema, self.target_table)
+        with spans.span("check_table"):
+            _, _ = self.sql_adapter.check_table(
+                self.target_schema, self.target_table, deep=self.flags.deep_verify
+            )
 
     def run(self):
-        self.load_sheet()
-        if self.push_anyway:
-            self.push_sheet()
-            self.check_table()
-        else:
-            logger.info(yellow("Nothing pushed since you were in --dry_run mode."))
+        with spans.span("run", sheet_name=self.flags.sheet_name or self.sheet_key):
+            self.load_sheet()
+            if self.is_up_to_date:
+                return
+            if self.push_anyway and self.watermark and self.sheet_df.empty:
+                logger.info(timed_message(yellow("No rows were added to the sheet, skipping it.")))
+                self._record_sheet_revision()
+            elif self.push_anyway:
+                # schema creation, load and verification all go through the same connection.
+                with self.sql_adapter.reuse_connection():
+                    self.push_sheet()
+                    self.check_table()
+                self._record_sheet_revision()
+                self._record_watermark()
+            else:
+                logger.info(yellow("Nothing pushed since you were in --dry_run mode."))
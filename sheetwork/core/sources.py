@@ -0,0 +1,208 @@
+"""Sources sheets can be read from instead of Google Sheets (`source` in sheets.yml).
+
+A sheet either has a `sheet_key` and is read from Google Sheets through `GoogleSpreadsheet` or has
+a `source` pointing to a local file (csv, excel or parquet) or to a DataFrame registered from
+Python. Whatever it is read from, the frame then goes through the same cleaning and upload path.
+"""
+import abc
+import importlib.util
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Type
+
+import pandas
+
+from sheetwork.core.exceptions import MissingDependencyError, SheetLoadingError
+
+# DataFrames that sheets with a `dataframe` source can be read from, by name.
+_REGISTERED_DATAFRAMES: Dict[str, pandas.DataFrame] = dict()
+
+
+def register_dataframe(name: str, df: pandas.DataFrame) -> None:
+    """Makes a DataFrame available to the sheets whose source is `{type: dataframe, name: name}`.
+
+    Args:
+        name (str): name the sheets refer to the frame by.
+        df (pandas.DataFrame): frame to upload, as if it had been downloaded from a sheet.
+    """
+    _REGISTERED_DATAFRAMES[name] = df
+
+
+def _require(module_name: str, extra: str, feature: str) -> None:
+    if importlib.util.find_spec(module_name) is None:
+        raise MissingDependencyError(
+            f"{feature} requires {module_name}. Install it with `pip install sheetwork[{extra}]`."
+        )
+
+
+class BaseSource(abc.ABC):
+    """Reads a sheet from somewhere else than Google Sheets."""
+
+    def __init__(self, source_config: Dict[str, Any], base_dir: Path, worksheet: str = str()):
+        """Constructs a source.
+
+        Args:
+            source_config (Dict[str, Any]): `source` of the sheet in sheets.yml.
+            base_dir (Path): directory relative file paths are resolved from (where sheets.yml is).
+            worksheet (str, optional): worksheet of the sheet, for sources that have several.
+                Defaults to str().
+        """
+        self.source_config = source_config
+        self.base_dir = base_dir
+        self.worksheet = worksheet
+
+    @property
+    @abc.abstractmethod
+    def location(self) -> str:
+        """Identifies what is read, plays the part of the sheet key (e.g. in saved revisions)."""
+        raise NotImplementedError()
+
+    def get_workbook_revision(self) -> str:
+        """Version of what is read, named after `GoogleSpreadsheet`'s so SheetBag can ask either.
+
+        Returns:
+            str: changes whenever the content may have changed. Empty when it cannot be known.
+        """
+        return str()
+
+    @abc.abstractmethod
+    def _read(self, included_columns: List[str], skip_rows: int) -> pandas.DataFrame:
+        raise NotImplementedError()
+
+    def make_df(
+        self, included_columns: Optional[List[str]] = None, skip_rows: int = 0
+    ) -> pandas.DataFrame:
+        """Reads the sheet into a DataFrame.
+
+        Args:
+            included_columns (Optional[List[str]], optional): names of the only columns to read
+                (those that do exist), all of them when empty. Defaults to None.
+            skip_rows (int, optional): number of rows under the header not to read (see
+                `append_only`). Defaults to 0.
+
+        Returns:
+            pandas.DataFrame: the sheet.
+        """
+        return self._read(included_columns or list(), skip_rows)
+
+    @staticmethod
+    def _make_usecols(included_columns: List[str]) -> Optional[Callable[[Any], bool]]:
+        if not included_columns:
+            return None
+        columns_to_read = set(included_columns)
+        return lambda column: column in columns_to_read
+
+
+class BaseFileSource(BaseSource):
+    """Reads a sheet from a local file."""
+
+    @property
+    def path(self) -> Path:
+        path = Path(self.source_config.get("path", str())).expanduser()
+        return path if path.is_absolute() else Path(self.base_dir, path)
+
+    @property
+    def location(self) -> str:
+        return str(self.path)
+
+    def get_workbook_revision(self) -> str:
+        try:
+            file_stats = self.path.stat()
+        except FileNotFoundError:
+            raise SheetLoadingError(f"{self.path} does not exist.")
+        return f"{file_stats.st_mtime_ns}-{file_stats.st_size}"
+
+
+class CsvSource(BaseFileSource):
+    """Reads a sheet from a csv file, all of its values as text like Google Sheets gives them."""
+
+    def _read(self, included_columns: List[str], skip_rows: int) -> pandas.DataFrame:
+        return pandas.read_csv(
+            self.path,
+            sep=self.source_config.get("separator", ","),
+            dtype=str,
+            keep_default_na=False,
+            usecols=self._make_usecols(included_columns),
+            skiprows=range(1, skip_rows + 1) if skip_rows else None,
+        )
+
+
+class ExcelSource(BaseFileSource):
+    """Reads a sheet from a worksheet of an xlsx or ods file, as text like Google Sheets gives it."""
+
+    def _read(self, included_columns: List[str], skip_rows: int) -> pandas.DataFrame:
+        if self.path.suffix.lower() == ".ods":
+            _require("odf", "excel", "Reading ods files")
+        else:
+            _require("openpyxl", "excel", "Reading xlsx files")
+        df = pandas.read_excel(
+            self.path,
+            sheet_name=self.worksheet or 0,
+            dtype=str,
+            usecols=self._make_usecols(included_columns),
+            skiprows=range(1, skip_rows + 1) if skip_rows else None,
+        )
+        return df.fillna(str())
+
+
+class ParquetSource(BaseFileSource):
+    """Reads a sheet from a parquet file. Values keep their types."""
+
+    def _read(self, included_columns: List[str], skip_rows: int) -> pandas.DataFrame:
+        _require("pyarrow", "parquet", "Reading parquet files")
+        import pyarrow.parquet
+
+        columns = None
+        if included_columns:
+            columns_to_read = set(included_columns)
+            file_columns = pyarrow.parquet.read_schema(self.path).names
+            columns = [column for column in file_columns if column in columns_to_read]
+        df = pandas.read_parquet(self.path, engine="pyarrow", columns=columns)
+        return df.iloc[skip_rows:].reset_index(drop=True) if skip_rows else df
+
+
+class DataFrameSource(BaseSource):
+    """Reads a sheet from a DataFrame registered with `register_dataframe()`."""
+
+    @property
+    def name(self) -> str:
+        return str(self.source_config.get("name", str()))
+
+    @property
+    def location(self) -> str:
+        return f"dataframe:{self.name}"
+
+    def _read(self, included_columns: List[str], skip_rows: int) -> pandas.DataFrame:
+        df = _REGISTERED_DATAFRAMES.get(self.name)
+        if df is None:
+            raise SheetLoadingError(
+                f"No DataFrame was registered as '{self.name}'. Use `register_dataframe()` first."
+            )
+        if included_columns:
+            columns_to_read = set(included_columns)
+            df = df[[column for column in df.columns if column in columns_to_read]]
+        # cleaning works on its own copy so that the registered frame can be uploaded again.
+        return df.iloc[skip_rows:].reset_index(drop=True) if skip_rows else df.copy()
+
+
+SOURCES: Dict[str, Type[BaseSource]] = dict(
+    csv=CsvSource, excel=ExcelSource, parquet=ParquetSource, dataframe=DataFrameSource
+)
+
+
+def make_source(
+    sheet_config: Dict[str, Any], base_dir: Path, worksheet: str = str()
+) -> Optional[BaseSource]:
+    """Makes the source a sheet is read from.
+
+    Args:
+        sheet_config (Dict[str, Any]): resolved config of the sheet.
+        base_dir (Path): directory relative file paths are resolved from (where sheets.yml is).
+        worksheet (str, optional): worksheet of the sheet. Defaults to str().
+
+    Returns:
+        Optional[BaseSource]: the source of the sheet, None when it is read from Google Sheets.
+    """
+    source_config: Optional[Dict[str, Any]] = sheet_config.get("source")
+    if not source_config:
+        return None
+    return SOURCES[source_config["type"]](source_config, base_dir, worksheet)
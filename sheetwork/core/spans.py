@@ -0,0 +1,189 @@
+"""Lightweight spans timing (and weighing) each stage of a sheetwork run.
+
+Stages are wrapped in `GLOBAL_SPAN_RECORDER.span(name)`. Spans opened inside another one on the
+same thread become its children and every finished span is recorded with its wall time, CPU time,
+rows, bytes and how much it pushed the peak RSS of the process up.
+"""
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover (windows)
+    resource = None  # type: ignore
+
+SPANS_FILENAME = "sheetwork_spans.json"
+
+# CPU time of the calling thread so that sheets uploaded concurrently don't add to each other.
+_cpu_time = getattr(time, "thread_time", time.process_time)
+
+
+def peak_rss() -> int:
+    """Returns the peak resident set size of the process so far in bytes, 0 when unavailable."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes when linux reports kilobytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class SpanContext(NamedTuple):
+    """Where a span sits: the sheet it belongs to and the dotted path of its parents."""
+
+    sheet_name: str = str()
+    path: str = str()
+
+
+class Span:
+    """Span in flight. Code running inside it can fill in the rows and bytes it processed."""
+
+    def __init__(self, name: str, context: SpanContext):
+        """Constructs a Span.
+
+        Args:
+            name (str): name of the stage.
+            context (SpanContext): context of the parent span (empty for a root span).
+        """
+        self.name = name
+        self.sheet_name = context.sheet_name
+        self.path = f"{context.path}.{name}" if context.path else name
+        self.rows = 0
+        self.num_bytes = 0
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.sheet_name, self.path)
+
+
+class SpanRecord(NamedTuple):
+    """Measurements of a finished span."""
+
+    sheet_name: str
+    path: str
+    started_at: float
+    wall_time: float
+    cpu_time: float
+    rows: int
+    num_bytes: int
+    peak_rss_delta: int
+
+
+class SpanRecorder:
+    """Collects the spans of a run, possibly from several threads at once."""
+
+    def __init__(self) -> None:
+        """Constructs an empty SpanRecorder."""
+        self.records: List[SpanRecord] = list()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_at = time.perf_counter()
+
+    def current_context(self) -> SpanContext:
+        return getattr(self._local, "context", SpanContext())
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        sheet_name: Optional[str] = None,
+        parent: Optional[SpanContext] = None,
+    ) -> Iterator[Span]:
+        """Measures the code running inside the with block.
+
+        Args:
+            name (str): name of the stage.
+            sheet_name (Optional[str], optional): sheet the span (and its children) belong to.
+                Defaults to the sheet of the parent span.
+            parent (Optional[SpanContext], optional): explicit parent, to attach work done on
+                another thread to the span that started it. Defaults to the innermost span open on
+                the calling thread.
+
+        Yields:
+            Iterator[Span]: the span, on which rows and bytes can be set.
+        """
+        previous_context = self.current_context()
+        span = Span(name, parent or previous_context)
+        if sheet_name is not None:
+            span.sheet_name = sheet_name
+        self._local.context = span.context
+        start_wall, start_cpu, start_rss = time.perf_counter(), _cpu_time(), peak_rss()
+        try:
+            yield span
+        finally:
+            record = SpanRecord(
+                sheet_name=span.sheet_name,
+                path=span.path,
+                started_at=start_wall - self._started_at,
+                wall_time=time.perf_counter() - start_wall,
+                cpu_time=_cpu_time() - start_cpu,
+                rows=span.rows,
+                num_bytes=span.num_bytes,
+                peak_rss_delta=peak_rss() - start_rss,
+            )
+            self._local.context = previous_context
+            with self._lock:
+                self.records.append(record)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records = list()
+        self._started_at = time.perf_counter()
+
+    def summarise(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """Adds up the records of the same stage (e.g. each chunk put) of each sheet.
+
+        Returns:
+            Dict[Tuple[str, str], Dict[str, float]]: totals by (sheet_name, path), in the order
+                the stages started.
+        """
+        summary: Dict[Tuple[str, str], Dict[str, float]] = OrderedDict()
+        for record in sorted(self.records, key=lambda record: record.started_at):
+            totals = summary.setdefault(
+                (record.sheet_name, record.path),
+                dict(calls=0, wall_time=0, cpu_time=0, rows=0, num_bytes=0, peak_rss_delta=0),
+            )
+            totals["calls"] += 1
+            totals["wall_time"] += record.wall_time
+            totals["cpu_time"] += record.cpu_time
+            totals["rows"] += record.rows
+            totals["num_bytes"] += record.num_bytes
+            totals["peak_rss_delta"] = max(totals["peak_rss_delta"], record.peak_rss_delta)
+        return summary
+
+    def make_summary_table(self) -> str:
+        header = (
+            f"{'sheet':<20} {'stage':<32} {'calls':>5} {'wall s':>8} {'cpu s':>8} "
+            f"{'rows':>10} {'MB':>8} {'peak RSS +MB':>12}"
+        )
+        lines = [header, "-" * len(header)]
+        for (sheet_name, path), totals in self.summarise().items():
+            # indent children under their parent and only show the last bit of their path.
+            stage = "  " * path.count(".") + path.rsplit(".", 1)[-1]
+            lines.append(
+                f"{sheet_name[:20]:<20} {stage[:32]:<32} {totals['calls']:>5} "
+                f"{totals['wall_time']:>8.2f} {totals['cpu_time']:>8.2f} {totals['rows']:>10} "
+                f"{totals['num_bytes'] / 1e6:>8.1f} {totals['peak_rss_delta'] / 1e6:>12.1f}"
+            )
+        return "\n".join(lines)
+
+    def write_json(self, path: Path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        records = sorted(self.records, key=lambda record: record.started_at)
+        with open(path, "w") as f:
+            json.dump(
+                dict(
+                    generated_at=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    spans=[record._asdict() for record in records],
+                ),
+                f,
+                indent=2,
+            )
+
+
+GLOBAL_SPAN_RECORDER = SpanRecorder()
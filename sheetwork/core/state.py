@@ -0,0 +1,53 @@
+"""Small JSON backed state store used to remember things between sheetwork runs."""
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
+
+
+class StateStore:
+    """Persists a flat key-value mapping in a JSON file inside the project's state directory.
+
+    Reads always go to disk so that several sheets uploading in the same process (see `upload
+    --all`) see each other's writes. Writes go through a temporary file that is moved in place so
+    that a crash never leaves a half written state file behind.
+    """
+
+    # shared by all instances as several stores in one process may point to the same file.
+    _LOCK = threading.Lock()
+
+    def __init__(self, path: Path):
+        """Constructs the store. The file (and its folder) are only created on the first write.
+
+        Args:
+            path (Path): Full path to the JSON file holding the state.
+        """
+        self.path = path
+
+    def _read(self) -> Dict[str, Any]:
+        if not self.path.exists():
+            return dict()
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except ValueError:
+            logger.warning(f"{self.path} could not be parsed, sheetwork will ignore its content.")
+            return dict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with type(self)._LOCK:
+            return self._read().get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        with type(self)._LOCK:
+            state = self._read()
+            state[key] = value
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
@@ -0,0 +1,171 @@
+"""Row hashes and deltas behind `sync_mode: merge`.
+
+Each row pushed to a merged table carries a hash of its (cleaned and cast) values. On the next
+upload the hashes of the sheet are compared to the ones stored in the table, by key, so that only
+the rows that were inserted, updated or deleted in the sheet have to be sent to the database.
+"""
+from typing import Dict, List, NamedTuple
+
+import pandas
+
+from sheetwork.core.exceptions import DuplicatedMergeKeysError, SheetWorkConfigError
+from sheetwork.core.utils import cast_pandas_dtypes
+
+ROW_HASH_COLUMN = "_sheetwork_row_hash"
+DELETED_FLAG_COLUMN = "_sheetwork_deleted"
+# stands for a missing key value on both sides, pandas never matches NaN, None or NaT otherwise.
+_NULL_KEY = object()
+
+
+class RowDelta(NamedTuple):
+    """Rows of the sheet that differ from the ones of the table."""
+
+    # full rows (hash included) to insert or update.
+    upserts: pandas.DataFrame
+    # key columns of the rows to delete.
+    deletes: pandas.DataFrame
+    num_inserted: int
+    num_updated: int
+
+    @property
+    def is_empty(self) -> bool:
+        return self.upserts.empty and self.deletes.empty
+
+
+def add_row_hashes(df: pandas.DataFrame, inplace: bool = False) -> pandas.DataFrame:
+    """Adds a column holding a 64 bits hash of the values of each row.
+
+    Args:
+        df (pandas.DataFrame): cast DataFrame, as it will be pushed.
+        inplace (bool, optional): When true the column is added to df itself instead of to a
+            copy of it. Defaults to False.
+
+    Returns:
+        pandas.DataFrame: df with the row hash as its last column.
+    """
+    # hashes are unsigned, stored as signed so that they fit in a BIGINT.
+    row_hashes = pandas.util.hash_pandas_object(df, index=False).to_numpy().view("int64")
+    if inplace:
+        df[ROW_HASH_COLUMN] = row_hashes
+        return df
+    return df.assign(**{ROW_HASH_COLUMN: row_hashes})
+
+
+def check_merge_keys(df: pandas.DataFrame, merge_keys: List[str]) -> None:
+    """Makes sure every merge key is a column of the sheet.
+
+    Raises:
+        SheetWorkConfigError: when one of the merge keys is not found in the sheet.
+    """
+    missing_keys = [key for key in merge_keys if key not in df.columns]
+    if missing_keys:
+        raise SheetWorkConfigError(
+            f"The merge_keys {missing_keys} are not columns of the sheet. Its columns are: "
+            f"{df.columns.tolist()}"
+        )
+
+
+def _make_typed_key(key_values: pandas.Series, datatype: str) -> pandas.Series:
+    # ints are kept as text when casting the sheet (see `cast_pandas_dtypes()`) while the table
+    # hands them back as ints or decimals.
+    if datatype == "int":
+        try:
+            key_values = pandas.to_numeric(key_values).astype("Int64")
+        except (ValueError, TypeError):
+            pass
+    elif datatype not in {"numeric", "boolean", "timestamp_ntz", "date"}:
+        key_values = key_values.map(str, na_action="ignore")
+    return key_values.astype(object).where(key_values.notna(), _NULL_KEY)
+
+
+def _make_key_index(
+    df: pandas.DataFrame, merge_keys: List[str], column_datatypes: Dict[str, str]
+) -> pandas.MultiIndex:
+    # the sheet and the table seldom agree on the types of the keys (text dates against
+    # timestamps, floats against decimals...) so both are cast to the types declared for the sheet.
+    key_datatypes = {key: column_datatypes.get(key, "varchar") for key in merge_keys}
+    keys_df = cast_pandas_dtypes(df[merge_keys], key_datatypes)
+    return pandas.MultiIndex.from_arrays(
+        [_make_typed_key(keys_df[key], key_datatypes[key]).to_numpy() for key in merge_keys],
+        names=merge_keys,
+    )
+
+
+def compute_delta(
+    df: pandas.DataFrame,
+    existing: pandas.DataFrame,
+    merge_keys: List[str],
+    column_datatypes: Dict[str, str] = dict(),
+) -> RowDelta:
+    """Compares the hashed rows of the sheet with the keys and hashes currently in the table.
+
+    Args:
+        df (pandas.DataFrame): frame to push, with its row hashes (see `add_row_hashes()`).
+        existing (pandas.DataFrame): key columns and row hash of each row of the table.
+        merge_keys (List[str]): columns identifying a row.
+        column_datatypes (Dict[str, str], optional): datatypes declared for the columns of the
+            sheet, keys of both sides are compared as those. Others are compared as text.
+            Defaults to dict().
+
+    Raises:
+        SheetWorkConfigError: when one of the merge keys is not a column of the sheet.
+        DuplicatedMergeKeysError: when several rows of the sheet share the same keys.
+
+    Returns:
+        RowDelta: rows to insert or update and keys to delete.
+    """
+    check_merge_keys(df, merge_keys)
+    sheet_keys = _make_key_index(df, merge_keys, column_datatypes)
+    if sheet_keys.has_duplicates:
+        duplicated_keys = sheet_keys[sheet_keys.duplicated()].unique().tolist()
+        raise DuplicatedMergeKeysError(
+            f"{merge_keys} should identify each row of the sheet but these are found more than "
+            f"once: {duplicated_keys[:10]}"
+        )
+    table_keys = _make_key_index(existing, merge_keys, column_datatypes)
+    table_hashes = pandas.Series(existing[ROW_HASH_COLUMN].to_numpy(), index=table_keys)
+
+    is_known = sheet_keys.isin(table_keys)
+    known_hashes = table_hashes.reindex(sheet_keys[is_known]).to_numpy()
+    is_updated = is_known.copy()
+    is_updated[is_known] = known_hashes != df[ROW_HASH_COLUMN].to_numpy()[is_known]
+    is_inserted = ~is_known
+
+    is_deleted = ~table_keys.isin(sheet_keys)
+    return RowDelta(
+        upserts=df[is_inserted | is_updated],
+        deletes=existing.loc[is_deleted, merge_keys],
+        num_inserted=int(is_inserted.sum()),
+        num_updated=int(is_updated.sum()),
+    )
+
+
+def make_staged_rows(delta: RowDelta) -> pandas.DataFrame:
+    """Stacks the rows to upsert and the keys to delete into the rows of a staging table.
+
+    Each row is flagged in DELETED_FLAG_COLUMN. Deleted rows only carry their keys so their other
+    columns are null, integer columns are made nullable beforehand as NaN would otherwise turn
+    them into floats (5 staged as 5.0, which an integer column refuses).
+
+    Args:
+        delta (RowDelta): rows of the sheet that differ from the ones of the table.
+
+    Returns:
+        pandas.DataFrame: the upserts followed by the deletes, with the columns of the upserts.
+    """
+    integer_columns = {
+        column: "Int64"
+        for column, dtype in delta.upserts.dtypes.items()
+        if pandas.api.types.is_integer_dtype(dtype)
+    }
+    upserts = delta.upserts.astype(integer_columns)
+    deletes = delta.deletes.astype(
+        {column: dtype for column, dtype in integer_columns.items() if column in delta.deletes}
+    )
+    return pandas.concat(
+        [
+            upserts.assign(**{DELETED_FLAG_COLUMN: False}),
+            deletes.assign(**{ROW_HASH_COLUMN: 0, DELETED_FLAG_COLUMN: True}),
+        ],
+        ignore_index=True,
+    )
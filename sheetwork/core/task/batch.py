@@ -0,0 +1,224 @@
+"""Batch upload task. Runs every sheet of a sheets.yml through SheetBag on a pool of workers."""
+import copy
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+from sheetwork.core.adapters.base.connection import BaseConnection
+from sheetwork.core.adapters.factory import AdapterContainer
+from sheetwork.core.clients.google import GoogleSpreadsheet
+from sheetwork.core.config.config import ConfigLoader
+from sheetwork.core.config.profile import Profile
+from sheetwork.core.exceptions import BatchUploadError, SheetWorkConfigError
+from sheetwork.core.flags import FlagParser
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.sheetwork import SheetBag
+from sheetwork.core.ui.printer import green, red, timed_message, yellow
+
+
+class SheetRunResult(NamedTuple):
+    """Outcome of the upload of a single sheet during a batch run."""
+
+    sheet_name: str
+    succeeded: bool
+    duration: float
+    error: str = str()
+
+
+class BatchUploadTask:
+    """Uploads all the sheets declared in sheets.yml from a single process.
+
+    Project, profile and sheets.yml are parsed once and the database engine is shared by all the
+    sheets. Sheets read from the same workbook are downloaded together in a single request and
+    uploaded by the same worker. Each sheet goes through its own SheetBag on a bounded thread pool.
+    """
+
+    def __init__(self, config: ConfigLoader, flags: FlagParser, profile: Profile):
+        """Constructs BatchUploadTask.
+
+        Args:
+            config (ConfigLoader): config loader that has read (but not resolved) sheets.yml.
+            flags (FlagParser): class containing defaults or parsed CLI arguments.
+            profile (Profile): class containing info such as credentials db type etc.
+        """
+        self.config = config
+        self.flags = flags
+        self.profile = profile
+        self.max_workers = flags.max_workers
+        self.results: Dict[str, SheetRunResult] = dict()
+        # sheet bags prepared (and possibly loaded with their sheet) ahead of running them.
+        self.sheet_bags: Dict[str, SheetBag] = dict()
+        self.connection_adapter: Optional[BaseConnection] = None
+        self.assert_batch_compatible_flags()
+
+    def assert_batch_compatible_flags(self) -> None:
+        incompatible_flags = {
+            "--sheet-name": self.flags.sheet_name,
+            "--sheet-key": self.flags.sheet_key,
+            "--table": self.flags.target_table,
+            "--interactive": self.flags.interactive,
+            "--dry-run": self.flags.dry_run,
+        }
+        offending_flags = [flag for flag, value in incompatible_flags.items() if value]
+        if offending_flags:
+            raise SheetWorkConfigError(
+                f"{offending_flags} cannot be used together with --all. "
+                "Run those sheets individually instead."
+            )
+        if self.max_workers < 1:
+            raise SheetWorkConfigError(
+                f"--max-workers must be at least 1 but {self.max_workers} was given."
+            )
+
+    def init_connection(self) -> None:
+        adapters = AdapterContainer()
+        adapters.register_adapter(self.profile)
+        adapters.load_plugins()
+        credentials = adapters.credentials_adapter(self.profile)  # type: ignore
+        self.connection_adapter = adapters.connection_adapter(credentials)  # type: ignore
+
+    def make_sheet_bag(self, sheet_name: str) -> SheetBag:
+        # each sheet gets its own flags so that threads never see each other's sheet names.
+        sheet_flags = copy.copy(self.flags)
+        sheet_flags.sheet_name = sheet_name
+        sheet_config = self.config.for_sheet(sheet_flags)
+        return SheetBag(
+            sheet_config, sheet_flags, self.profile, connection_adapter=self.connection_adapter
+        )
+
+    def prefetch_workbook(self, sheet_key: str, sheet_names: List[str]) -> None:
+        """Downloads the worksheets of several sheets that share a workbook in one go.
+
+        The client authenticates, asks Drive for the revision of the workbook and opens it once
+        for all the sheets, their worksheets are then fetched with a single `values.batchGet`.
+        When anything goes wrong the sheets are left to download themselves when they run.
+
+        Args:
+            sheet_key (str): key of the workbook.
+            sheet_names (List[str]): sheets reading from this workbook.
+        """
+        try:
+            sheet_bags = [self.make_sheet_bag(sheet_name) for sheet_name in sheet_names]
+            google_sheet = GoogleSpreadsheet(self.profile, sheet_key)
+            google_sheet.authenticate()
+            sheet_bags_to_fetch = [
+                sheet_bag
+                for sheet_bag in sheet_bags
+                if self._needs_download(sheet_bag, google_sheet)
+            ]
+            if sheet_bags_to_fetch:
+                google_sheet.open_workbook()
+                worksheet_dfs = google_sheet.make_dfs_from_worksheets(
+                    [sheet_bag.worksheet for sheet_bag in sheet_bags_to_fetch],
+                    included_columns=self._get_included_columns(sheet_bags_to_fetch),
+                )
+                handed_out = set()
+                for sheet_bag in sheet_bags_to_fetch:
+                    worksheet_df = worksheet_dfs[sheet_bag.worksheet]
+                    # sheets reading the same worksheet each get their own frame to clean.
+                    if sheet_bag.worksheet in handed_out:
+                        worksheet_df = worksheet_df.copy()
+                    handed_out.add(sheet_bag.worksheet)
+                    sheet_bag.prefetched_df = worksheet_df
+        except Exception as e:
+            logger.warning(
+                yellow(f"Could not download {sheet_names} together, they will go one by one: {e}")
+            )
+            return
+        self.sheet_bags.update(zip(sheet_names, sheet_bags))
+
+    @staticmethod
+    def _needs_download(sheet_bag: SheetBag, google_sheet: GoogleSpreadsheet) -> bool:
+        # append_only sheets that only need their latest rows download those themselves.
+        if sheet_bag.check_if_up_to_date(google_sheet) or sheet_bag.watermark:
+            return False
+        return not sheet_bag.load_cached_frame(google_sheet)
+
+    @staticmethod
+    def _get_included_columns(sheet_bags: List[SheetBag]) -> Dict[str, List[str]]:
+        # sheets reading the same worksheet share its download so it needs all their columns, or
+        # all of them when one of the sheets keeps every column.
+        included_columns: Dict[str, List[str]] = dict()
+        full_worksheets = set()
+        for sheet_bag in sheet_bags:
+            if not sheet_bag.included_columns:
+                full_worksheets.add(sheet_bag.worksheet)
+            included_columns.setdefault(sheet_bag.worksheet, list()).extend(
+                sheet_bag.included_columns
+            )
+        return {
+            worksheet: list(dict.fromkeys(columns))
+            for worksheet, columns in included_columns.items()
+            if worksheet not in full_worksheets
+        }
+
+    def run_sheet(self, sheet_name: str) -> SheetRunResult:
+        start = time.perf_counter()
+        try:
+            sheet_bag = self.sheet_bags.pop(sheet_name, None) or self.make_sheet_bag(sheet_name)
+            sheet_bag.run()
+        except Exception as e:
+            logger.error(timed_message(red(f"Upload of {sheet_name} failed: {e}")))
+            return SheetRunResult(sheet_name, False, time.perf_counter() - start, str(e))
+        return SheetRunResult(sheet_name, True, time.perf_counter() - start)
+
+    def run_workbook(self, sheet_key: str, sheet_names: List[str]) -> List[SheetRunResult]:
+        """Downloads the sheets sharing a workbook together, then uploads them one after the other.
+
+        Each workbook is one unit of work so that its frames are only held until its own sheets
+        are uploaded rather than for as long as the whole batch runs.
+
+        Args:
+            sheet_key (str): key of the workbook.
+            sheet_names (List[str]): sheets reading from this workbook.
+
+        Returns:
+            List[SheetRunResult]: outcome of each of the sheets, in the order they were given.
+        """
+        self.prefetch_workbook(sheet_key, sheet_names)
+        return [self.run_sheet(sheet_name) for sheet_name in sheet_names]
+
+    def show_summary(self) -> None:
+        name_width = max([len(name) for name in self.results] + [len("sheet")])
+        lines: List[str] = [f"{'sheet'.ljust(name_width)}  status   duration"]
+        for result in self.results.values():
+            status = green("OK".ljust(7)) if result.succeeded else red("FAILED".ljust(7))
+            lines.append(f"{result.sheet_name.ljust(name_width)}  {status}  {result.duration:.1f}s")
+        logger.info("\n" + "\n".join(lines))
+
+    def run(self) -> None:
+        sheet_names = self.config.sheet_names
+        logger.info(
+            timed_message(f"Uploading {len(sheet_names)} sheets with {self.max_workers} workers.")
+        )
+        self.init_connection()
+        shared_workbooks = {
+            sheet_key: names
+            for sheet_key, names in self.config.sheet_names_by_workbook.items()
+            if len(names) > 1
+        }
+        shared_sheet_names = {name for names in shared_workbooks.values() for name in names}
+        single_sheet_names = [name for name in sheet_names if name not in shared_sheet_names]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            workbook_results = executor.map(
+                self.run_workbook, shared_workbooks.keys(), shared_workbooks.values()
+            )
+            single_sheet_results = executor.map(self.run_sheet, single_sheet_names)
+            results = {
+                result.sheet_name: result
+                for result in itertools.chain(
+                    itertools.chain.from_iterable(workbook_results), single_sheet_results
+                )
+            }
+        # reported in the order the sheets are declared whatever order they ran in.
+        for sheet_name in sheet_names:
+            self.results[sheet_name] = results[sheet_name]
+        self.show_summary()
+
+        failed_sheets = [name for name, result in self.results.items() if not result.succeeded]
+        if failed_sheets:
+            raise BatchUploadError(
+                f"{len(failed_sheets)} out of {len(self.results)} sheets failed: {failed_sheets}"
+            )
+        logger.info(timed_message(green(f"All {len(self.results)} sheets uploaded successfully.")))
@@ -0,0 +1,228 @@
+"""Schedule task. Uploads the sheets of sheets.yml that have a `schedule` whenever it fires.
+
+Each firing is delayed by a random jitter so that sheets sharing a schedule don't all hit the
+Google quotas in the same second. Sheets are uploaded by a bounded pool of workers, the ones with
+the highest `priority` first when more are due than there are free workers. A firing is skipped
+when the previous run of the sheet is still waiting for a worker or going.
+"""
+import copy
+import datetime
+import random
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from sheetwork.core.adapters.base.connection import BaseConnection, dispose_engines
+from sheetwork.core.adapters.factory import AdapterContainer
+from sheetwork.core.clients.google import GoogleClientPool
+from sheetwork.core.config.config import ConfigLoader
+from sheetwork.core.config.profile import Profile
+from sheetwork.core.cron import CronExpression
+from sheetwork.core.exceptions import SheetConfigParsingError, SheetWorkConfigError
+from sheetwork.core.flags import FlagParser
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.sheetwork import SheetBag
+from sheetwork.core.spans import GLOBAL_SPAN_RECORDER as spans
+from sheetwork.core.task.batch import SheetRunResult
+from sheetwork.core.ui.printer import green, red, timed_message, yellow
+
+# longest the scheduler sleeps before checking what is due again.
+TICK_SECONDS = 1.0
+
+
+class ScheduledSheet(NamedTuple):
+    """Sheet of sheets.yml with a schedule."""
+
+    sheet_name: str
+    schedule: CronExpression
+    # the higher the sooner it runs when several sheets wait for a worker.
+    priority: int = 0
+
+
+class PendingRun(NamedTuple):
+    """Run of a sheet whose schedule fired, waiting for its jitter to pass and for a worker."""
+
+    sheet_name: str
+    priority: int
+    fired_at: datetime.datetime
+    start_at: datetime.datetime
+
+
+class ScheduleTask:
+    """Uploads sheets on their schedule from a long running process."""
+
+    def __init__(self, config: ConfigLoader, flags: FlagParser, profile: Profile):
+        """Constructs ScheduleTask.
+
+        Args:
+            config (ConfigLoader): config loader that has read (but not resolved) sheets.yml.
+            flags (FlagParser): class containing defaults or parsed CLI arguments.
+            profile (Profile): class containing info such as credentials db type etc.
+        """
+        self.config = config
+        self.flags = flags
+        self.profile = profile
+        self.max_workers = flags.max_workers
+        self.jitter: float = flags.jitter
+        self.scheduled_sheets = self._get_scheduled_sheets()
+        self.next_firings: Dict[str, datetime.datetime] = dict()
+        self.pending_runs: List[PendingRun] = list()
+        self.in_flight: Set[str] = set()
+        # last run of each sheet.
+        self.results: Dict[str, SheetRunResult] = dict()
+        self.num_skipped: int = 0
+        self.connection_adapter: Optional[BaseConnection] = None
+        self.google_client_pool = GoogleClientPool()
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # set to check what is due straight away, e.g. once a worker is free again.
+        self._wake_up = threading.Event()
+        self._stopped = threading.Event()
+        if self.max_workers < 1:
+            raise SheetWorkConfigError(
+                f"--max-workers must be at least 1 but {self.max_workers} was given."
+            )
+        if self.jitter < 0:
+            raise SheetWorkConfigError(f"--jitter cannot be negative but {self.jitter} was given.")
+
+    def _get_scheduled_sheets(self) -> List[ScheduledSheet]:
+        scheduled_sheets: List[ScheduledSheet] = list()
+        for sheet in self.config.config.get("sheets", list()):
+            if not sheet.get("schedule"):
+                continue
+            sheet_name = str(sheet.get("sheet_name"))
+            try:
+                schedule = CronExpression(str(sheet["schedule"]))
+                schedule.next_after(datetime.datetime.now())
+            except ValueError as e:
+                raise SheetConfigParsingError(
+                    f"The schedule of {sheet_name} is not a valid cron expression: {e}."
+                )
+            scheduled_sheets.append(
+                ScheduledSheet(sheet_name, schedule, int(sheet.get("priority", 0)))
+            )
+        if not scheduled_sheets:
+            raise SheetWorkConfigError(
+                "None of the sheets of your sheets.yml has a 'schedule', there is nothing to run."
+            )
+        return scheduled_sheets
+
+    def init_connection(self) -> None:
+        adapters = AdapterContainer()
+        adapters.register_adapter(self.profile)
+        adapters.load_plugins()
+        credentials = adapters.credentials_adapter(self.profile)  # type: ignore
+        self.connection_adapter = adapters.connection_adapter(credentials)  # type: ignore
+
+    def start(self, now: Optional[datetime.datetime] = None) -> None:
+        """Sets up the connection and the workers and plans the first run of each sheet."""
+        now = now or datetime.datetime.now()
+        self.init_connection()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="sheetwork-worker"
+        )
+        for sheet in self.scheduled_sheets:
+            self.next_firings[sheet.sheet_name] = sheet.schedule.next_after(now)
+
+    def shutdown(self) -> None:
+        """Drops the runs that have not started and waits for the others to finish."""
+        self._stopped.set()
+        self._wake_up.set()
+        self.pending_runs = list()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        # the pooled connections would otherwise stay open until the process exits.
+        dispose_engines()
+
+    def tick(self, now: datetime.datetime) -> None:
+        self.queue_due_runs(now)
+        self.start_ready_runs(now)
+
+    def queue_due_runs(self, now: datetime.datetime) -> None:
+        for sheet in self.scheduled_sheets:
+            fired_at = self.next_firings[sheet.sheet_name]
+            if fired_at > now:
+                continue
+            # firings missed while the process was busy (or asleep) are made up for only once.
+            self.next_firings[sheet.sheet_name] = sheet.schedule.next_after(now)
+            with self._lock:
+                is_still_going = sheet.sheet_name in self.in_flight
+            is_still_going |= any(run.sheet_name == sheet.sheet_name for run in self.pending_runs)
+            if is_still_going:
+                self.num_skipped += 1
+                logger.warning(
+                    timed_message(
+                        yellow(
+                            f"Skipping the {fired_at:%Y-%m-%d %H:%M} run of {sheet.sheet_name}, "
+                            "its previous run has not finished yet."
+                        )
+                    )
+                )
+                continue
+            start_at = now + datetime.timedelta(seconds=random.uniform(0, self.jitter))
+            self.pending_runs.append(
+                PendingRun(sheet.sheet_name, sheet.priority, fired_at, start_at)
+            )
+
+    def start_ready_runs(self, now: datetime.datetime) -> None:
+        ready_runs = sorted(
+            [run for run in self.pending_runs if run.start_at <= now],
+            key=lambda run: (-run.priority, run.start_at),
+        )
+        for run in ready_runs:
+            with self._lock:
+                if len(self.in_flight) >= self.max_workers:
+                    return
+                self.in_flight.add(run.sheet_name)
+            self.pending_runs.remove(run)
+            self.executor.submit(self.run_sheet, run.sheet_name)  # type: ignore
+
+    def run_sheet(self, sheet_name: str) -> SheetRunResult:
+        start = time.perf_counter()
+        try:
+            sheet_flags = copy.copy(self.flags)
+            sheet_flags.sheet_name = sheet_name
+            SheetBag(
+                self.config.for_sheet(sheet_flags),
+                sheet_flags,
+                self.profile,
+                connection_adapter=self.connection_adapter,
+                google_client_pool=self.google_client_pool,
+            ).run()
+        except Exception as e:
+            logger.error(timed_message(red(f"Scheduled upload of {sheet_name} failed: {e}")))
+            result = SheetRunResult(sheet_name, False, time.perf_counter() - start, str(e))
+        else:
+            result = SheetRunResult(sheet_name, True, time.perf_counter() - start)
+        with self._lock:
+            self.results[sheet_name] = result
+            self.in_flight.discard(sheet_name)
+            # stage timings would otherwise pile up for as long as the scheduler runs.
+            if not self.in_flight:
+                spans.reset()
+        self._wake_up.set()
+        return result
+
+    def run(self) -> None:
+        self.start()
+        logger.info(
+            timed_message(
+                green(
+                    f"Scheduling {len(self.scheduled_sheets)} sheets with {self.max_workers} "
+                    "workers. Press Ctrl+C to stop."
+                )
+            )
+        )
+        signal.signal(signal.SIGTERM, lambda signum, frame: self._stopped.set())
+        try:
+            while not self._stopped.is_set():
+                self.tick(datetime.datetime.now())
+                self._wake_up.wait(timeout=TICK_SECONDS)
+                self._wake_up.clear()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            logger.info(timed_message("Shutting down, waiting for the running uploads to finish."))
+            self.shutdown()
@@ -0,0 +1,339 @@
+"""Serve task. Keeps a sheetwork process up and uploads sheets when asked to over a local HTTP API.
+
+Routes:
+    GET  /health         the process is up.
+    GET  /ready          the database connection is set up and runs can be triggered.
+    POST /runs           queues the upload of a sheet, `{"sheet_name": ...}`, or of every sheet
+                         with a tag, `{"tag": ...}`. Add `"force": true` to upload unchanged sheets.
+    GET  /runs           status of the latest runs.
+    GET  /runs/<run_id>  status of one run.
+
+Project and profile are parsed once, the database engine (and its pool of connections) and the
+authenticated Google clients of each worker are kept between runs so that a run only costs the
+download and upload of its sheet. sheets.yml is read again (from its cache, see `cache.py`) on
+each trigger so that it can be edited without restarting the server.
+"""
+import copy
+import json
+import signal
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from colorama import Fore
+
+from sheetwork.core.adapters.base.connection import BaseConnection, dispose_engines
+from sheetwork.core.adapters.factory import AdapterContainer
+from sheetwork.core.clients.google import GoogleClientPool
+from sheetwork.core.config.config import ConfigLoader
+from sheetwork.core.config.profile import Profile
+from sheetwork.core.exceptions import SheetWorkConfigError, SheetWorkConfigMissingError
+from sheetwork.core.flags import FlagParser
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.sheetwork import SheetBag
+from sheetwork.core.spans import GLOBAL_SPAN_RECORDER as spans
+from sheetwork.core.ui.printer import green, red, timed_message
+
+# finished runs kept around for their status to be asked for, the oldest are forgotten first.
+MAX_RUN_HISTORY = 1000
+
+
+class RunStatus(NamedTuple):
+    """Where the upload of a sheet triggered through the API is at."""
+
+    run_id: str
+    sheet_name: str
+    force: bool
+    # "queued", "running", "succeeded", "unchanged" (nothing to upload) or "failed".
+    status: str = "queued"
+    queued_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: str = str()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in {"succeeded", "unchanged", "failed"}
+
+
+def _error_message(error: Exception) -> str:
+    # sheetwork errors are coloured for the terminal, not for API clients.
+    return str(error).replace(Fore.RED, str())
+
+
+class ServeTask:
+    """Uploads sheets on demand from a long running process."""
+
+    def __init__(self, config: ConfigLoader, flags: FlagParser, profile: Profile):
+        """Constructs ServeTask.
+
+        Args:
+            config (ConfigLoader): config loader that has read (but not resolved) sheets.yml.
+            flags (FlagParser): class containing defaults or parsed CLI arguments.
+            profile (Profile): class containing info such as credentials db type etc.
+        """
+        self.config = config
+        self.flags = flags
+        self.profile = profile
+        self.host: str = flags.host
+        self.port: int = flags.port
+        self.max_workers = flags.max_workers
+        self.connection_adapter: Optional[BaseConnection] = None
+        self.google_client_pool = GoogleClientPool()
+        self.runs: "OrderedDict[str, RunStatus]" = OrderedDict()
+        # runs not picked up by a worker yet, a new trigger of the same sheet joins them.
+        self._queued_run_ids: Dict[Tuple[str, bool], str] = dict()
+        # a sheet is never uploaded by two workers at once.
+        self._sheet_locks: Dict[str, threading.Lock] = dict()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.server: Optional[_ServeHTTPServer] = None
+        if self.max_workers < 1:
+            raise SheetWorkConfigError(
+                f"--max-workers must be at least 1 but {self.max_workers} was given."
+            )
+
+    @property
+    def is_ready(self) -> bool:
+        return self.connection_adapter is not None and self.executor is not None
+
+    def init_connection(self) -> None:
+        adapters = AdapterContainer()
+        adapters.register_adapter(self.profile)
+        adapters.load_plugins()
+        credentials = adapters.credentials_adapter(self.profile)  # type: ignore
+        self.connection_adapter = adapters.connection_adapter(credentials)  # type: ignore
+
+    def start(self) -> None:
+        """Binds the HTTP server and starts serving, and uploading, from background threads."""
+        self.server = _ServeHTTPServer((self.host, self.port), _ServeRequestHandler, self)
+        # port 0 lets the OS pick a free one.
+        self.port = self.server.server_address[1]
+        # health checks are answered while the connection is being set up, readiness ones after.
+        threading.Thread(
+            target=self.server.serve_forever, name="sheetwork-serve", daemon=True
+        ).start()
+        try:
+            self.init_connection()
+        except Exception:
+            self.shutdown()
+            raise
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="sheetwork-worker"
+        )
+
+    def shutdown(self) -> None:
+        """Stops accepting requests and waits for the runs already queued to finish."""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        # the pooled connections would otherwise stay open until the process exits.
+        dispose_engines()
+        self._stopped.set()
+
+    def run(self) -> None:
+        self.start()
+        logger.info(
+            timed_message(
+                green(
+                    f"Serving sheetwork on http://{self.host}:{self.port} with "
+                    f"{self.max_workers} workers. Press Ctrl+C to stop."
+                )
+            )
+        )
+        signal.signal(signal.SIGTERM, lambda signum, frame: self._stopped.set())
+        try:
+            while not self._stopped.wait(timeout=1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            logger.info(timed_message("Shutting down, waiting for the queued runs to finish."))
+            self.shutdown()
+
+    def read_sheets_config(self) -> ConfigLoader:
+        flags = copy.copy(self.flags)
+        flags.sheet_name = str()
+        flags.run_all = True
+        return ConfigLoader(flags, self.config.project)
+
+    def trigger(
+        self, sheet_name: str = str(), tag: str = str(), force: bool = False
+    ) -> List[RunStatus]:
+        """Queues the upload of a sheet, or of all the sheets with a tag.
+
+        Args:
+            sheet_name (str, optional): name of the sheet in sheets.yml. Defaults to str().
+            tag (str, optional): tag of the sheets in sheets.yml. Defaults to str().
+            force (bool, optional): uploads the sheets even when they have not changed.
+                Defaults to False.
+
+        Raises:
+            SheetWorkConfigMissingError: when no sheet goes by that name or tag.
+
+        Returns:
+            List[RunStatus]: the run of each sheet, which may have been queued by an earlier trigger.
+        """
+        config = self.read_sheets_config()
+        if sheet_name:
+            if sheet_name not in config.sheet_names:
+                raise SheetWorkConfigMissingError(f"No sheet named {sheet_name} in sheets.yml.")
+            sheet_names = [sheet_name]
+        else:
+            sheet_names = config.sheet_names_by_tag.get(tag, list())
+            if not sheet_names:
+                raise SheetWorkConfigMissingError(f"No sheet tagged {tag} in sheets.yml.")
+        return [self._queue_run(config, name, force) for name in sheet_names]
+
+    def _queue_run(self, config: ConfigLoader, sheet_name: str, force: bool) -> RunStatus:
+        with self._lock:
+            queued_run_id = self._queued_run_ids.get((sheet_name, force))
+            if queued_run_id:
+                return self.runs[queued_run_id]
+            run = RunStatus(uuid.uuid4().hex, sheet_name, force, queued_at=time.time())
+            self.runs[run.run_id] = run
+            self._queued_run_ids[(sheet_name, force)] = run.run_id
+            self._sheet_locks.setdefault(sheet_name, threading.Lock())
+            self._forget_old_runs()
+        self.executor.submit(self.run_sheet, config, run.run_id)  # type: ignore
+        return run
+
+    def _forget_old_runs(self) -> None:
+        finished_run_ids = [run_id for run_id, run in self.runs.items() if run.is_finished]
+        num_runs_to_forget = max(0, len(self.runs) - MAX_RUN_HISTORY)
+        for run_id in finished_run_ids[:num_runs_to_forget]:
+            del self.runs[run_id]
+
+    def _update_run(self, run_id: str, **changes: Any) -> RunStatus:
+        with self._lock:
+            run = self.runs[run_id] = self.runs[run_id]._replace(**changes)
+            return run
+
+    def get_runs(self) -> List[RunStatus]:
+        with self._lock:
+            return list(self.runs.values())
+
+    def get_run(self, run_id: str) -> Optional[RunStatus]:
+        with self._lock:
+            return self.runs.get(run_id)
+
+    def run_sheet(self, config: ConfigLoader, run_id: str) -> RunStatus:
+        with self._lock:
+            run = self.runs[run_id]
+            # triggers coming in from now on need a run of their own.
+            self._queued_run_ids.pop((run.sheet_name, run.force), None)
+        with self._sheet_locks[run.sheet_name]:
+            self._update_run(run_id, status="running", started_at=time.time())
+            try:
+                sheet_flags = copy.copy(self.flags)
+                sheet_flags.sheet_name = run.sheet_name
+                sheet_flags.force = run.force
+                sheet_bag = SheetBag(
+                    config.for_sheet(sheet_flags),
+                    sheet_flags,
+                    self.profile,
+                    connection_adapter=self.connection_adapter,
+                    google_client_pool=self.google_client_pool,
+                )
+                sheet_bag.run()
+            except Exception as e:
+                logger.error(timed_message(red(f"Upload of {run.sheet_name} failed: {e}")))
+                run = self._update_run(
+                    run_id, status="failed", finished_at=time.time(), error=_error_message(e)
+                )
+            else:
+                status = "unchanged" if sheet_bag.is_up_to_date else "succeeded"
+                run = self._update_run(run_id, status=status, finished_at=time.time())
+        self._reset_spans_when_idle()
+        return run
+
+    def _reset_spans_when_idle(self) -> None:
+        # stage timings would otherwise pile up for as long as the server runs.
+        with self._lock:
+            if all(run.is_finished for run in self.runs.values()):
+                spans.reset()
+
+
+class _ServeHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address: Tuple[str, int], handler: Any, task: ServeTask):
+        self.task = task
+        super().__init__(server_address, handler)
+
+
+class _ServeRequestHandler(BaseHTTPRequestHandler):
+    server: _ServeHTTPServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"serve: {self.address_string()} {format % args}")
+
+    def _send_json(self, status_code: int, body: Dict[str, Any]) -> None:
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self) -> None:
+        task = self.server.task
+        path = self.path.rstrip("/")
+        if path == "/health":
+            self._send_json(200, dict(status="ok"))
+        elif path == "/ready":
+            if task.is_ready:
+                self._send_json(200, dict(status="ready"))
+            else:
+                self._send_json(503, dict(status="starting"))
+        elif path == "/runs":
+            self._send_json(200, dict(runs=[run._asdict() for run in task.get_runs()]))
+        elif path.startswith("/runs/"):
+            run_id = path.rsplit("/", 1)[1]
+            run = task.get_run(run_id)
+            if run is None:
+                self._send_json(404, dict(error=f"No run with id {run_id}."))
+            else:
+                self._send_json(200, run._asdict())
+        else:
+            self._send_json(404, dict(error=f"No route for GET {self.path}."))
+
+    def do_POST(self) -> None:
+        task = self.server.task
+        if self.path.rstrip("/") != "/runs":
+            self._send_json(404, dict(error=f"No route for POST {self.path}."))
+            return
+        if not task.is_ready:
+            self._send_json(503, dict(error="sheetwork is still starting up."))
+            return
+        try:
+            content_length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(content_length) or b"{}")
+        except ValueError:
+            self._send_json(400, dict(error="The body must be a JSON object."))
+            return
+        if not isinstance(body, dict) or bool(body.get("sheet_name")) == bool(body.get("tag")):
+            self._send_json(400, dict(error="Give either a 'sheet_name' or a 'tag' to run."))
+            return
+        try:
+            runs = task.trigger(
+                sheet_name=str(body.get("sheet_name") or str()),
+                tag=str(body.get("tag") or str()),
+                force=bool(body.get("force", False)),
+            )
+        except SheetWorkConfigMissingError as e:
+            self._send_json(404, dict(error=_error_message(e)))
+            return
+        except Exception as e:
+            logger.error(red(f"Could not trigger {body}: {e}"))
+            self._send_json(500, dict(error=_error_message(e)))
+            return
+        self._send_json(202, dict(runs=[run._asdict() for run in runs]))
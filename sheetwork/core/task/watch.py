@@ -0,0 +1,260 @@
+"""Watch task. Uploads the sheets of sheets.yml shortly after their workbook is edited.
+
+Rather than asking Drive about each workbook on a timer, the task reads the Drive changes feed,
+which tells which files changed since a page token in a single request whatever the number of
+workbooks watched. Edits tend to come in bursts so a workbook is only uploaded once it has been
+left alone for `--debounce` seconds (or has kept changing for DEBOUNCE_CAP_FACTOR times as long).
+
+The page token, and the workbooks that changed but were not uploaded yet, are kept in the
+project's state directory so that a restarted watch picks up where the last one left off.
+"""
+import copy
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set
+
+import requests
+from gspread.exceptions import APIError
+
+from sheetwork.core.adapters.base.connection import BaseConnection, dispose_engines
+from sheetwork.core.adapters.factory import AdapterContainer
+from sheetwork.core.clients.google import GoogleClientPool, GoogleSpreadsheet
+from sheetwork.core.config.config import ConfigLoader
+from sheetwork.core.config.profile import Profile
+from sheetwork.core.exceptions import SheetWorkConfigError
+from sheetwork.core.flags import FlagParser
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.sheetwork import SheetBag
+from sheetwork.core.spans import GLOBAL_SPAN_RECORDER as spans
+from sheetwork.core.state import StateStore
+from sheetwork.core.task.batch import SheetRunResult
+from sheetwork.core.ui.printer import green, red, timed_message, yellow
+
+DRIVE_CHANGES_STATE_FILENAME = "drive_changes.json"
+# a workbook that never stops changing is still uploaded every debounce * DEBOUNCE_CAP_FACTOR.
+DEBOUNCE_CAP_FACTOR = 6
+# longest the watcher sleeps before checking what is due again.
+TICK_SECONDS = 1.0
+
+
+class PendingWorkbook(NamedTuple):
+    """Workbook that changed and has not been uploaded since."""
+
+    first_changed_at: float
+    last_changed_at: float
+
+
+class WatchTask:
+    """Uploads sheets when their workbook changes from a long running process."""
+
+    def __init__(self, config: ConfigLoader, flags: FlagParser, profile: Profile):
+        """Constructs WatchTask.
+
+        Args:
+            config (ConfigLoader): config loader that has read (but not resolved) sheets.yml.
+            flags (FlagParser): class containing defaults or parsed CLI arguments.
+            profile (Profile): class containing info such as credentials db type etc.
+        """
+        self.config = config
+        self.flags = flags
+        self.profile = profile
+        self.max_workers = flags.max_workers
+        self.poll_interval: float = flags.poll_interval
+        self.debounce: float = flags.debounce
+        self.sheet_names_by_workbook = config.sheet_names_by_workbook
+        self.changes_store = StateStore(
+            Path(config.project.state_dir, DRIVE_CHANGES_STATE_FILENAME)
+        )
+        # the feed is the one of the Google user the sheets are read as.
+        self._state_key = str(profile.profile_dict.get("guser"))
+        self.page_token: str = str()
+        self.pending_workbooks: Dict[str, PendingWorkbook] = dict()
+        self.in_flight: Set[str] = set()
+        # last run of each sheet.
+        self.results: Dict[str, SheetRunResult] = dict()
+        self.next_poll_at: float = 0.0
+        self.connection_adapter: Optional[BaseConnection] = None
+        self.google_client_pool = GoogleClientPool()
+        self.drive: Optional[GoogleSpreadsheet] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._saved_state: Dict[str, object] = dict()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        if not self.sheet_names_by_workbook:
+            raise SheetWorkConfigError(
+                "None of the sheets of your sheets.yml is read from Google Sheets, there is "
+                "nothing to watch."
+            )
+        if self.max_workers < 1:
+            raise SheetWorkConfigError(
+                f"--max-workers must be at least 1 but {self.max_workers} was given."
+            )
+
+    def init_connection(self) -> None:
+        adapters = AdapterContainer()
+        adapters.register_adapter(self.profile)
+        adapters.load_plugins()
+        credentials = adapters.credentials_adapter(self.profile)  # type: ignore
+        self.connection_adapter = adapters.connection_adapter(credentials)  # type: ignore
+
+    def start(self, now: Optional[float] = None) -> None:
+        """Sets up the connections and the workers and finds where the changes feed was left."""
+        now = time.monotonic() if now is None else now
+        self.init_connection()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="sheetwork-worker"
+        )
+        self.drive = GoogleSpreadsheet(self.profile, client_pool=self.google_client_pool)
+        self.drive.authenticate()
+        state = self.changes_store.get(self._state_key, dict())
+        self.page_token = str(state.get("page_token", str()))
+        for sheet_key in state.get("pending_sheet_keys", list()):
+            if sheet_key in self.sheet_names_by_workbook:
+                self._mark_changed(sheet_key, now)
+        if not self.page_token:
+            self._restart_feed(now)
+        self._save_state()
+
+    def _restart_feed(self, now: float) -> None:
+        # what changed before the feed (re)starts is unknown so every workbook is checked once,
+        # the ones that did not change are skipped through their revision.
+        self.page_token = self.drive.get_start_page_token()  # type: ignore
+        for sheet_key in self.sheet_names_by_workbook:
+            self._mark_changed(sheet_key, now)
+
+    def shutdown(self) -> None:
+        """Waits for the running uploads to finish, the pending ones are kept for the next watch."""
+        self._stopped.set()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        # the pooled connections would otherwise stay open until the process exits.
+        dispose_engines()
+        self._save_state()
+
+    def _mark_changed(self, sheet_key: str, now: float) -> None:
+        pending_workbook = self.pending_workbooks.get(sheet_key)
+        first_changed_at = pending_workbook.first_changed_at if pending_workbook else now
+        self.pending_workbooks[sheet_key] = PendingWorkbook(first_changed_at, now)
+
+    def _save_state(self) -> None:
+        with self._lock:
+            in_flight_sheet_keys = {
+                sheet_key
+                for sheet_key, sheet_names in self.sheet_names_by_workbook.items()
+                if self.in_flight.intersection(sheet_names)
+            }
+        # uploads that did not finish are done again by the next watch.
+        state: Dict[str, object] = dict(
+            page_token=self.page_token,
+            pending_sheet_keys=sorted(in_flight_sheet_keys.union(self.pending_workbooks)),
+        )
+        if state != self._saved_state:
+            self.changes_store.set(self._state_key, state)
+            self._saved_state = state
+
+    def tick(self, now: float) -> None:
+        if now >= self.next_poll_at:
+            self.poll_changes(now)
+            self.next_poll_at = now + self.poll_interval
+        self.start_settled_uploads(now)
+        self._save_state()
+
+    def poll_changes(self, now: float) -> None:
+        try:
+            self._read_changes(now)
+        except (APIError, requests.RequestException) as e:
+            # the page token is left as it was so the changes are read again on the next poll.
+            logger.warning(
+                yellow(
+                    f"Could not read the Drive changes feed ({e}), trying again in "
+                    f"{self.poll_interval:.0f}s."
+                )
+            )
+
+    def _read_changes(self, now: float) -> None:
+        try:
+            changed_files, self.page_token = self.drive.list_changed_files(  # type: ignore
+                self.page_token
+            )
+        except APIError as e:
+            if e.response.status_code not in {400, 404}:
+                raise
+            logger.warning(
+                yellow(f"Drive refused the page token of the changes feed ({e}), restarting it.")
+            )
+            self._restart_feed(now)
+            return
+        changed_sheet_keys = changed_files.intersection(self.sheet_names_by_workbook)
+        if changed_sheet_keys:
+            logger.debug(f"Changed workbooks: {sorted(changed_sheet_keys)}")
+        for sheet_key in changed_sheet_keys:
+            self._mark_changed(sheet_key, now)
+
+    def _is_settled(self, pending_workbook: PendingWorkbook, now: float) -> bool:
+        is_left_alone = now - pending_workbook.last_changed_at >= self.debounce
+        is_overdue = now - pending_workbook.first_changed_at >= self.debounce * DEBOUNCE_CAP_FACTOR
+        return is_left_alone or is_overdue
+
+    def start_settled_uploads(self, now: float) -> None:
+        for sheet_key, pending_workbook in list(self.pending_workbooks.items()):
+            if not self._is_settled(pending_workbook, now):
+                continue
+            sheet_names: List[str] = self.sheet_names_by_workbook[sheet_key]
+            with self._lock:
+                # the change is uploaded once the upload of the previous one is over.
+                if self.in_flight.intersection(sheet_names):
+                    continue
+                self.in_flight.update(sheet_names)
+            del self.pending_workbooks[sheet_key]
+            logger.info(timed_message(f"{sheet_key} changed, uploading {sheet_names}."))
+            for sheet_name in sheet_names:
+                self.executor.submit(self.run_sheet, sheet_name)  # type: ignore
+
+    def run_sheet(self, sheet_name: str) -> SheetRunResult:
+        start = time.perf_counter()
+        try:
+            sheet_flags = copy.copy(self.flags)
+            sheet_flags.sheet_name = sheet_name
+            SheetBag(
+                self.config.for_sheet(sheet_flags),
+                sheet_flags,
+                self.profile,
+                connection_adapter=self.connection_adapter,
+                google_client_pool=self.google_client_pool,
+            ).run()
+        except Exception as e:
+            logger.error(timed_message(red(f"Upload of {sheet_name} failed: {e}")))
+            result = SheetRunResult(sheet_name, False, time.perf_counter() - start, str(e))
+        else:
+            result = SheetRunResult(sheet_name, True, time.perf_counter() - start)
+        with self._lock:
+            self.results[sheet_name] = result
+            self.in_flight.discard(sheet_name)
+            # stage timings would otherwise pile up for as long as the watch runs.
+            if not self.in_flight:
+                spans.reset()
+        return result
+
+    def run(self) -> None:
+        self.start()
+        logger.info(
+            timed_message(
+                green(
+                    f"Watching {len(self.sheet_names_by_workbook)} workbooks for changes every "
+                    f"{self.poll_interval:.0f}s. Press Ctrl+C to stop."
+                )
+            )
+        )
+        signal.signal(signal.SIGTERM, lambda signum, frame: self._stopped.set())
+        try:
+            while not self._stopped.is_set():
+                self.tick(time.monotonic())
+                self._stopped.wait(timeout=TICK_SECONDS)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            logger.info(timed_message("Shutting down, waiting for the running uploads to finish."))
+            self.shutdown()
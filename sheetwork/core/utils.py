@@ -2,15 +2,11 @@
 import collections
 import warnings
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
-from urllib.error import URLError
+from typing import Dict, List, Tuple, Union
 
-import luddite
 import numpy as np
 import pandas
-from packaging.version import parse as semver_parse
 
-from sheetwork.core._version import __version__
 from sheetwork.core.exceptions import (
     ColumnNotBooleanCompatibleError,
     ColumnNotFoundInDataFrame,
@@ -142,44 +138,16 @@ def check_dupe_cols(columns: List[str]):
         )
 
 
-def check_and_compare_version(external_version: Optional[str] = str()) -> Tuple[bool, str]:
-    """Checks what the currently installed version of sheetwork is and compares it to the one on PyPI.
-
-    This requires an internet connection. In the case where this doesn't happen a URLError will
-    probably be thrown and in that case we just return False not to cause annoying user experience.
-
-    Args:
-        external_version (Optional[str], optional): Mainly for testing purposes. Defaults to str().
-
-    Returns:
-        bool: True when sheetwork needs an update. False when good.
-    """
-    try:
-        pypi_version: str = luddite.get_version_pypi("sheetwork")
-        if external_version:
-            installed_version = external_version
-        else:
-            installed_version = __version__
-
-        needs_update = semver_parse(pypi_version) > semver_parse(installed_version)
-        if needs_update:
-            logger.warning(
-                yellow(
-                    f"Looks like you're a bit behind. A newer version of Sheetwork v{pypi_version} is available."
-                )
-            )
-        return needs_update, pypi_version
-
-    except URLError:
-        return False, str()
-
-
-def cast_pandas_dtypes(df: pandas.DataFrame, overwrite_dict: dict = dict()) -> pandas.DataFrame:
+def cast_pandas_dtypes(
+    df: pandas.DataFrame, overwrite_dict: dict = dict(), inplace: bool = False
+) -> pandas.DataFrame:
     """Converts a dataframe's columns along a provided dictionary of {col: dype}.
 
     Args:
         df (pandas.DataFrame): dataframe to cast.
         overwrite_dict (dict, optional): Dict of shate {column: dtype}. Defaults to dict().
+        inplace (bool, optional): When true only the cast columns are replaced in df instead of
+            returning a cast copy of the whole dataframe. Defaults to False.
 
     Raises:
         UnsupportedDataTypeError: When a dtype isn't currently supported (see dtypes_map inside function).
@@ -219,15 +187,21 @@ def cast_pandas_dtypes(df: pandas.DataFrame, overwrite_dict: dict = dict()) -> p
     logger.debug(f"DF BEFORE CASTING DTYPES: {df.dtypes}")
 
     # handle boolean "manually" because .astype(bool) leads to everythin being true if not null.
-    df = handle_booleans(df, overwrite_dict=overwrite_dict)
+    df = handle_booleans(df, overwrite_dict=overwrite_dict, inplace=inplace)
     # use pandas native function for all other data types as they are not problematic and we have
     # already handled booleans specificatlly.
-    df = df.astype(overwrite_dict)
+    if inplace:
+        for column, data_type in overwrite_dict.items():
+            df[column] = df[column].astype(data_type, copy=False)
+    else:
+        df = df.astype(overwrite_dict)
     logger.debug(f"Head of cast dataframe:\n {df.head()}")
     return df
 
 
-def handle_booleans(df: pandas.DataFrame, overwrite_dict: Dict[str, str]) -> pandas.DataFrame:
+def handle_booleans(
+    df: pandas.DataFrame, overwrite_dict: Dict[str, str], inplace: bool = False
+) -> pandas.DataFrame:
     """Handles boolean conversion from "false" or "true" strings.
 
     Takes a df and an overwrite dict of shape `{col: dtype}`, iterates through dict and if there are
@@ -238,12 +212,15 @@ def handle_booleans(df: pandas.DataFrame, overwrite_dict: Dict[str, str]) -> pan
     Args:
         df (pandas.DataFrame): data frame of a google sheet to be cast.
         overwrite_dict (Dict[str, str]): dict of shape `{column: dtype}`
+        inplace (bool, optional): When true df's columns are replaced directly instead of on a
+            copy of df. Defaults to False.
 
     Returns:
         pandas.DataFrame: pandas dataframe with potential columns with boolean types casted as
             Python booleans.
     """
-    df = df.copy()
+    if not inplace:
+        df = df.copy()
     boolean_map_dict = {
         "true": True,
         "false": False,
@@ -0,0 +1,114 @@
+"""Checks whether a newer sheetwork is out on PyPI without getting in the way of the CLI.
+
+The answer of PyPI is cached on disk for a day, PyPI is given a couple of seconds to answer and
+setting the `SHEETWORK_NO_VERSION_CHECK` environment variable skips the check entirely.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from packaging.version import parse as semver_parse
+
+from sheetwork.core._version import __version__
+from sheetwork.core.logger import GLOBAL_LOGGER as logger
+from sheetwork.core.state import StateStore
+from sheetwork.core.ui.printer import yellow
+
+SKIP_VERSION_CHECK_ENV_VAR = "SHEETWORK_NO_VERSION_CHECK"
+VERSION_CHECK_CACHE_PATH = Path("~/.sheetwork/version_check.json").expanduser()
+VERSION_CHECK_CACHE_KEY = "pypi"
+# seconds for which the answer of PyPI (or its absence) is trusted.
+VERSION_CHECK_TTL = 24 * 60 * 60
+VERSION_CHECK_FAILURE_TTL = 60 * 60
+# seconds PyPI gets to answer before we carry on without knowing.
+VERSION_CHECK_TIMEOUT = 2.0
+
+
+def fetch_pypi_version(timeout: float = VERSION_CHECK_TIMEOUT) -> str:
+    """Asks PyPI for the latest version of sheetwork, giving up after timeout seconds.
+
+    The call happens on a daemon thread since luddite does not let us set a timeout on it, that
+    way a hanging connection can neither block the CLI nor keep it from exiting.
+
+    Args:
+        timeout (float, optional): seconds to wait for PyPI. Defaults to VERSION_CHECK_TIMEOUT.
+
+    Returns:
+        str: latest version on PyPI, empty when it could not be obtained in time.
+    """
+    answer: Dict[str, str] = dict()
+
+    def ask_pypi() -> None:
+        import luddite
+
+        try:
+            answer["version"] = luddite.get_version_pypi("sheetwork")
+        except Exception as e:
+            # no internet, proxies, PyPI having a bad day... none of it should bother users.
+            logger.debug(f"Could not get the latest sheetwork version from PyPI: {e}")
+
+    pypi_thread = threading.Thread(target=ask_pypi, daemon=True)
+    pypi_thread.start()
+    pypi_thread.join(timeout)
+    return answer.get("version", str())
+
+
+def get_pypi_version(cache_path: Optional[Path] = None) -> str:
+    """Returns the latest version of sheetwork on PyPI, from the cache when it is fresh enough.
+
+    Args:
+        cache_path (Optional[Path], optional): JSON file caching the answer of PyPI.
+            Defaults to VERSION_CHECK_CACHE_PATH.
+
+    Returns:
+        str: latest version on PyPI, empty when it is not known.
+    """
+    cache = StateStore(cache_path or VERSION_CHECK_CACHE_PATH)
+    cached: Dict = cache.get(VERSION_CHECK_CACHE_KEY) or dict()
+    cached_version = cached.get("version", str())
+    ttl = VERSION_CHECK_TTL if cached_version else VERSION_CHECK_FAILURE_TTL
+    if cached and time.time() - cached.get("checked_at", 0) < ttl:
+        return cached_version
+
+    pypi_version = fetch_pypi_version(VERSION_CHECK_TIMEOUT)
+    try:
+        cache.set(VERSION_CHECK_CACHE_KEY, dict(version=pypi_version, checked_at=time.time()))
+    except OSError as e:
+        logger.debug(f"Could not cache the latest sheetwork version: {e}")
+    return pypi_version
+
+
+def check_and_compare_version(
+    external_version: Optional[str] = str(), cache_path: Optional[Path] = None
+) -> Tuple[bool, str]:
+    """Checks what the currently installed version of sheetwork is and compares it to the one on PyPI.
+
+    When PyPI cannot be reached (in time) or when the check is turned off via
+    `SHEETWORK_NO_VERSION_CHECK` we just return False not to cause annoying user experience.
+
+    Args:
+        external_version (Optional[str], optional): Mainly for testing purposes. Defaults to str().
+        cache_path (Optional[Path], optional): JSON file caching the answer of PyPI.
+            Defaults to VERSION_CHECK_CACHE_PATH.
+
+    Returns:
+        bool: True when sheetwork needs an update. False when good.
+    """
+    if os.environ.get(SKIP_VERSION_CHECK_ENV_VAR):
+        return False, str()
+
+    pypi_version = get_pypi_version(cache_path)
+    if not pypi_version:
+        return False, str()
+    installed_version = external_version or __version__
+
+    needs_update = semver_parse(pypi_version) > semver_parse(installed_version)
+    if needs_update:
+        logger.warning(
+            yellow(
+                f"Looks like you're a bit behind. A newer version of Sheetwork v{pypi_version} is available."
+            )
+        )
+    return needs_update, pypi_version
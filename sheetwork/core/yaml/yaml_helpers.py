@@ -1,21 +1,29 @@
 """Helpers for yml stuff."""
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Union
 
 import yaml
 from cerberus import Validator
 
 from sheetwork.core.exceptions import SheetConfigParsingError, YAMLFileEmptyError
 
+# libyaml's loader is several times faster than the pure python one, when pyyaml was built with it.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def parse_yaml(content: Union[str, bytes], path: "Path"):
+    """Parses the content of the yml file found at path, which must not be empty."""
+    yaml_file = yaml.load(content, Loader=SafeLoader)  # type: ignore
+    if yaml_file:
+        return yaml_file
+    raise YAMLFileEmptyError(f"Your yml file {path.resolve()} seems empty.")
+
 
 def open_yaml(path: "Path"):
     """Yeah it opens a yml file..."""
     if path.is_file():
-        with open(path, "r") as stream:
-            yaml_file = yaml.safe_load(stream)  # type: ignore
-            if yaml_file:
-                return yaml_file
-            raise YAMLFileEmptyError(f"Your yml file {path.resolve()} seems empty.")
+        with open(path, "rb") as stream:
+            return parse_yaml(stream.read(), path)
     raise FileNotFoundError(f"File {path.resolve()} was not found.")
 
 
@@ -7,11 +7,51 @@ config_schema = {
             "type": "dict",
             "schema": {
                 "sheet_name": {"required": True, "type": "string"},
-                "sheet_key": {"required": True, "type": "string"},
+                # sheets are read either from Google Sheets (sheet_key) or from a `source`.
+                "sheet_key": {"required": True, "type": "string", "excludes": "source"},
+                "source": {
+                    "required": True,
+                    "excludes": "sheet_key",
+                    "type": "dict",
+                    "schema": {
+                        "type": {
+                            "required": True,
+                            "type": "string",
+                            "allowed": ["csv", "excel", "parquet", "dataframe"],
+                        },
+                        "path": {
+                            "required": False,
+                            "type": "string",
+                            "excludes": "name",
+                        },
+                        "name": {"required": False, "type": "string", "excludes": "path"},
+                        "separator": {"required": False, "type": "string"},
+                    },
+                },
                 "worksheet": {"required": False, "type": "string"},
+                # lets `sheetwork serve` run several sheets with a single trigger.
+                "tags": {
+                    "anyof_type": ["list", "string"],
+                    "required": False,
+                    "schema": {"type": "string"},
+                },
+                # cron expression `sheetwork schedule` uploads the sheet on, see `cron.py`.
+                "schedule": {"required": False, "type": "string"},
+                "priority": {"required": False, "type": "integer"},
                 "target_schema": {"required": False, "type": "string"},
                 "target_table": {"required": True, "type": "string"},
                 "snake_case_camel": {"required": False, "type": "boolean"},
+                "append_only": {"required": False, "type": "boolean"},
+                "sync_mode": {
+                    "required": False,
+                    "type": "string",
+                    "allowed": ["full", "merge", "swap"],
+                },
+                "merge_keys": {
+                    "anyof_type": ["list", "string"],
+                    "required": False,
+                    "schema": {"type": "string"},
+                },
                 "columns": {
                     "type": "list",
                     "required": False,
@@ -76,18 +116,50 @@ profiles_schema = {
                         "schema": {
                             "db_type": {"required": True, "type": "string"},
                             "account": {"required": False, "type": "string"},
-                            "user": {"required": True, "type": "string"},
-                            "password": {"required": True, "type": "string"},
+                            # embedded databases (duckdb, sqlite) have no users.
+                            "user": {"required": False, "type": "string"},
+                            "password": {"required": False, "type": "string"},
                             "host": {"required": False, "type": "string"},
                             "port": {"required": False, "type": "string"},
                             "role": {"required": False, "type": "string"},
+                            # path of the database file for duckdb and sqlite.
                             "database": {"required": False, "type": "string"},
+                            "pool_size": {"required": False, "type": "integer", "min": 1},
                             "warehouse": {"required": False, "type": "string"},
                             "schema": {"required": False, "type": "string"},
                             # ! new and prefered from v1.1.0
                             "target_schema": {"required": False, "type": "string"},
                             "guser": {"required": True, "type": "string"},
                             "is_service_account": {"required": False, "type": "boolean"},
+                            # read quotas of the Google Cloud project of the credentials.
+                            "google_reads_per_minute_per_project": {
+                                "required": False,
+                                "type": "integer",
+                                "min": 1,
+                            },
+                            "google_reads_per_minute_per_user": {
+                                "required": False,
+                                "type": "integer",
+                                "min": 1,
+                            },
+                            "staging_format": {
+                                "required": False,
+                                "type": "string",
+                                "regex": "(?i)^(csv|csv_gzip|parquet)$",
+                            },
+                            "staging_compression_level": {
+                                "required": False,
+                                "type": "integer",
+                                "min": 1,
+                                "max": 9,
+                            },
+                            "staging_chunk_size": {"required": False, "type": "integer", "min": 1},
+                            "staging_put_parallel": {
+                                "required": False,
+                                "type": "integer",
+                                "min": 1,
+                                "max": 99,
+                            },
                         },
                     },
                 },
@@ -104,12 +176,14 @@ project_schema = {
     "always_create_schema": {"required": False, "type": "boolean"},
     "always_create_objects": {"required": False, "type": "boolean"},
     "destructive_create_table": {"required": False, "type": "boolean"},
+    "frame_cache_max_size_mb": {"required": False, "type": "number", "min": 0},
     "paths": {
         "type": "dict",
         "required": False,
         "schema": {
             "profile_dir": {"required": False, "type": "string"},
             "sheet_config_dir": {"required": False, "type": "string"},
+            "state_dir": {"required": False, "type": "string"},
         },
     },
 }
@@ -0,0 +1,160 @@
+from pathlib import Path
+
+import mock
+import pytest
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+
+
+def make_batch_task(datafiles, extra_cli_args=list()):
+    from sheetwork.core.config.config import ConfigLoader
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+    from sheetwork.core.task.batch import BatchUploadTask
+
+    flags = FlagParser(parser)
+    flags.consume_cli_arguments(
+        [
+            "upload",
+            "--all",
+            "--project-dir",
+            str(datafiles),
+            "--profile-dir",
+            str(datafiles),
+            "--sheet-config-dir",
+            str(datafiles),
+        ]
+        + extra_cli_args
+    )
+    project = Project(flags)
+    config = ConfigLoader(flags, project)
+    profile = Profile(project)
+    return BatchUploadTask(config, flags, profile)
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_run(datafiles):
+    from sheetwork.core.exceptions import BatchUploadError
+    from sheetwork.core.sheetwork import SheetBag
+
+    task = make_batch_task(datafiles, ["--max-workers", "3"])
+    expected_sheet_names = task.config.sheet_names
+    ran_sheets = list()
+
+    def mock_run(sheet_bag):
+        ran_sheets.append(sheet_bag.flags.sheet_name)
+        assert sheet_bag.connection_adapter is task.connection_adapter
+        if sheet_bag.flags.sheet_name == "no_cols":
+            raise ValueError("boom")
+
+    with mock.patch.object(SheetBag, "run", autospec=True, side_effect=mock_run):
+        with pytest.raises(BatchUploadError):
+            task.run()
+
+    assert task.flags.sheet_name is None
+    assert sorted(ran_sheets) == sorted(expected_sheet_names)
+    assert list(task.results.keys()) == expected_sheet_names
+    assert task.results["no_cols"].succeeded is False
+    assert task.results["no_cols"].error == "boom"
+    assert all(result.succeeded for name, result in task.results.items() if name != "no_cols")
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_run_uploads_each_workbook_once_prefetched(datafiles):
+    from sheetwork.core.sheetwork import SheetBag
+    from sheetwork.core.task.batch import BatchUploadTask
+
+    task = make_batch_task(datafiles, ["--max-workers", "1"])
+    shared_workbooks = {
+        sheet_key: sheet_names
+        for sheet_key, sheet_names in task.config.sheet_names_by_workbook.items()
+        if len(sheet_names) > 1
+    }
+    assert len(shared_workbooks) > 1
+    events = list()
+
+    def mock_prefetch_workbook(batch_task, sheet_key, sheet_names):
+        events.append(sheet_key)
+
+    def mock_run(sheet_bag):
+        events.append(sheet_bag.flags.sheet_name)
+
+    with mock.patch.object(
+        BatchUploadTask, "prefetch_workbook", autospec=True, side_effect=mock_prefetch_workbook
+    ), mock.patch.object(SheetBag, "run", autospec=True, side_effect=mock_run):
+        task.run()
+
+    # a workbook's frames are uploaded before the next workbook is downloaded.
+    expected_events = list()
+    for sheet_key, sheet_names in shared_workbooks.items():
+        expected_events += [sheet_key] + sheet_names
+    workbook_events_count = len(expected_events)
+    assert events[:workbook_events_count] == expected_events
+    assert sorted(events[workbook_events_count:]) == sorted(
+        set(task.config.sheet_names).difference(*shared_workbooks.values())
+    )
+    assert list(task.results.keys()) == task.config.sheet_names
+
+
+@pytest.mark.parametrize(
+    "extra_cli_args", [["--sheet-name", "no_cols"], ["--dry-run"], ["--max-workers", "0"]]
+)
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_assert_batch_compatible_flags(datafiles, extra_cli_args):
+    from sheetwork.core.exceptions import SheetWorkConfigError
+
+    with pytest.raises(SheetWorkConfigError):
+        make_batch_task(datafiles, extra_cli_args)
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_prefetch_workbook(datafiles):
+    import pandas
+
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+    from sheetwork.core.sheetwork import SheetBag
+
+    task = make_batch_task(datafiles)
+    sheet_names = task.config.sheet_names_by_workbook[
+        "16nYKVY5UEKspYGbcMb5DG2GrOla-8HrvNOPIutKfdV4"
+    ]
+    assert sheet_names == ["test_sheet_2", "test_sheet_3", "test_sheet_4"]
+    worksheet_dfs = {
+        "Sheet2": pandas.DataFrame({"a": ["1"]}),
+        "Sheet1": pandas.DataFrame({"b": ["2"]}),
+    }
+
+    with mock.patch.object(
+        GoogleSpreadsheet, "authenticate"
+    ) as mock_authenticate, mock.patch.object(
+        GoogleSpreadsheet, "open_workbook"
+    ) as mock_open_workbook, mock.patch.object(
+        GoogleSpreadsheet, "make_dfs_from_worksheets", return_value=worksheet_dfs
+    ) as mock_make_dfs, mock.patch.object(
+        SheetBag, "_is_sheet_unchanged", return_value=False
+    ):
+        task.prefetch_workbook("16nYKVY5UEKspYGbcMb5DG2GrOla-8HrvNOPIutKfdV4", sheet_names)
+
+    mock_authenticate.assert_called_once()
+    mock_open_workbook.assert_called_once()
+    # test_sheet_4 keeps every column of Sheet1 so it is downloaded in full for test_sheet_3 too.
+    mock_make_dfs.assert_called_once_with(["Sheet2", "Sheet1", "Sheet1"], included_columns=dict())
+    assert list(task.sheet_bags.keys()) == sheet_names
+    prefetched_dfs = [task.sheet_bags[name].prefetched_df for name in sheet_names]
+    assert prefetched_dfs[0] is worksheet_dfs["Sheet2"]
+    assert prefetched_dfs[1] is worksheet_dfs["Sheet1"]
+    # both sheets reading Sheet1 must be able to clean their frame without touching the other's.
+    assert prefetched_dfs[2] is not prefetched_dfs[1]
+    assert prefetched_dfs[2].equals(prefetched_dfs[1])
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_prefetch_workbook_falls_back_to_single_sheets(datafiles):
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+
+    task = make_batch_task(datafiles)
+    with mock.patch.object(GoogleSpreadsheet, "authenticate", side_effect=ValueError("boom")):
+        task.prefetch_workbook("sample", ["df_renamer", "df_dropper"])
+    assert task.sheet_bags == dict()
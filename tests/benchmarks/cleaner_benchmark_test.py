@@ -0,0 +1,45 @@
+import os
+import time
+
+import numpy as np
+import pandas
+
+BENCHMARK_ROWS = int(os.environ.get("SHEETWORK_BENCHMARK_ROWS", 1_000_000))
+BENCHMARK_COLUMNS = int(os.environ.get("SHEETWORK_BENCHMARK_COLUMNS", 50))
+
+
+def legacy_fields_cleanups(df: pandas.DataFrame) -> pandas.DataFrame:
+    # fields_cleanups as it was before it was vectorised, kept here as the benchmark reference.
+    df = df.replace("", np.nan)
+    for col in df.columns:
+        if df[col].dtype == "object":
+            df[col] = df[col].str.strip()
+    return df
+
+
+def make_sheet_like_df(rows: int, columns: int) -> pandas.DataFrame:
+    rng = np.random.default_rng(42)
+    cell_values = np.array(["  foo ", "bar", "", "   ", "baz qux  ", "x" * 20], dtype=object)
+    return pandas.DataFrame(
+        {f"col_{i}": cell_values[rng.integers(0, len(cell_values), rows)] for i in range(columns)}
+    )
+
+
+def time_it(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def test_fields_cleanups_benchmark():
+    from sheetwork.core.cleaner import SheetCleaner
+
+    df = make_sheet_like_df(BENCHMARK_ROWS, BENCHMARK_COLUMNS)
+    legacy_duration = time_it(legacy_fields_cleanups, df)
+    duration = time_it(SheetCleaner.fields_cleanups, df)
+    print(
+        f"\nfields_cleanups on {BENCHMARK_ROWS}x{BENCHMARK_COLUMNS}: "
+        f"legacy {legacy_duration:.2f}s, vectorised {duration:.2f}s "
+        f"({legacy_duration / duration:.1f}x)"
+    )
+    assert duration < legacy_duration
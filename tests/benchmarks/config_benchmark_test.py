@@ -0,0 +1,76 @@
+import time
+
+import pytest
+import yaml
+
+
+def make_sheets_yml(sheets: int) -> str:
+    sheet_configs = [
+        dict(
+            sheet_name=f"sheet_{i}",
+            sheet_key=f"key_{i}",
+            target_schema="sand",
+            target_table=f"table_{i}",
+            columns=[
+                dict(name="Col_A", datatype="int"),
+                dict(name="col_b", datatype="varchar"),
+                dict(name="renamed_col", identifier="long name", datatype="date"),
+            ],
+            excluded_columns=["to_exclude"],
+        )
+        for i in range(sheets)
+    ]
+    return yaml.safe_dump(dict(sheets=sheet_configs), sort_keys=False)
+
+
+def legacy_get_sheet_config(sheets_file, sheet_name):
+    # sheets.yml resolution as it was before the compiled config cache, the benchmark reference.
+    from sheetwork.core.yaml.yaml_helpers import validate_yaml
+    from sheetwork.core.yaml.yaml_schema import config_schema
+
+    with open(sheets_file, "r") as stream:
+        config = yaml.safe_load(stream)
+    validate_yaml(config, config_schema)
+    return [sheet for sheet in config["sheets"] if sheet.get("sheet_name") == sheet_name][0]
+
+
+def time_it(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+@pytest.mark.parametrize("sheets", [10, 1_000, 10_000])
+def test_config_resolution_benchmark(tmp_path, sheets):
+    from sheetwork.core.config.config import ConfigLoader
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+
+    tmp_path.joinpath("sheetwork_project.yml").write_text(
+        'name: "benchmark"\ntarget_schema: sand\n'
+    )
+    sheets_file = tmp_path.joinpath("sheets.yml")
+    sheets_file.write_text(make_sheets_yml(sheets))
+    # the last sheet is the worst case of a linear scan.
+    sheet_name = f"sheet_{sheets - 1}"
+    flags = FlagParser(
+        parser,
+        test_sheet_name=sheet_name,
+        project_dir=str(tmp_path),
+        sheet_config_dir=str(tmp_path),
+    )
+    project = Project(flags)
+
+    legacy_duration = time_it(legacy_get_sheet_config, sheets_file, sheet_name)
+    cold_duration = time_it(ConfigLoader, flags, project)
+    warm_duration = min(time_it(ConfigLoader, flags, project) for _ in range(3))
+    assert ConfigLoader(flags, project).sheet_columns == dict(
+        col_a="int", col_b="varchar", renamed_col="date"
+    )
+    print(
+        f"\nconfig resolution with {sheets} sheets: legacy {legacy_duration * 1000:.1f}ms, "
+        f"cold cache {cold_duration * 1000:.1f}ms, warm cache {warm_duration * 1000:.1f}ms "
+        f"({legacy_duration / warm_duration:.1f}x)"
+    )
+    assert warm_duration < legacy_duration
@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+# benchmarks are slow and hungry, they only run when explicitly asked for.
+RUN_BENCHMARKS = bool(os.environ.get("SHEETWORK_BENCHMARKS"))
+
+
+def pytest_collection_modifyitems(config, items):
+    if RUN_BENCHMARKS:
+        return
+    skip_benchmark = pytest.mark.skip(reason="set SHEETWORK_BENCHMARKS=1 to run benchmarks")
+    for item in items:
+        if "benchmarks" in item.nodeid:
+            item.add_marker(skip_benchmark)
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+# seconds `import sheetwork.core.main` may take before the CLI is considered slow to start.
+IMPORT_TIME_BUDGET = float(os.environ.get("SHEETWORK_IMPORT_TIME_BUDGET", 0.3))
+
+
+def measure_import_time(module: str) -> float:
+    # -X importtime reports the cumulated import time of each module on stderr, in microseconds.
+    import_times = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    ).stderr
+    for line in import_times.splitlines():
+        _, cumulative, imported_module = line.split("|")
+        if imported_module.strip() == module:
+            return int(cumulative) / 1e6
+    raise AssertionError(f"{module} was not imported")
+
+
+def test_main_import_time_benchmark():
+    # best of a few runs to smooth out a cold disk cache.
+    import_time = min(measure_import_time("sheetwork.core.main") for _ in range(5))
+    print(f"\nimport sheetwork.core.main: {import_time:.3f}s (budget {IMPORT_TIME_BUDGET}s)")
+    assert import_time < IMPORT_TIME_BUDGET
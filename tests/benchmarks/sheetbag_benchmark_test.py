@@ -0,0 +1,61 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+FIXTURE_DIR = Path(__file__).resolve().parent.parent
+
+# rows of the sheets uploaded end to end, from the fake Sheets API into the benchmark target.
+SHEET_ROWS = [
+    int(rows)
+    for rows in os.environ.get("SHEETWORK_BENCHMARK_SHEET_ROWS", "1000,100000,1000000").split(",")
+]
+SHEET_COLUMNS = int(os.environ.get("SHEETWORK_BENCHMARK_SHEET_COLUMNS", 10))
+# seconds each request to the fake Sheets API takes, to get closer to the real thing.
+API_LATENCY = float(os.environ.get("SHEETWORK_BENCHMARK_API_LATENCY", 0.0))
+# target of tests/profiles.yml the sheets are uploaded to. duckdb is the reference as it needs no
+# server, postgres_test or sqlite_test compare other backends.
+TARGET = os.environ.get("SHEETWORK_BENCHMARK_TARGET", "duckdb_test")
+
+
+@pytest.mark.parametrize("rows", SHEET_ROWS)
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_sheetbag_run_benchmark(datafiles, monkeypatch, rows):
+    from sheetwork.core.config.config import ConfigLoader
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+    from sheetwork.core.sheetwork import SheetBag
+    from tests.fake_google import FakeGoogleServer, FakeSpreadsheet
+
+    if TARGET == "duckdb_test":
+        pytest.importorskip("duckdb")
+    # embedded databases are created relative to where sheetwork runs.
+    monkeypatch.chdir(str(datafiles))
+    flags = FlagParser(parser, project_dir=str(datafiles), profile_dir=str(datafiles))
+    flags.sheet_key = "benchmark_sheet"
+    flags.target_schema = "sheetwork_benchmarks"
+    flags.target_table = f"sheet_{rows}_rows"
+    project = Project(flags)
+    config = ConfigLoader(flags, project)
+    profile = Profile(project, target_name=TARGET)
+
+    with FakeGoogleServer(latency=API_LATENCY) as server, server.patch_authentication():
+        server.add_spreadsheet(
+            "benchmark_sheet", FakeSpreadsheet.synthetic(rows=rows, columns=SHEET_COLUMNS)
+        )
+        sheet_bag = SheetBag(config, flags, profile)
+        start = time.perf_counter()
+        sheet_bag.run()
+        duration = time.perf_counter() - start
+
+    num_columns, num_rows = sheet_bag.sql_adapter.check_table(
+        flags.target_schema, flags.target_table, deep=True
+    )
+    print(
+        f"\nSheetBag.run on {rows}x{SHEET_COLUMNS}: {duration:.2f}s "
+        f"({rows / duration:,.0f} rows/s, {API_LATENCY}s API latency, {TARGET})"
+    )
+    assert (num_columns, num_rows) == (SHEET_COLUMNS, rows)
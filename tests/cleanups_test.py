@@ -9,7 +9,8 @@ from .mockers import CASING_DF, DIRTY_DF, SNAKE_CASED_COLS, generate_test_df
 TESTING_PATH = pathlib.Path(__file__).parent.absolute()
 
 
-def test_cleanup():
+@pytest.mark.parametrize("inplace", [False, True])
+def test_cleanup(inplace):
     from sheetwork.core.cleaner import SheetCleaner
 
     expected_df = {
@@ -23,8 +24,9 @@ def test_cleanup():
 
     dirty_df = generate_test_df(DIRTY_DF)
     expected_df = generate_test_df(expected_df)
-    clean_df = SheetCleaner(dirty_df).cleanup()
+    clean_df = SheetCleaner(dirty_df, inplace=inplace).cleanup()
     assert_frame_equal(clean_df, expected_df)
+    assert (clean_df is dirty_df) is inplace
 
 
 @pytest.mark.parametrize(
@@ -87,3 +89,35 @@ def test_snake_to_camel():
     recased_df = SheetCleaner(cased_df, True).cleanup()
 
     assert recased_df.columns.tolist() == SNAKE_CASED_COLS
+
+
+@pytest.mark.parametrize("use_pyarrow", [True, False])
+def test_fields_cleanups(monkeypatch, use_pyarrow):
+    import sheetwork.core.cleaner as cleaner
+    from sheetwork.core.cleaner import SheetCleaner
+
+    if use_pyarrow:
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(cleaner, "HAS_PYARROW", use_pyarrow)
+
+    dirty_df = generate_test_df(
+        {
+            "col_a": ["  a ", "", "   ", None],
+            "col_mixed": [" a ", 1, True, " "],
+            "col_int": [1, 2, 3, 4],
+        }
+    )
+    expected_df = generate_test_df(
+        {
+            "col_a": ["a", np.nan, np.nan, np.nan],
+            "col_mixed": ["a", 1, True, np.nan],
+            "col_int": [1, 2, 3, 4],
+        }
+    )
+    clean_df = SheetCleaner.fields_cleanups(dirty_df)
+
+    assert_frame_equal(clean_df, expected_df)
+    # nulls must be NaN (not None) as that is what handle_booleans knows how to map
+    assert clean_df["col_a"].map(lambda x: x is np.nan).tolist() == [False, True, True, True]
+    # the original frame is left untouched
+    assert dirty_df["col_a"].tolist() == ["  a ", "", "   ", None]
@@ -6,6 +6,7 @@ from sheetwork.core.exceptions import (
 )
 
 
+import mock
 import pytest
 
 from sheetwork.core.flags import FlagParser
@@ -111,3 +112,129 @@ def test__override_cli_args(datafiles):
     project = Project(flags)
     config = ConfigLoader(flags, project)
     assert config.target_schema == project.target_schema
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_for_sheet(datafiles):
+    import copy
+
+    from sheetwork.core.config.config import ConfigLoader
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.main import parser
+
+    flags = FlagParser(parser, project_dir=str(datafiles), sheet_config_dir=str(datafiles))
+    flags.run_all = True
+    project = Project(flags)
+    config = ConfigLoader(flags, project)
+    assert "df_dropper" in config.sheet_names
+    assert config.sheet_config.get("sheet_name") is None
+
+    sheet_flags = copy.copy(flags)
+    sheet_flags.sheet_name = "df_dropper"
+    with mock.patch("sheetwork.core.config.config.load_compiled_yaml") as mocked_load:
+        sheet_config = config.for_sheet(sheet_flags)
+        mocked_load.assert_not_called()
+    assert sheet_config.sheet_config == EXPECTED_CONFIG
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_generate_sync_config(datafiles):
+    from sheetwork.core.config.config import ConfigLoader
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.exceptions import SheetConfigParsingError
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+
+    flags = FlagParser(
+        parser,
+        test_sheet_name="df_renamer",
+        project_dir=str(datafiles),
+        sheet_config_dir=str(datafiles),
+        profile_dir=str(datafiles),
+    )
+    config = ConfigLoader(flags, Project(flags))
+    assert config.sync_mode == "full"
+    assert config.merge_keys == list()
+
+    config.sheet_config.update(sync_mode="merge", merge_keys="Col_A")
+    config._generate_sync_config()
+    assert config.merge_keys == ["col_a"]
+
+    config.sheet_config.update(merge_keys=list())
+    with pytest.raises(SheetConfigParsingError):
+        config._generate_sync_config()
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_compiled_config_cache(datafiles):
+    import json
+    import os
+
+    from sheetwork.core.config.cache import CACHE_DIRNAME, load_compiled_yaml
+    from sheetwork.core.config.config import (
+        compile_sheets_config,
+        dump_compiled_sheets_config,
+        load_compiled_sheets_config,
+    )
+    from sheetwork.core.yaml.yaml_schema import config_schema
+
+    def load_sheets_config():
+        return load_compiled_yaml(
+            sheets_file,
+            config_schema,
+            cache_dir,
+            compile_sheets_config,
+            dump_compiled_sheets_config,
+            load_compiled_sheets_config,
+        )
+
+    sheets_file = Path(str(datafiles), "sheets.yml")
+    cache_dir = Path(str(datafiles), CACHE_DIRNAME)
+    compiled_config = load_sheets_config()
+    assert compiled_config.sheets["df_dropper"].sheet_config == EXPECTED_CONFIG
+    assert compiled_config.sheets["df_dropper"].sheet_column_rename_dict == {
+        "long ass name": "renamed_col"
+    }
+    # stored as JSON, which unlike pickle never runs code when read.
+    cache_files = list(cache_dir.glob("sheets-*.json"))
+    assert len(cache_files) == 1
+    assert "sheets" in json.loads(cache_files[0].read_text())["compiled_config"]
+
+    # neither a cache hit nor a touched (but unchanged) file are parsed again.
+    os.utime(sheets_file, ns=(0, 0))
+    with mock.patch("sheetwork.core.config.cache.parse_yaml") as mocked_parse_yaml:
+        for _ in range(2):
+            assert load_sheets_config() == compiled_config
+        mocked_parse_yaml.assert_not_called()
+
+    # a cache that does not hold what it should is ignored.
+    cache = json.loads(cache_files[0].read_text())
+    cache["compiled_config"] = dict(sheets=list())
+    cache_files[0].write_text(json.dumps(cache))
+    assert load_sheets_config() == compiled_config
+
+    sheets_file.write_text(
+        sheets_file.read_text().replace("sheet_name: df_dropper", "sheet_name: df_dropped")
+    )
+    compiled_config = load_sheets_config()
+    assert "df_dropper" not in compiled_config.sheets
+    assert "df_dropped" in compiled_config.sheets
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_get_sheet_config_duplicated_sheet(datafiles):
+    from sheetwork.core.config.config import ConfigLoader, compile_sheets_config
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.main import parser
+
+    flags = FlagParser(
+        parser,
+        test_sheet_name="df_dropper",
+        project_dir=str(datafiles),
+        sheet_config_dir=str(datafiles),
+    )
+    config = ConfigLoader(flags, Project(flags))
+    config.config["sheets"].append(dict(config.sheet_config))
+    config.compiled_config = compile_sheets_config(config.config)
+    with pytest.raises(SheetConfigParsingError, match="more than one config"):
+        config.get_sheet_config()
@@ -0,0 +1,37 @@
+import datetime
+
+import pytest
+
+MOMENT = datetime.datetime(2021, 1, 31, 23, 59, 30)
+
+
+@pytest.mark.parametrize(
+    "expression, expected_firing",
+    [
+        ("*/15 * * * *", datetime.datetime(2021, 2, 1, 0, 0)),
+        ("5/20 1 * * *", datetime.datetime(2021, 2, 1, 1, 5)),
+        ("0 9 * * mon-fri", datetime.datetime(2021, 2, 1, 9, 0)),
+        ("30 2 * jan,jul sun", datetime.datetime(2021, 7, 4, 2, 30)),
+        ("0 0 29 2 *", datetime.datetime(2024, 2, 29, 0, 0)),
+        # restricting both the day of month and the day of week fires on either.
+        ("0 0 13 * fri", datetime.datetime(2021, 2, 5, 0, 0)),
+        ("0 0 * * 7", datetime.datetime(2021, 2, 7, 0, 0)),
+        ("@hourly", datetime.datetime(2021, 2, 1, 0, 0)),
+        ("@yearly", datetime.datetime(2022, 1, 1, 0, 0)),
+    ],
+)
+def test_next_after(expression, expected_firing):
+    from sheetwork.core.cron import CronExpression
+
+    assert CronExpression(expression).next_after(MOMENT) == expected_firing
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["* * *", "61 * * * *", "*/0 * * * *", "5-1 * * * *", "x * * * *", "0 0 30 2 *"],
+)
+def test_invalid_expression(expression):
+    from sheetwork.core.cron import CronExpression
+
+    with pytest.raises(ValueError):
+        CronExpression(expression).next_after(MOMENT)
@@ -0,0 +1,132 @@
+from pathlib import Path
+
+import numpy as np
+import pandas
+import pytest
+
+pytest.importorskip("duckdb")
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+
+
+def make_adaptor(datafiles, target_table):
+    from sheetwork.core.adapters.duckdb.connection import DuckDBConnection, DuckDBCredentials
+    from sheetwork.core.adapters.duckdb.impl import DuckDBAdaptor
+    from sheetwork.core.config.config import ConfigLoader
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+
+    flags = FlagParser(parser)
+    flags.consume_cli_arguments(
+        [
+            "upload",
+            "--sheet-key",
+            "test_sheet",
+            "--project-dir",
+            str(datafiles),
+            "--profile-dir",
+            str(datafiles),
+            "--sheet-config-dir",
+            str(datafiles),
+            "--schema",
+            "sheetwork_test_schema",
+            "--table",
+            target_table,
+        ]
+    )
+    project = Project(flags)
+    config = ConfigLoader(flags, project)
+    profile = Profile(project, target_name="duckdb_test")
+    credentials = DuckDBCredentials(profile)
+    credentials.database = str(Path(str(datafiles), "sheetwork_test.duckdb"))
+    return DuckDBAdaptor(connection=DuckDBConnection(credentials), config=config)
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_parse_and_validate_credentials(datafiles):
+    from sheetwork.core.adapters.duckdb.connection import DuckDBCredentials
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+
+    flags = FlagParser(parser, profile_dir=str(datafiles), project_dir=str(datafiles))
+    profile = Profile(Project(flags), target_name="duckdb_test")
+
+    credentials = DuckDBCredentials(profile)
+    assert credentials.are_valid_credentials is True
+    assert credentials.database == ":memory:"
+    assert credentials.target_schema == "main"
+    assert credentials._db_type == "duckdb"
+
+
+@pytest.mark.parametrize("destructive", [True, False])
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_upload(datafiles, destructive):
+    df = pandas.DataFrame(
+        {
+            "col_text": ['comma, "quoted"', "new\nline", np.nan],
+            "col_int": ["1", "2", np.nan],
+            "col_bool": ["true", "false", np.nan],
+            "col_date": ["2021/01/01", "2021/01/02", "2021/01/03"],
+            "col_numeric": ["1.5", np.nan, "3"],
+        }
+    )
+    a = make_adaptor(datafiles, "magical_table")
+    a._config.sheet_columns = {
+        "col_int": "int",
+        "col_bool": "boolean",
+        "col_date": "date",
+        "col_numeric": "numeric",
+    }
+    a._config.project.destructive_create_table = destructive
+    a.upload(df, "sheetwork_test_schema")
+    a.upload(df, "sheetwork_test_schema")
+
+    columns, rows = a.check_table("sheetwork_test_schema", "magical_table")
+    assert columns == 5
+    assert rows == (3 if destructive else 6)
+    results = a.excecute_query(
+        "SELECT DISTINCT col_text, col_int, col_bool, CAST(col_date AS VARCHAR), "
+        "CAST(col_numeric AS DOUBLE) FROM sheetwork_test_schema.magical_table ORDER BY 4",
+        return_results=True,
+    )
+    assert results == [
+        ('comma, "quoted"', 1, True, "2021-01-01", 1.5),
+        ("new\nline", 2, False, "2021-01-02", None),
+        (None, None, None, "2021-01-03", 3.0),
+    ]
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_upload_swap_and_merge(datafiles):
+    df = pandas.DataFrame({"id": ["1", "2", "3"], "name": ["unicorn", "rainbow", "sparkles"]})
+    a = make_adaptor(datafiles, "synced_table")
+    a._config.sheet_columns = {"id": "int"}
+
+    a._config.sync_mode = "swap"
+    a.upload(df, "sheetwork_test_schema")
+    assert a.check_table("sheetwork_test_schema", "synced_table", deep=True) == (2, 3)
+
+    # the first merge reloads the table with its row hashes, the second only applies the delta.
+    a._config.sync_mode = "merge"
+    a._config.merge_keys = ["id"]
+    a.upload(df, "sheetwork_test_schema")
+    changed_df = pandas.DataFrame({"id": ["1", "3", "4"], "name": ["unicorn", "glitter", "pony"]})
+    a.upload(changed_df, "sheetwork_test_schema")
+
+    results = a.excecute_query(
+        "SELECT id, name FROM sheetwork_test_schema.synced_table ORDER BY id", return_results=True
+    )
+    assert results == [(1, "unicorn"), (3, "glitter"), (4, "pony")]
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_check_table_does_not_exist(datafiles):
+    from sheetwork.core.exceptions import TableDoesNotExist
+
+    a = make_adaptor(datafiles, "magical_table")
+    with pytest.raises(TableDoesNotExist):
+        a.check_table("sheetwork_test_schema", "non_existant")
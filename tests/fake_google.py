@@ -0,0 +1,331 @@
+"""Local stand-in for the Sheets and Drive APIs that gspread (and so sheetwork) can be pointed at.
+
+`FakeGoogleServer` serves spreadsheets from memory over HTTP on localhost. They are either made up
+(`FakeSpreadsheet.synthetic()`) or replayed from a recording of a real workbook
+(`record_spreadsheet()` / `FakeSpreadsheet.from_recording()`). Each request can be slowed down
+and every n-th one answered with the 429 Google sends once a quota is exhausted, so that
+downloads can be exercised (and benchmarked) at scale without touching Google. Edits are
+emulated with `touch()`, which bumps the version of a workbook and appends it to the Drive
+changes feed.
+
+    with FakeGoogleServer(latency=0.05) as server:
+        server.add_spreadsheet("key", FakeSpreadsheet.synthetic(rows=100_000, columns=10))
+        with server.patch_authentication():
+            ...  # anything creating a GoogleSpreadsheet now talks to the server.
+"""
+import contextlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit, urlunsplit
+
+import gspread
+import mock
+import requests
+from requests.adapters import HTTPAdapter
+
+GOOGLE_API_HOSTS = ("https://sheets.googleapis.com", "https://www.googleapis.com")
+
+_SPREADSHEET_PATH = re.compile(r"^/v4/spreadsheets/(?P<key>[^/:]+)$")
+_VALUES_PATH = re.compile(r"^/v4/spreadsheets/(?P<key>[^/:]+)/values/(?P<range>.+)$")
+_BATCH_GET_PATH = re.compile(r"^/v4/spreadsheets/(?P<key>[^/:]+)/values:batchGet$")
+_DRIVE_FILE_PATH = re.compile(r"^/drive/v3/files/(?P<key>[^/]+)$")
+_DRIVE_START_PAGE_TOKEN_PATH = "/drive/v3/changes/startPageToken"
+_DRIVE_CHANGES_PATH = "/drive/v3/changes"
+_CELL = re.compile(r"^(?P<column>[A-Z]*)(?P<row>[0-9]*)$")
+
+
+class FakeSpreadsheet:
+    """Worksheets of a fake workbook, each a list of rows of (string) cell values."""
+
+    def __init__(
+        self, worksheets: Dict[str, List[List[str]]], title: str = "fake", version: str = "1"
+    ):
+        """Constructs FakeSpreadsheet.
+
+        Args:
+            worksheets (Dict[str, List[List[str]]]): values of each worksheet by title, in the
+                order of the tabs of the workbook.
+            title (str, optional): title of the workbook. Defaults to "fake".
+            version (str, optional): Drive version of the workbook. Defaults to "1".
+        """
+        self.worksheets = worksheets
+        self.title = title
+        self.version = version
+
+    @classmethod
+    def synthetic(
+        cls, rows: int, columns: int = 10, worksheet: str = "Sheet1", **kwargs: Any
+    ) -> "FakeSpreadsheet":
+        """Makes a workbook with a worksheet of `rows` rows (header excluded) and `columns` columns.
+
+        Values look like what people type in sheets: numbers, text with stray whitespace, booleans,
+        dates and empty cells. They only depend on the position of the cell.
+        """
+        cell_values = ["42", "  foo ", "bar baz", "", "TRUE", "2021-03-04", "3.14", "x" * 20]
+        header = [f"col_{i}" for i in range(columns)]
+        values = [header] + [
+            [cell_values[(row * 7 + column * 3) % len(cell_values)] for column in range(columns)]
+            for row in range(rows)
+        ]
+        return cls({worksheet: values}, **kwargs)
+
+    @classmethod
+    def from_recording(cls, path: Path) -> "FakeSpreadsheet":
+        """Loads a workbook saved by `record_spreadsheet()`."""
+        recording = json.loads(Path(path).read_text())
+        return cls(recording["worksheets"], recording["title"], recording["version"])
+
+    def get_values(self, range_name: str) -> Tuple[str, List[List[str]]]:
+        """Values of an A1 range ("'title'!A2:C", "title!1:1", "title"...) like the API gives them.
+
+        Returns:
+            Tuple[str, List[List[str]]]: title of the worksheet and the values of the range without
+                their trailing empty cells and rows.
+        """
+        title, _, cells = range_name.rpartition("!")
+        if not title:
+            title, cells = cells, str()
+        if title.startswith("'") and title.endswith("'"):
+            title = title[1:-1].replace("''", "'")
+        values = self.worksheets[title]
+        first_row, first_column, last_row, last_column = 1, 1, len(values), None
+        if cells:
+            start, _, end = cells.partition(":")
+            first_column, first_row = _parse_cell(start, 1, 1)
+            last_column, last_row = _parse_cell(end or start, None, len(values))
+        range_values = list()
+        for row in values[first_row - 1 : last_row]:
+            row = row[first_column - 1 : last_column]
+            while row and row[-1] == "":
+                row = row[:-1]
+            range_values.append(row)
+        while range_values and not range_values[-1]:
+            range_values.pop()
+        return title, range_values
+
+    def make_metadata(self, key: str) -> Dict[str, Any]:
+        sheets = [
+            {
+                "properties": {
+                    "sheetId": index,
+                    "title": title,
+                    "index": index,
+                    "sheetType": "GRID",
+                    "gridProperties": {
+                        "rowCount": len(values),
+                        "columnCount": max([len(row) for row in values], default=0),
+                    },
+                }
+            }
+            for index, (title, values) in enumerate(self.worksheets.items())
+        ]
+        return {"spreadsheetId": key, "properties": {"title": self.title}, "sheets": sheets}
+
+
+def _parse_cell(cell: str, default_column: Optional[int], default_row: int) -> Tuple[Any, int]:
+    match = _CELL.match(cell.upper())
+    if not match:
+        raise ValueError(f"Unable to parse range: {cell}")
+    column = default_column
+    if match.group("column"):
+        column = 0
+        for letter in match.group("column"):
+            column = column * 26 + ord(letter) - ord("A") + 1
+    row = int(match.group("row")) if match.group("row") else default_row
+    return column, row
+
+
+def record_spreadsheet(workbook: gspread.models.Spreadsheet, version: str, path: Path) -> None:
+    """Saves all the worksheets of a real (opened) workbook so that they can be served again.
+
+    Args:
+        workbook (gspread.models.Spreadsheet): workbook opened with an authenticated client, e.g.
+            `GoogleSpreadsheet.workbook`.
+        version (str): Drive version to serve it as, e.g. `get_workbook_revision()`.
+        path (Path): where to write the recording.
+    """
+    recording = dict(
+        title=workbook.title,
+        version=version,
+        worksheets={
+            worksheet.title: worksheet.get_all_values() for worksheet in workbook.worksheets()
+        },
+    )
+    Path(path).write_text(json.dumps(recording))
+
+
+class _FakeGoogleHandler(BaseHTTPRequestHandler):
+    server: "FakeGoogleServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # keep test and benchmark output clean.
+        return
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, status: int, message: str, reason: str) -> None:
+        self._send_json(status, {"error": {"code": status, "message": message, "status": reason}})
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        query = parse_qs(url.query)
+        if self.server.should_fail_request():
+            self._send_error(
+                429,
+                "Quota exceeded for quota metric 'Read requests' and limit 'Read requests per "
+                "minute per user' of service 'sheets.googleapis.com'.",
+                "RESOURCE_EXHAUSTED",
+            )
+            return
+        if path == _DRIVE_START_PAGE_TOKEN_PATH:
+            self._send_json(200, {"startPageToken": str(len(self.server.changes))})
+            return
+        if path == _DRIVE_CHANGES_PATH:
+            self._send_changes(query)
+            return
+        for pattern in (_SPREADSHEET_PATH, _VALUES_PATH, _BATCH_GET_PATH, _DRIVE_FILE_PATH):
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            self._send_error(404, f"{path} is not served by the fake.", "NOT_FOUND")
+            return
+        spreadsheet = self.server.spreadsheets.get(match.group("key"))
+        if spreadsheet is None:
+            self._send_error(404, "Requested entity was not found.", "NOT_FOUND")
+            return
+        if pattern is _SPREADSHEET_PATH:
+            self._send_json(200, spreadsheet.make_metadata(match.group("key")))
+        elif pattern is _DRIVE_FILE_PATH:
+            self._send_json(200, {"version": spreadsheet.version})
+        elif pattern is _VALUES_PATH:
+            self._send_json(200, self._make_value_range(spreadsheet, match.group("range")))
+        else:
+            value_ranges = [
+                self._make_value_range(spreadsheet, range_name)
+                for range_name in query.get("ranges", list())
+            ]
+            self._send_json(200, {"spreadsheetId": match.group("key"), "valueRanges": value_ranges})
+
+    def _send_changes(self, query: Dict[str, List[str]]) -> None:
+        # page tokens are positions in the feed, like Drive's they only ever go forward.
+        changes = self.server.changes
+        page_token = query.get("pageToken", [""])[0]
+        if not page_token.isdigit() or int(page_token) > len(changes):
+            self._send_error(400, f"Invalid Value: pageToken {page_token}", "INVALID_ARGUMENT")
+            return
+        start = int(page_token)
+        end = min(len(changes), start + int(query.get("pageSize", ["100"])[0]))
+        body: Dict[str, Any] = {"changes": [{"fileId": key} for key in changes[start:end]]}
+        if end < len(changes):
+            body["nextPageToken"] = str(end)
+        else:
+            body["newStartPageToken"] = str(end)
+        self._send_json(200, body)
+
+    @staticmethod
+    def _make_value_range(spreadsheet: FakeSpreadsheet, range_name: str) -> Dict[str, Any]:
+        title, values = spreadsheet.get_values(range_name)
+        value_range: Dict[str, Any] = {"range": range_name, "majorDimension": "ROWS"}
+        # like the API, ranges without any value have no "values" at all.
+        if values:
+            value_range["values"] = values
+        return value_range
+
+
+class FakeGoogleServer(ThreadingHTTPServer):
+    """Serves `FakeSpreadsheet`s on localhost as if it were the Sheets and Drive APIs."""
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, quota_error_every: int = 0):
+        """Constructs FakeGoogleServer, listening on a free port of localhost.
+
+        Args:
+            latency (float, optional): seconds each request takes before being answered.
+                Defaults to 0.0.
+            quota_error_every (int, optional): when set, every n-th request is answered with
+                a 429 RESOURCE_EXHAUSTED error. Defaults to 0.
+        """
+        super().__init__(("127.0.0.1", 0), _FakeGoogleHandler)
+        self.spreadsheets: Dict[str, FakeSpreadsheet] = dict()
+        # keys of the workbooks in the order they were changed, the Drive changes feed.
+        self.changes: List[str] = list()
+        self.latency = latency
+        self.quota_error_every = quota_error_every
+        self.num_requests = 0
+        self._requests_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_spreadsheet(self, key: str, spreadsheet: FakeSpreadsheet) -> None:
+        self.spreadsheets[key] = spreadsheet
+
+    def touch(self, key: str) -> None:
+        """Emulates an edit of a workbook: bumps its version and records it in the changes feed."""
+        spreadsheet = self.spreadsheets[key]
+        spreadsheet.version = str(int(spreadsheet.version) + 1)
+        self.changes.append(key)
+
+    def should_fail_request(self) -> bool:
+        with self._requests_lock:
+            self.num_requests += 1
+            num_requests = self.num_requests
+        if self.latency:
+            time.sleep(self.latency)
+        return bool(self.quota_error_every) and num_requests % self.quota_error_every == 0
+
+    def __enter__(self) -> "FakeGoogleServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def make_client(self) -> gspread.Client:
+        """Makes a gspread client whose requests to the Google APIs end up on this server."""
+        session = requests.Session()
+        for host in GOOGLE_API_HOSTS:
+            session.mount(host, _RedirectingAdapter(self.url))
+        return gspread.Client(auth=None, session=session)
+
+    @contextlib.contextmanager
+    def patch_authentication(self) -> Iterator[None]:
+        """Makes `GoogleSpreadsheet.authenticate()` hand out clients talking to this server."""
+
+        def make_client(*args: Any, **kwargs: Any) -> gspread.Client:
+            return self.make_client()
+
+        with mock.patch("gspread.service_account", make_client), mock.patch(
+            "gspread.oauth", make_client
+        ):
+            yield
+
+
+class _RedirectingAdapter(HTTPAdapter):
+    def __init__(self, url: str):
+        super().__init__()
+        self.scheme, self.netloc = urlsplit(url)[:2]
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        url = urlsplit(request.url)
+        request.url = urlunsplit((self.scheme, self.netloc, url.path, url.query, url.fragment))
+        return super().send(request, **kwargs)
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pandas
+import pytest
+from pandas.testing import assert_frame_equal
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+
+
+def make_google_sheet(datafiles, sheet_key):
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+
+    flags = FlagParser(parser, project_dir=str(datafiles), profile_dir=str(datafiles))
+    google_sheet = GoogleSpreadsheet(Profile(Project(flags)), sheet_key)
+    google_sheet.authenticate()
+    return google_sheet
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_make_df_from_fake_worksheet(datafiles):
+    from tests.fake_google import FakeGoogleServer, FakeSpreadsheet
+
+    spreadsheet = FakeSpreadsheet.synthetic(rows=20, columns=6, version="7")
+    header, *rows = spreadsheet.worksheets["Sheet1"]
+    expected_df = pandas.DataFrame(rows, columns=header)
+
+    with FakeGoogleServer() as server, server.patch_authentication():
+        server.add_spreadsheet("fake_key", spreadsheet)
+        google_sheet = make_google_sheet(datafiles, "fake_key")
+        assert google_sheet.get_workbook_revision() == "7"
+        google_sheet.open_workbook()
+
+        assert_frame_equal(google_sheet.make_df_from_worksheet("Sheet1"), expected_df)
+        # projected and incremental downloads go through values.batchGet ranges.
+        assert_frame_equal(
+            google_sheet.make_df_from_worksheet(
+                "Sheet1", included_columns=["col_1", "col_2", "col_5"], skip_rows=15
+            ),
+            expected_df[["col_1", "col_2", "col_5"]].iloc[15:].reset_index(drop=True),
+        )
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_fake_quota_errors(datafiles):
+    from gspread.exceptions import APIError
+
+    from tests.fake_google import FakeGoogleServer, FakeSpreadsheet
+
+    with FakeGoogleServer(quota_error_every=2) as server, server.patch_authentication():
+        server.add_spreadsheet("fake_key", FakeSpreadsheet.synthetic(rows=1))
+        # a bare client, GoogleSpreadsheet's would retry (see quota_test.py).
+        workbook = server.make_client().open_by_key("fake_key")
+        workbook.fetch_sheet_metadata()
+        with pytest.raises(APIError, match="RESOURCE_EXHAUSTED"):
+            workbook.fetch_sheet_metadata()
+        assert server.num_requests == 2
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_record_and_replay_spreadsheet(datafiles, tmp_path):
+    from tests.fake_google import FakeGoogleServer, FakeSpreadsheet, record_spreadsheet
+
+    recording_path = Path(tmp_path, "recording.json")
+    spreadsheet = FakeSpreadsheet(
+        {"First": [["a", "b"], ["1", ""]], "It's second": [["c"], ["2"], ["3"]]}, title="wb"
+    )
+    with FakeGoogleServer() as server:
+        server.add_spreadsheet("recorded_key", spreadsheet)
+        record_spreadsheet(server.make_client().open_by_key("recorded_key"), "3", recording_path)
+
+    replayed = FakeSpreadsheet.from_recording(recording_path)
+    assert (replayed.title, replayed.version) == ("wb", "3")
+    assert replayed.worksheets == spreadsheet.worksheets
+    assert replayed.get_values("'It''s second'!A2:A") == ("It's second", [["2"], ["3"]])
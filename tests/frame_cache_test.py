@@ -0,0 +1,52 @@
+import os
+from pathlib import Path
+
+import pandas
+import pytest
+from pandas.testing import assert_frame_equal
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_frame_cache(datafiles):
+    from sheetwork.core.frame_cache import FrameCache, make_frame_key
+
+    cache = FrameCache(Path(datafiles, "frame_cache"), max_size=10 * 1024**2)
+    df = pandas.DataFrame({"id": [1, 2, 3], "name": ["alice", "bob", None]})
+    key = make_frame_key(sheet="sheet_key/worksheet", revision="1")
+    assert key != make_frame_key(sheet="sheet_key/worksheet", revision="2")
+    assert cache.get(key) is None
+
+    assert cache.put(key, df) is True
+    assert_frame_equal(cache.get(key), df)
+    # frames pyarrow cannot store are just not cached.
+    assert cache.put("mixed", pandas.DataFrame({"mixed": [1, "a"]})) is False
+    assert cache.get("mixed") is None
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_frame_cache_evicts_least_recently_used(datafiles):
+    from sheetwork.core.frame_cache import FrameCache
+
+    cache_dir = Path(datafiles, "frame_cache")
+    cache = FrameCache(cache_dir, max_size=10 * 1024**2)
+    df = pandas.DataFrame({"value": [str(i) for i in range(100)]})
+    cache.put("a", df)
+    frame_size = Path(cache_dir, "a.parquet").stat().st_size
+    cache.max_size = 2 * frame_size
+    cache.put("b", df)
+    # "a" was used last, "b" is older and goes first when "c" comes in.
+    os.utime(Path(cache_dir, "b.parquet"), ns=(0, 0))
+    cache.get("a")
+    cache.put("c", df)
+    assert sorted(path.stem for path in cache_dir.glob("*.parquet")) == ["a", "c"]
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_frame_cache_drops_frames_bigger_than_itself(datafiles):
+    from sheetwork.core.frame_cache import FrameCache
+
+    cache = FrameCache(Path(datafiles, "frame_cache"), max_size=0)
+    assert cache.put("a", pandas.DataFrame({"value": ["x"]})) is True
+    assert cache.get("a") is None
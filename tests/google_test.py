@@ -117,3 +117,124 @@ def test__check_google_creds_exits(datafiles, simulate_missing_creds):
             g._check_google_creds_exist()
     else:
         g._check_google_creds_exist()
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_make_dfs_from_worksheets(datafiles, monkeypatch):
+    import mock
+
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+
+    flags = FlagParser(parser, project_dir=str(datafiles), profile_dir=str(datafiles))
+    project = Project(flags)
+    profile = Profile(project)
+
+    def mock__check_google_creds_exist(self):
+        return True, Path()
+
+    monkeypatch.setattr(
+        GoogleSpreadsheet, "_check_google_creds_exist", mock__check_google_creds_exist
+    )
+    g = GoogleSpreadsheet(profile, "dummy_key")
+    g.workbook = mock.Mock()
+    g.workbook.get_worksheet.return_value.title = "first"
+    g.workbook.values_batch_get.return_value = {
+        "valueRanges": [
+            # trailing empty cells are not sent back by the API.
+            {"range": "'first'!A1:B3", "values": [["a", "b"], ["1", "2"], ["3"]]},
+            {"range": "'Sheet 2'!A1:A2", "values": [["c"], ["x"]]},
+            {"range": "'empty'!A1"},
+        ]
+    }
+
+    dfs = g.make_dfs_from_worksheets([str(), "Sheet 2", "Sheet 2", "empty"])
+
+    g.workbook.values_batch_get.assert_called_once_with(["'first'", "'Sheet 2'", "'empty'"])
+    assert list(dfs.keys()) == [str(), "Sheet 2", "empty"]
+    assert dfs[str()].to_dict("list") == {"a": ["1", "3"], "b": ["2", ""]}
+    assert dfs["Sheet 2"].to_dict("list") == {"c": ["x"]}
+    assert dfs["empty"].empty
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_make_df_from_worksheet_included_columns(datafiles, monkeypatch):
+    import mock
+
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+
+    flags = FlagParser(parser, project_dir=str(datafiles), profile_dir=str(datafiles))
+    project = Project(flags)
+    profile = Profile(project)
+
+    def mock__check_google_creds_exist(self):
+        return True, Path()
+
+    monkeypatch.setattr(
+        GoogleSpreadsheet, "_check_google_creds_exist", mock__check_google_creds_exist
+    )
+    g = GoogleSpreadsheet(profile, "dummy_key")
+    g.workbook = mock.Mock()
+    header_response = {"valueRanges": [{"values": [["a", "b", "c", "d", "e"]]}]}
+    columns_response = {
+        "valueRanges": [
+            # B:C then E:E, trailing empty cells and rows are not sent back by the API.
+            {"values": [["b", "c"], ["1"], ["2", "3"]]},
+            {"values": [["e"], [], [], ["4"]]},
+        ]
+    }
+    g.workbook.values_batch_get.side_effect = [header_response, columns_response]
+
+    df = g.make_df_from_worksheet("Sheet1", included_columns=["e", "b", "c", "not_there"])
+
+    assert g.workbook.values_batch_get.call_args_list == [
+        mock.call(["'Sheet1'!1:1"]),
+        mock.call(["'Sheet1'!B:C", "'Sheet1'!E:E"]),
+    ]
+    assert df.to_dict("list") == {
+        "b": ["1", "2", ""],
+        "c": ["", "3", ""],
+        "e": ["", "", "4"],
+    }
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_make_df_from_worksheet_skip_rows(datafiles, monkeypatch):
+    import mock
+
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+
+    flags = FlagParser(parser, project_dir=str(datafiles), profile_dir=str(datafiles))
+    project = Project(flags)
+    profile = Profile(project)
+
+    def mock__check_google_creds_exist(self):
+        return True, Path()
+
+    monkeypatch.setattr(
+        GoogleSpreadsheet, "_check_google_creds_exist", mock__check_google_creds_exist
+    )
+    g = GoogleSpreadsheet(profile, "dummy_key")
+    g.workbook = mock.Mock()
+    header_response = {"valueRanges": [{"values": [["a", "b", "c"]]}]}
+    rows_response = {"valueRanges": [{"values": [["4", "5"], ["6", "7", "8"]]}]}
+    g.workbook.values_batch_get.side_effect = [header_response, rows_response]
+
+    df = g.make_df_from_worksheet("Sheet1", skip_rows=3)
+
+    assert g.workbook.values_batch_get.call_args_list == [
+        mock.call(["'Sheet1'!1:1"]),
+        mock.call(["'Sheet1'!A5:C"]),
+    ]
+    assert df.to_dict("list") == {"a": ["4", "6"], "b": ["5", "7"], "c": ["", "8"]}
@@ -77,3 +77,22 @@ def test_main(is_version_run):
     else:
         res = main(parser, test_cli_args)
         assert res == 0
+
+
+def test_main_imports_no_heavy_dependencies():
+    import subprocess
+    import sys
+
+    # only the upload task needs those, `--help`, `--version` or `init` should not pay for them.
+    heavy_modules = ["pandas", "numpy", "gspread", "sqlalchemy", "snowflake", "psycopg2"]
+    imported_modules = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, sheetwork.core.main; print(' '.join(sys.modules))",
+        ],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout.split()
+    assert [module for module in heavy_modules if module in imported_modules] == []
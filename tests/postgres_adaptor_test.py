@@ -244,3 +244,274 @@ def test_execute_query(datafiles):
     a = PostgresAdaptor(connection=connection, config=config)
     results = a.excecute_query("select * from sheetwork_test_schema.test", return_results=True)
     assert results == expectation
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_upload_copies_typed_values_in_chunks(datafiles, monkeypatch):
+    import numpy as np
+
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.config.config import ConfigLoader
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+    from sheetwork.core.adapters.postgres.connection import PostgresCredentials
+    from sheetwork.core.adapters.postgres.connection import PostgresConnection
+
+    df = pandas.DataFrame(
+        {
+            "col_text": ['comma, "quoted"', "new\nline", np.nan],
+            "col_bool": ["true", "false", np.nan],
+            "col_date": ["2021/01/01", "2021/01/02", "2021/01/03"],
+            "col_numeric": ["1.5", np.nan, "3"],
+        }
+    )
+
+    flags = FlagParser(parser)
+    flags.consume_cli_arguments(
+        [
+            "upload",
+            "--sheet-key",
+            "test_sheet",
+            "--project-dir",
+            str(datafiles),
+            "--profile-dir",
+            str(datafiles),
+            "--sheet-config-dir",
+            str(datafiles),
+            "--schema",
+            "sheetwork_test_schema",
+            "--table",
+            "copied_table",
+        ]
+    )
+    project = Project(flags)
+    config = ConfigLoader(flags, project)
+    config.sheet_columns = {
+        "col_text": "varchar",
+        "col_bool": "boolean",
+        "col_date": "date",
+        "col_numeric": "numeric",
+    }
+    profile = Profile(project, target_name="postgres_test")
+    connection = PostgresConnection(PostgresCredentials(profile))
+    a = PostgresAdaptor(connection=connection, config=config)
+
+    monkeypatch.setattr(PostgresAdaptor, "COPY_CHUNK_SIZE", 2)
+    a.upload(df, "sheetwork_test_schema")
+    results = a.excecute_query(
+        "select col_text, col_bool, col_date::text, col_numeric "
+        "from sheetwork_test_schema.copied_table order by col_date",
+        return_results=True,
+    )
+    assert [tuple(row) for row in results] == [
+        ('comma, "quoted"', True, "2021-01-01", 1.5),
+        ("new\nline", False, "2021-01-02", None),
+        (None, None, "2021-01-03", 3),
+    ]
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_upload_merge(datafiles):
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.config.config import ConfigLoader
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+    from sheetwork.core.adapters.postgres.connection import PostgresCredentials
+    from sheetwork.core.adapters.postgres.connection import PostgresConnection
+
+    target_table = f"merged_{str(uuid.uuid4())[:8]}"
+    flags = FlagParser(parser)
+    flags.consume_cli_arguments(
+        [
+            "upload",
+            "--sheet-key",
+            "test_sheet",
+            "--project-dir",
+            str(datafiles),
+            "--profile-dir",
+            str(datafiles),
+            "--sheet-config-dir",
+            str(datafiles),
+            "--schema",
+            "sheetwork_test_schema",
+            "--table",
+            target_table,
+        ]
+    )
+    project = Project(flags)
+    config = ConfigLoader(flags, project)
+    config.sheet_columns = {"id": "int", "name": "varchar"}
+    config.sync_mode = "merge"
+    config.merge_keys = ["id"]
+    profile = Profile(project, target_name="postgres_test")
+    connection = PostgresConnection(PostgresCredentials(profile))
+    a = PostgresAdaptor(connection=connection, config=config)
+
+    def select_table():
+        return a.excecute_query(
+            f"select id, name, score from sheetwork_test_schema.{target_table} order by id",
+            return_results=True,
+        )
+
+    # score is left undeclared so it stays a native int64 column, stored as a BIGINT.
+    a.upload(
+        pandas.DataFrame({"id": ["1", "2", "3"], "name": ["a", "b", "c"], "score": [1, 2, 3]}),
+        "sheetwork_test_schema",
+    )
+    assert [tuple(row) for row in select_table()] == [(1, "a", 1), (2, "b", 2), (3, "c", 3)]
+    hashes = dict(
+        a.excecute_query(
+            f"select id, _sheetwork_row_hash from sheetwork_test_schema.{target_table}",
+            return_results=True,
+        )
+    )
+
+    # 1 untouched, 2 updated, 3 deleted and 4 inserted.
+    a.upload(
+        pandas.DataFrame({"id": ["1", "2", "4"], "name": ["a", "B", "d"], "score": [1, 5, 4]}),
+        "sheetwork_test_schema",
+    )
+    assert [tuple(row) for row in select_table()] == [(1, "a", 1), (2, "B", 5), (4, "d", 4)]
+    new_hashes = dict(
+        a.excecute_query(
+            f"select id, _sheetwork_row_hash from sheetwork_test_schema.{target_table}",
+            return_results=True,
+        )
+    )
+    assert new_hashes[1] == hashes[1]
+    assert new_hashes[2] != hashes[2]
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_upload_swap(datafiles, monkeypatch):
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.config.config import ConfigLoader
+    from sheetwork.core.exceptions import SheetWorkConfigError, UploadError
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+    from sheetwork.core.adapters.postgres.connection import PostgresCredentials
+    from sheetwork.core.adapters.postgres.connection import PostgresConnection
+
+    target_table = f"swapped_{str(uuid.uuid4())[:8]}"
+    flags = FlagParser(parser)
+    flags.consume_cli_arguments(
+        [
+            "upload",
+            "--sheet-key",
+            "test_sheet",
+            "--project-dir",
+            str(datafiles),
+            "--profile-dir",
+            str(datafiles),
+            "--sheet-config-dir",
+            str(datafiles),
+            "--schema",
+            "sheetwork_test_schema",
+            "--table",
+            target_table,
+        ]
+    )
+    project = Project(flags)
+    config = ConfigLoader(flags, project)
+    config.sync_mode = "swap"
+    profile = Profile(project, target_name="postgres_test")
+    connection = PostgresConnection(PostgresCredentials(profile))
+    a = PostgresAdaptor(connection=connection, config=config)
+
+    def select_table():
+        return [
+            tuple(row)
+            for row in a.excecute_query(
+                f"select * from sheetwork_test_schema.{target_table} order by 1",
+                return_results=True,
+            )
+        ]
+
+    a.upload(pandas.DataFrame({"col_a": ["a", "b"]}), "sheetwork_test_schema")
+    a.upload(pandas.DataFrame({"col_a": ["c"], "col_b": ["d"]}), "sheetwork_test_schema")
+    assert select_table() == [("c", "d")]
+    swap_tables = a.excecute_query(
+        "select table_name from information_schema.tables "
+        f"where table_name = '{target_table}__sheetwork_tmp'",
+        return_results=True,
+    )
+    assert swap_tables == list()
+
+    # a load that does not validate never touches the live table.
+    monkeypatch.setattr(PostgresAdaptor, "_count_rows_and_columns", lambda *args: (0, 0))
+    with pytest.raises(UploadError):
+        a.upload(pandas.DataFrame({"col_a": ["e"]}), "sheetwork_test_schema")
+    assert select_table() == [("c", "d")]
+    monkeypatch.undo()
+
+    # a table views depend on cannot be dropped, its rows are replaced instead.
+    a.excecute_query(
+        f"create view sheetwork_test_schema.{target_table}_view as "
+        f"select col_a from sheetwork_test_schema.{target_table}"
+    )
+    a.upload(pandas.DataFrame({"col_a": ["e"], "col_b": ["f"]}), "sheetwork_test_schema")
+    assert select_table() == [("e", "f")]
+    assert a.excecute_query(
+        f"select col_a from sheetwork_test_schema.{target_table}_view", return_results=True
+    ) == [("e",)]
+    # unless the columns of the sheet changed.
+    with pytest.raises(SheetWorkConfigError, match=f"{target_table}_view"):
+        a.upload(pandas.DataFrame({"col_a": ["g"]}), "sheetwork_test_schema")
+    assert select_table() == [("e", "f")]
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_reuse_connection(datafiles):
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+    from sheetwork.core.adapters.postgres.connection import PostgresCredentials
+    from sheetwork.core.adapters.postgres.connection import PostgresConnection
+
+    flags = FlagParser(parser, profile_dir=str(datafiles), project_dir=str(datafiles))
+    project = Project(flags)
+    profile = Profile(project, target_name="postgres_test")
+    credentials = PostgresCredentials(profile)
+
+    # sheets of the same process share the engine of their credentials.
+    assert PostgresConnection(credentials).engine is PostgresConnection(credentials).engine
+
+    a = PostgresAdaptor(PostgresConnection(credentials), config=str())
+    with a.reuse_connection():
+        connection = a.con
+        a.excecute_query("select 1")
+        a.check_table(target_schema="sheetwork_test_schema", target_table="test")
+        assert a.con is connection
+        assert a._has_connection is True
+    assert a._has_connection is False
+    assert connection.closed
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_check_table_trusts_rows_loaded(datafiles):
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+    from sheetwork.core.adapters.postgres.connection import PostgresCredentials
+    from sheetwork.core.adapters.postgres.connection import PostgresConnection
+    from sheetwork.core.exceptions import TableDoesNotExist
+
+    flags = FlagParser(parser, profile_dir=str(datafiles), project_dir=str(datafiles))
+    project = Project(flags)
+    profile = Profile(project, target_name="postgres_test")
+    a = PostgresAdaptor(PostgresConnection(PostgresCredentials(profile)), config=str())
+
+    # the row count reported by the load is trusted, only the columns are read.
+    a.rows_loaded[("sheetwork_test_schema", "test")] = 42
+    assert a.check_table("sheetwork_test_schema", "test") == (3, 42)
+    # deep verification reflects and counts the table itself.
+    assert a.check_table("sheetwork_test_schema", "test", deep=True) == (3, 2)
+
+    a.rows_loaded[("sheetwork_test_schema", "non_existant")] = 1
+    with pytest.raises(TableDoesNotExist):
+        a.check_table("sheetwork_test_schema", "non_existant")
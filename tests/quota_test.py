@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+
+import pytest
+import requests
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+
+
+def make_response(status_code, body=None, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body or dict()).encode("utf-8")
+    response.headers.update(headers or dict())
+    return response
+
+
+@pytest.mark.parametrize(
+    "status_code, body, expected_kind",
+    [
+        (429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}, "quota"),
+        (403, {"error": {"code": 403, "errors": [{"reason": "userRateLimitExceeded"}]}}, "quota"),
+        (403, {"error": {"code": 403, "status": "PERMISSION_DENIED"}}, "fatal"),
+        (404, {"error": {"code": 404, "status": "NOT_FOUND"}}, "fatal"),
+        (500, {"error": {"code": 500, "status": "INTERNAL"}}, "transient"),
+        (503, {"error": {"code": 503, "status": "UNAVAILABLE"}}, "transient"),
+    ],
+)
+def test_classify_error(status_code, body, expected_kind):
+    from gspread.exceptions import APIError
+
+    from sheetwork.core.clients.quota import classify_error
+
+    assert classify_error(APIError(make_response(status_code, body))) == expected_kind
+    assert classify_error(requests.ConnectionError()) == "transient"
+
+
+def test_token_bucket_reserve():
+    from sheetwork.core.clients.quota import TokenBucket
+
+    bucket = TokenBucket(capacity=2, rate=1)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # the third token is borrowed from the next refills, callers queue behind each other.
+    assert bucket.reserve() == pytest.approx(1, abs=0.05)
+    assert bucket.reserve() == pytest.approx(2, abs=0.05)
+    bucket.pause(10)
+    assert bucket.reserve() == pytest.approx(10, abs=0.05)
+
+
+def test_call_retries_and_respects_retry_after(monkeypatch):
+    from gspread.exceptions import APIError
+
+    from sheetwork.core.clients.quota import GoogleQuota
+
+    waits = list()
+    quota = GoogleQuota(max_retries=2)
+    monkeypatch.setattr(quota, "_wait", lambda seconds: waits.append(seconds))
+    responses = iter(
+        [
+            make_response(429, headers={"Retry-After": "30"}),
+            make_response(503),
+            make_response(200),
+        ]
+    )
+
+    def request():
+        response = next(responses)
+        if not response.ok:
+            raise APIError(response)
+        return response
+
+    assert quota.call(request).status_code == 200
+    # the backoff after the 429 lasts as long as Google asked for, the bucket waits are 0.
+    assert [wait for wait in waits if wait][0] == 30
+    assert quota.metrics.num_requests == 3
+    assert quota.metrics.num_throttled == 1
+    assert quota.metrics.num_retries == 2
+
+    # errors that won't go away are raised straight away.
+    def missing_request():
+        raise APIError(make_response(404))
+
+    with pytest.raises(APIError):
+        quota.call(missing_request)
+    assert quota.metrics.num_requests == 4
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_google_spreadsheet_rides_out_quota_errors(datafiles, monkeypatch):
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+    from sheetwork.core.clients.quota import GOOGLE_QUOTA
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+    from tests.fake_google import FakeGoogleServer, FakeSpreadsheet
+
+    monkeypatch.setattr(GOOGLE_QUOTA, "base_delay", 0.01)
+    GOOGLE_QUOTA.reset()
+    spreadsheet = FakeSpreadsheet.synthetic(rows=10, columns=3)
+    flags = FlagParser(parser, project_dir=str(datafiles), profile_dir=str(datafiles))
+    with FakeGoogleServer(quota_error_every=2) as server, server.patch_authentication():
+        server.add_spreadsheet("fake_key", spreadsheet)
+        google_sheet = GoogleSpreadsheet(Profile(Project(flags)), "fake_key")
+        google_sheet.authenticate()
+        google_sheet.open_workbook()
+        df = google_sheet.make_df_from_worksheet("Sheet1", included_columns=["col_0", "col_2"])
+
+    rows = spreadsheet.worksheets["Sheet1"][1:]
+    assert df.columns.tolist() == ["col_0", "col_2"]
+    assert df["col_0"].tolist() == [row[0] for row in rows]
+    assert GOOGLE_QUOTA.metrics.num_throttled > 0
+    assert GOOGLE_QUOTA.metrics.num_requests == server.num_requests
@@ -0,0 +1,88 @@
+import datetime
+import threading
+from pathlib import Path
+
+import mock
+import pytest
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+
+
+def make_schedule_task(datafiles):
+    from sheetwork.core.main import handle, parser
+
+    return handle(
+        parser,
+        [
+            "schedule",
+            "--max-workers",
+            "1",
+            "--jitter",
+            "0",
+            "--project-dir",
+            str(datafiles),
+            "--profile-dir",
+            str(datafiles),
+            "--sheet-config-dir",
+            str(datafiles),
+        ],
+        run_task=False,
+    )
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_schedule(datafiles):
+    from sheetwork.core.adapters.base.connection import _ENGINE_REGISTRY
+    from sheetwork.core.sheetwork import SheetBag
+    from sheetwork.core.task.schedule import ScheduleTask
+
+    task = make_schedule_task(datafiles)
+    assert isinstance(task, ScheduleTask)
+    assert [(sheet.sheet_name, sheet.priority) for sheet in task.scheduled_sheets] == [
+        ("test_sheet_3", 1),
+        ("test_sheet_4", 0),
+    ]
+    ran_sheets = list()
+    release_worker = threading.Event()
+
+    def mock_run(sheet_bag):
+        release_worker.wait(timeout=10)
+        assert sheet_bag.connection_adapter is task.connection_adapter
+        ran_sheets.append(sheet_bag.flags.sheet_name)
+
+    with mock.patch.object(SheetBag, "run", autospec=True, side_effect=mock_run):
+        task.start(datetime.datetime(2021, 1, 1, 0, 0, 30))
+        try:
+            assert set(task.next_firings.values()) == {datetime.datetime(2021, 1, 1, 0, 5)}
+            task.tick(datetime.datetime(2021, 1, 1, 0, 5))
+            # one worker, the sheet with the highest priority goes first.
+            assert task.in_flight == {"test_sheet_3"}
+            assert [run.sheet_name for run in task.pending_runs] == ["test_sheet_4"]
+
+            # neither the running nor the waiting sheet are run again on top of themselves.
+            task.tick(datetime.datetime(2021, 1, 1, 0, 10))
+            assert task.num_skipped == 2
+            assert len(task.pending_runs) == 1
+            assert set(task.next_firings.values()) == {datetime.datetime(2021, 1, 1, 0, 15)}
+
+            release_worker.set()
+            task._wake_up.wait(timeout=10)
+            task.tick(datetime.datetime(2021, 1, 1, 0, 10, 1))
+            assert task.pending_runs == list()
+        finally:
+            task.shutdown()
+
+    assert ran_sheets == ["test_sheet_3", "test_sheet_4"]
+    assert all(result.succeeded for result in task.results.values())
+    # the pooled connections are closed with the daemon.
+    assert _ENGINE_REGISTRY == dict()
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_invalid_schedule(datafiles):
+    from sheetwork.core.exceptions import SheetConfigParsingError
+
+    sheets_file = Path(str(datafiles), "sheets.yml")
+    sheets_file.write_text(sheets_file.read_text().replace("*/5 * * * *", "*/5 * * *", 1))
+    with pytest.raises(SheetConfigParsingError, match="test_sheet_3"):
+        make_schedule_task(datafiles)
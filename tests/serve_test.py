@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import mock
+import pytest
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+
+
+def make_serve_task(datafiles):
+    from sheetwork.core.main import handle, parser
+
+    return handle(
+        parser,
+        [
+            "serve",
+            "--port",
+            "0",
+            "--max-workers",
+            "1",
+            "--project-dir",
+            str(datafiles),
+            "--profile-dir",
+            str(datafiles),
+            "--sheet-config-dir",
+            str(datafiles),
+        ],
+        run_task=False,
+    )
+
+
+def request(task, method, path, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    url = f"http://{task.host}:{task.port}{path}"
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data, method=method)) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def wait_for_run(task, run_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        _, run = request(task, "GET", f"/runs/{run_id}")
+        if run["status"] not in {"queued", "running"}:
+            return run
+        time.sleep(0.01)
+    raise AssertionError(f"run {run_id} did not finish in time")
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_serve(datafiles):
+    from sheetwork.core.adapters.base.connection import _ENGINE_REGISTRY
+    from sheetwork.core.sheetwork import SheetBag
+    from sheetwork.core.task.serve import ServeTask
+
+    task = make_serve_task(datafiles)
+    assert isinstance(task, ServeTask)
+    ran_sheets = list()
+    release_worker = threading.Event()
+
+    def mock_run(sheet_bag):
+        release_worker.wait(timeout=10)
+        assert sheet_bag.connection_adapter is task.connection_adapter
+        assert sheet_bag.google_client_pool is task.google_client_pool
+        ran_sheets.append((sheet_bag.flags.sheet_name, sheet_bag.flags.force))
+        if sheet_bag.flags.sheet_name == "no_cols":
+            raise ValueError("boom")
+
+    with mock.patch.object(SheetBag, "run", autospec=True, side_effect=mock_run):
+        task.start()
+        try:
+            assert request(task, "GET", "/health") == (200, dict(status="ok"))
+            assert request(task, "GET", "/ready") == (200, dict(status="ready"))
+
+            # the single worker is busy with no_cols, the tag's sheets are queued behind it.
+            status_code, body = request(task, "POST", "/runs", dict(sheet_name="no_cols"))
+            assert status_code == 202
+            failed_run_id = body["runs"][0]["run_id"]
+            status_code, body = request(task, "POST", "/runs", dict(tag="sheet1", force=True))
+            assert status_code == 202
+            assert [run["sheet_name"] for run in body["runs"]] == ["test_sheet_3", "test_sheet_4"]
+            # a sheet that is still queued is not queued twice.
+            _, queued_body = request(task, "POST", "/runs", dict(tag="nightly", force=True))
+            assert queued_body["runs"][0]["run_id"] == body["runs"][0]["run_id"]
+
+            release_worker.set()
+            failed_run = wait_for_run(task, failed_run_id)
+            assert failed_run["status"] == "failed"
+            assert failed_run["error"] == "boom"
+            for run in body["runs"]:
+                assert wait_for_run(task, run["run_id"])["status"] == "succeeded"
+            assert ran_sheets == [
+                ("no_cols", False),
+                ("test_sheet_3", True),
+                ("test_sheet_4", True),
+            ]
+            _, body = request(task, "GET", "/runs")
+            assert len(body["runs"]) == 3
+
+            assert request(task, "POST", "/runs", dict(sheet_name="nope"))[0] == 404
+            assert request(task, "POST", "/runs", dict(tag="nope"))[0] == 404
+            assert request(task, "POST", "/runs", dict(sheet_name="no_cols", tag="x"))[0] == 400
+            assert request(task, "GET", "/runs/nope")[0] == 404
+        finally:
+            task.shutdown()
+
+    # the pooled connections are closed with the daemon.
+    assert _ENGINE_REGISTRY == dict()
+
+
+def test_google_client_pool():
+    from sheetwork.core.clients.google import GoogleClientPool
+
+    pool = GoogleClientPool()
+    clients = list()
+    make_client = mock.Mock(side_effect=lambda: object())
+
+    def get_clients():
+        clients.append(pool.get(("creds",), make_client))
+        clients.append(pool.get(("creds",), make_client))
+
+    get_clients()
+    thread = threading.Thread(target=get_clients)
+    thread.start()
+    thread.join()
+    # each thread authenticates once and keeps its client.
+    assert make_client.call_count == 2
+    assert clients[0] is clients[1]
+    assert clients[2] is clients[3]
+    assert clients[0] is not clients[2]
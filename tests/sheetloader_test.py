@@ -64,6 +64,30 @@ def test_exclude_columns(datafiles):
     assert excluded_df.columns.tolist() == EXCLUDED_DF_COLS
 
 
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_include_columns(datafiles, capsys):
+    import pandas
+
+    from sheetwork.core.main import parser
+    from sheetwork.core.sheetwork import SheetBag
+
+    flags = FlagParser(
+        parser,
+        test_sheet_name="test_sheet_3",
+        project_dir=str(datafiles),
+        sheet_config_dir=str(datafiles),
+        profile_dir=str(datafiles),
+    )
+    project = Project(flags)
+    config = ConfigLoader(flags, project)
+    df = pandas.DataFrame({"column_to_include_or_exclude": ["a"], "other_column": ["b"]})
+    included_df = SheetBag(config, flags, Profile(project)).exclude_or_include_columns(df)
+
+    assert included_df.columns.tolist() == ["column_to_include_or_exclude"]
+    # the content of the sheet is never dumped on stdout.
+    assert capsys.readouterr().out == str()
+
+
 @pytest.mark.datafiles(FIXTURE_DIR)
 def test_load_sheet(datafiles):
     from sheetwork.core.sheetwork import SheetBag
@@ -86,3 +110,297 @@ def test_load_sheet(datafiles):
         sheetbag.load_sheet()
         target_df = generate_test_df(RENAMED_DF)
         assert_frame_equal(target_df, sheetbag.sheet_df)
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_run_skips_unchanged_sheet(datafiles):
+    from sheetwork.core.adapters.snowflake.impl import SnowflakeAdapter
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+    from sheetwork.core.main import parser
+    from sheetwork.core.sheetwork import SheetBag
+
+    def make_sheet_bag(force=False):
+        flags = FlagParser(
+            parser,
+            test_sheet_name="df_renamer",
+            project_dir=str(datafiles),
+            sheet_config_dir=str(datafiles),
+            profile_dir=str(datafiles),
+        )
+        flags.force = force
+        project = Project(flags)
+        config = ConfigLoader(flags, project)
+        profile = Profile(project)
+        return SheetBag(config, flags, profile)
+
+    with mock.patch.object(GoogleSpreadsheet, "authenticate"), mock.patch.object(
+        GoogleSpreadsheet, "open_workbook"
+    ), mock.patch.object(
+        GoogleSpreadsheet, "get_workbook_revision", return_value="1"
+    ) as mocked_revision, mock.patch.object(
+        GoogleSpreadsheet,
+        "make_df_from_worksheet",
+        side_effect=lambda **kwargs: generate_test_df(NON_EMPTY_HEADER),
+    ) as mocked_fetch, mock.patch.object(
+        SheetBag, "push_sheet"
+    ) as mocked_push, mock.patch.object(
+        SheetBag, "check_table"
+    ), mock.patch.object(
+        SnowflakeAdapter, "reuse_connection"
+    ):
+        make_sheet_bag().run()
+        assert mocked_push.call_count == 1
+
+        # same revision: nothing is fetched nor pushed
+        skipped_sheet_bag = make_sheet_bag()
+        skipped_sheet_bag.run()
+        assert skipped_sheet_bag.is_up_to_date is True
+        assert mocked_fetch.call_count == 1
+        assert mocked_push.call_count == 1
+
+        # forcing bypasses the revision check
+        make_sheet_bag(force=True).run()
+        assert mocked_push.call_count == 2
+
+        # a new revision of the sheet gets pushed
+        mocked_revision.return_value = "2"
+        make_sheet_bag().run()
+        assert mocked_fetch.call_count == 3
+        assert mocked_push.call_count == 3
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_run_append_only_sheet(datafiles):
+    from sheetwork.core.adapters.snowflake.impl import SnowflakeAdapter
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+    from sheetwork.core.main import parser
+    from sheetwork.core.sheetwork import SheetBag
+
+    def make_sheet_bag(full_refresh=False):
+        flags = FlagParser(
+            parser,
+            test_sheet_name="form_responses",
+            project_dir=str(datafiles),
+            sheet_config_dir=str(datafiles),
+            profile_dir=str(datafiles),
+        )
+        flags.full_refresh = full_refresh
+        project = Project(flags)
+        config = ConfigLoader(flags, project)
+        profile = Profile(project)
+        return SheetBag(config, flags, profile)
+
+    fetched_dfs = [
+        generate_test_df(NON_EMPTY_HEADER),
+        generate_test_df(NON_EMPTY_HEADER).head(2),
+        generate_test_df(NON_EMPTY_HEADER).head(0),
+        generate_test_df(NON_EMPTY_HEADER),
+    ]
+    with mock.patch.object(GoogleSpreadsheet, "authenticate"), mock.patch.object(
+        GoogleSpreadsheet, "open_workbook"
+    ), mock.patch.object(
+        GoogleSpreadsheet, "get_workbook_revision", side_effect=["1", "2", "3", "4"]
+    ), mock.patch.object(
+        GoogleSpreadsheet, "make_df_from_worksheet", side_effect=fetched_dfs
+    ) as mocked_fetch, mock.patch.object(
+        SnowflakeAdapter, "upload"
+    ) as mocked_upload, mock.patch.object(
+        SheetBag, "check_table"
+    ), mock.patch.object(
+        SnowflakeAdapter, "reuse_connection"
+    ):
+        # first upload loads everything and creates the table as usual.
+        sheet_bag = make_sheet_bag()
+        sheet_bag.run()
+        assert mocked_fetch.call_args.kwargs["skip_rows"] == 0
+        assert mocked_upload.call_args.kwargs["append"] is False
+
+        # then only the new rows are fetched and appended.
+        sheet_bag = make_sheet_bag()
+        assert sheet_bag.watermark == 3
+        sheet_bag.run()
+        assert mocked_fetch.call_args.kwargs["skip_rows"] == 3
+        assert mocked_upload.call_args.kwargs["append"] is True
+        assert len(mocked_upload.call_args.args[0]) == 2
+
+        # no new rows, nothing to push.
+        sheet_bag = make_sheet_bag()
+        sheet_bag.run()
+        assert mocked_fetch.call_args.kwargs["skip_rows"] == 5
+        assert mocked_upload.call_count == 2
+
+        # --full-refresh reloads everything.
+        sheet_bag = make_sheet_bag(full_refresh=True)
+        assert sheet_bag.watermark == 0
+        sheet_bag.run()
+        assert mocked_fetch.call_args.kwargs["skip_rows"] == 0
+        assert mocked_upload.call_args.kwargs["append"] is False
+        assert make_sheet_bag().watermark == 3
+
+
+@pytest.mark.parametrize("use_pyarrow", [True, False])
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_low_memory_pipeline_peak_memory(datafiles, monkeypatch, use_pyarrow):
+    import tracemalloc
+
+    import pandas
+
+    import sheetwork.core.cleaner as cleaner
+    from sheetwork.core.main import parser
+    from sheetwork.core.sheetwork import SheetBag
+    from sheetwork.core.utils import cast_pandas_dtypes
+
+    if use_pyarrow:
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(cleaner, "HAS_PYARROW", use_pyarrow)
+
+    flags = FlagParser(
+        parser,
+        test_sheet_name="df_renamer",
+        project_dir=str(datafiles),
+        sheet_config_dir=str(datafiles),
+        profile_dir=str(datafiles),
+    )
+    flags.low_memory = True
+    project = Project(flags)
+    config = ConfigLoader(flags, project)
+    profile = Profile(project)
+    # built before tracing so that the adapter imports it triggers are not counted.
+    sheetbag = SheetBag(config, flags, profile)
+
+    rows = 50_000
+    # tracing starts before the sheet is made so that freeing its cells is accounted for too.
+    tracemalloc.start()
+    try:
+        # like what gspread gives us: only strings, each its own object, and spaces to clean.
+        raw_frames = [
+            pandas.DataFrame(
+                {
+                    "col_a": [f" {i}" for i in range(rows)],
+                    "col b": [f"as . {i}    " for i in range(rows)],
+                    "1. col_one": [f"   aa {i}" for i in range(rows)],
+                    "col_1": [str(i) for i in range(rows)],
+                    "long ass name": [f"foo {i} " for i in range(rows)],
+                    "col_with_empty_string": ["" if i % 2 else f"{i} " for i in range(rows)],
+                }
+            )
+        ]
+        raw_payload, _ = tracemalloc.get_traced_memory()
+
+        # popping the frame leaves the SheetBag as its only owner, like when it comes from google
+        with mock.patch.object(SheetBag, "_obtain_googlesheet", side_effect=raw_frames.pop):
+            sheetbag.load_sheet()
+        # what the adapters do to the frame the SheetBag hands them before loading it.
+        cast_pandas_dtypes(
+            sheetbag.sheet_df, {"col_a": "numeric", "renamed_col": "varchar"}, inplace=True
+        )
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert sheetbag.sheet_df["col_a"].dtype == "float64"
+    assert sheetbag.sheet_df["renamed_col"].iloc[0] == "foo 0"
+    assert peak_memory < 2 * raw_payload
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_load_sheet_from_source(datafiles):
+    import numpy
+    import pandas
+
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+    from sheetwork.core.main import parser
+    from sheetwork.core.sheetwork import SheetBag
+
+    def make_sheet_bag():
+        flags = FlagParser(
+            parser,
+            test_sheet_name="csv_sheet",
+            project_dir=str(datafiles),
+            sheet_config_dir=str(datafiles),
+            profile_dir=str(datafiles),
+        )
+        project = Project(flags)
+        config = ConfigLoader(flags, project)
+        return SheetBag(config, flags, Profile(project))
+
+    with mock.patch.object(GoogleSpreadsheet, "authenticate") as mocked_authenticate:
+        sheet_bag = make_sheet_bag()
+        sheet_bag.load_sheet()
+        sheet_bag._record_sheet_revision()
+
+        assert sheet_bag.sheet_key == os.path.join(str(datafiles), "sources", "csv_sheet.csv")
+        assert_frame_equal(
+            sheet_bag.sheet_df,
+            pandas.DataFrame({"id": ["1", "2", "3"], "name": ["alice", "bob", numpy.nan]}),
+        )
+        # the file did not change since it was last pushed.
+        unchanged_sheet_bag = make_sheet_bag()
+        unchanged_sheet_bag.load_sheet()
+        assert unchanged_sheet_bag.is_up_to_date is True
+        assert mocked_authenticate.call_count == 0
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_run_reuses_cached_frame(datafiles):
+    from sheetwork.core.adapters.snowflake.impl import SnowflakeAdapter
+    from sheetwork.core.cleaner import SheetCleaner
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+    from sheetwork.core.main import parser
+    from sheetwork.core.sheetwork import SheetBag
+
+    def make_sheet_bag():
+        flags = FlagParser(
+            parser,
+            test_sheet_name="df_renamer",
+            project_dir=str(datafiles),
+            sheet_config_dir=str(datafiles),
+            profile_dir=str(datafiles),
+        )
+        flags.use_cache = True
+        project = Project(flags)
+        config = ConfigLoader(flags, project)
+        profile = Profile(project)
+        return SheetBag(config, flags, profile)
+
+    pushed_dfs = list()
+
+    def mock_push(sheet_bag):
+        pushed_dfs.append(sheet_bag.sheet_df.copy())
+        if len(pushed_dfs) == 1:
+            raise ConnectionError("warehouse is down")
+
+    with mock.patch.object(GoogleSpreadsheet, "authenticate"), mock.patch.object(
+        GoogleSpreadsheet, "open_workbook"
+    ), mock.patch.object(
+        GoogleSpreadsheet, "get_workbook_revision", return_value="1"
+    ) as mocked_revision, mock.patch.object(
+        GoogleSpreadsheet,
+        "make_df_from_worksheet",
+        side_effect=lambda **kwargs: generate_test_df(NON_EMPTY_HEADER),
+    ) as mocked_fetch, mock.patch.object(
+        SheetCleaner, "cleanup", autospec=True, side_effect=SheetCleaner.cleanup
+    ) as mocked_cleanup, mock.patch.object(
+        SheetBag, "push_sheet", autospec=True, side_effect=mock_push
+    ), mock.patch.object(
+        SheetBag, "check_table"
+    ), mock.patch.object(
+        SnowflakeAdapter, "reuse_connection"
+    ):
+        with pytest.raises(ConnectionError):
+            make_sheet_bag().run()
+
+        # the retry pushes what the failed run cleaned without downloading nor cleaning it.
+        retried_sheet_bag = make_sheet_bag()
+        retried_sheet_bag.run()
+        assert retried_sheet_bag.is_loaded_from_cache is True
+        assert mocked_fetch.call_count == 1
+        assert mocked_cleanup.call_count == 1
+        assert_frame_equal(pushed_dfs[1], pushed_dfs[0])
+
+        # a new revision of the sheet is downloaded and cleaned again.
+        mocked_revision.return_value = "2"
+        make_sheet_bag().run()
+        assert mocked_fetch.call_count == 2
+        assert mocked_cleanup.call_count == 2
+        assert len(pushed_dfs) == 3
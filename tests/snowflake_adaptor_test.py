@@ -0,0 +1,298 @@
+import gzip
+from pathlib import Path
+
+import pandas
+import pytest
+from pandas.testing import assert_frame_equal
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+
+STAGED_DF = pandas.DataFrame(
+    {
+        "col_varchar": ["foo", "bar|pipe", None],
+        "col_numeric": [1.5, None, 3.0],
+        "created_date": pandas.to_datetime(["2021-01-01", "2021-01-02", "2021-01-03"]),
+    }
+)
+
+
+def make_adapter(datafiles):
+    from sheetwork.core.adapters.snowflake.connection import (
+        SnowflakeConnection,
+        SnowflakeCredentials,
+    )
+    from sheetwork.core.adapters.snowflake.impl import SnowflakeAdapter
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+
+    flags = FlagParser(parser, profile_dir=str(datafiles), project_dir=str(datafiles))
+    project = Project(flags)
+    profile = Profile(project, target_name="dev")
+    connection = SnowflakeConnection(SnowflakeCredentials(profile))
+    return SnowflakeAdapter(connection, config=None)
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_staging_format_defaults(datafiles):
+    adapter = make_adapter(datafiles)
+    assert adapter.staging_format == "csv"
+    assert adapter.staging_compression_level == 6
+    assert adapter.staging_chunk_size == 250_000
+    assert adapter.staging_put_parallel == 4
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_invalid_staging_format(datafiles):
+    from sheetwork.core.adapters.snowflake.connection import SnowflakeCredentials
+    from sheetwork.core.config.profile import Profile
+    from sheetwork.core.config.project import Project
+    from sheetwork.core.exceptions import CredentialsParsingError
+    from sheetwork.core.flags import FlagParser
+    from sheetwork.core.main import parser
+
+    flags = FlagParser(parser, profile_dir=str(datafiles), project_dir=str(datafiles))
+    profile = Profile(Project(flags), target_name="dev")
+    profile.profile_dict["staging_format"] = "xml"
+    with pytest.raises(CredentialsParsingError):
+        SnowflakeCredentials(profile)
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_copy_via_stage_with_default_staging_format(datafiles):
+    import mock
+
+    adapter = make_adapter(datafiles)
+    statements = list()
+    staged_rows = list()
+
+    def mock_execute(statement):
+        statement = " ".join(statement.split())
+        statements.append(statement)
+        if statement.startswith("put"):
+            staged_file = statement.split()[1].replace("file://", "")
+            staged_rows.extend(Path(staged_file).read_text().splitlines())
+        return mock.Mock(
+            keys=mock.Mock(return_value=["file", "rows_loaded"]),
+            fetchall=mock.Mock(return_value=[("table_stg_00000.csv", 3)]),
+        )
+
+    adapter.con = mock.Mock()
+    adapter.con.execute.side_effect = mock_execute
+    rows_loaded = adapter._copy_via_stage(STAGED_DF, "db.schema.table", str(datafiles))
+
+    assert rows_loaded == 3
+    # plain csv files that the connector gzips itself when putting them, as before staging formats.
+    assert "compression" not in statements[0]
+    assert "type = 'CSV' field_delimiter = '|'" in statements[0]
+    assert statements[1].endswith("@table_stg auto_compress = true parallel = 4")
+    assert statements[1].split()[1].endswith(".csv")
+    assert statements[2] == "copy into db.schema.table from @table_stg"
+    assert statements[3] == "drop stage table_stg"
+    assert staged_rows == ["foo|1.5|2021-01-01", '"bar|pipe"||2021-01-02', "|3.0|2021-01-03"]
+
+
+@pytest.mark.parametrize("staging_format", ["csv", "csv_gzip"])
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_write_staging_file_csv(datafiles, staging_format):
+    adapter = make_adapter(datafiles)
+    adapter.staging_format = staging_format
+    staging_file = Path(datafiles, "staged_file")
+    adapter._write_staging_file(STAGED_DF, str(staging_file))
+
+    if staging_format == "csv_gzip":
+        with gzip.open(staging_file, "rt") as f:
+            content = f.read()
+    else:
+        content = staging_file.read_text()
+    assert content.splitlines() == [
+        "foo|1.5|2021-01-01",
+        '"bar|pipe"||2021-01-02',
+        "|3.0|2021-01-03",
+    ]
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_write_staging_file_parquet(datafiles):
+    pytest.importorskip("pyarrow")
+
+    adapter = make_adapter(datafiles)
+    adapter.staging_format = "parquet"
+    staging_file = Path(datafiles, "staged_file.parquet")
+    adapter._write_staging_file(STAGED_DF, str(staging_file))
+
+    staged_df = pandas.read_parquet(staging_file)
+    assert_frame_equal(staged_df, STAGED_DF, check_dtype=False)
+    assert staged_df["col_numeric"].dtype == "float64"
+
+
+@pytest.mark.parametrize("number_of_rows, expected_chunks", [(0, 1), (3, 2), (4, 2), (5, 3)])
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_stage_in_chunks(datafiles, number_of_rows, expected_chunks):
+    import mock
+
+    adapter = make_adapter(datafiles)
+    adapter.staging_format = "csv"
+    adapter.staging_chunk_size = 2
+    adapter.staging_put_parallel = 8
+    df = pandas.DataFrame({"col_a": [str(i) for i in range(number_of_rows)]})
+
+    staged_rows = list()
+
+    def mock_execute(statement):
+        staged_file = statement.split()[1].replace("file://", "")
+        staged_rows.extend(Path(staged_file).read_text().splitlines())
+
+    adapter.con = mock.Mock()
+    adapter.con.execute.side_effect = mock_execute
+    number_of_chunks = adapter._stage_in_chunks(df, "table_stg", str(datafiles))
+
+    assert number_of_chunks == expected_chunks
+    assert adapter.con.execute.call_count == expected_chunks
+    for put_call in adapter.con.execute.call_args_list:
+        assert put_call.args[0].startswith("put file://")
+        assert put_call.args[0].endswith("@table_stg auto_compress = true parallel = 8")
+    assert staged_rows == df["col_a"].tolist()
+    # chunk files are removed as soon as they are staged
+    assert not list(Path(datafiles).glob("table_stg_*"))
+
+
+@pytest.mark.parametrize(
+    "table_columns, is_merged",
+    [
+        # the order of the columns of the table does not matter.
+        (["name", "id", "_sheetwork_row_hash"], True),
+        (["id", "name"], False),
+        (["id", "name", "dropped", "_sheetwork_row_hash"], False),
+        (["id", "_sheetwork_row_hash"], False),
+    ],
+)
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_merge_into_table(datafiles, table_columns, is_merged):
+    import mock
+
+    from sheetwork.core.sync import ROW_HASH_COLUMN, add_row_hashes
+
+    adapter = make_adapter(datafiles)
+    adapter.config = mock.Mock(target_table="lookup", merge_keys=["id"], sheet_columns=dict())
+    adapter._database = "db"
+    adapter.con = mock.Mock()
+    df = add_row_hashes(pandas.DataFrame({"id": ["1", "2", "4"], "name": ["a", "B", "d"]}))
+    existing = add_row_hashes(pandas.DataFrame({"id": ["1", "2", "3"], "name": ["a", "b", "c"]}))
+    inspector = mock.Mock()
+    inspector.has_table.return_value = True
+    inspector.get_columns.return_value = [{"name": column.upper()} for column in table_columns]
+
+    with mock.patch("sqlalchemy.inspect", return_value=inspector), mock.patch.object(
+        pandas, "read_sql", return_value=existing[["id", ROW_HASH_COLUMN]].assign(id=[1, 2, 3])
+    ), mock.patch.object(pandas.DataFrame, "to_sql") as mock_to_sql, mock.patch.object(
+        adapter, "_copy_via_stage"
+    ) as mock_copy:
+        adapter._merge_into_table(df, "sand", str(datafiles))
+
+    statements = [" ".join(call.args[0].split()) for call in adapter.con.execute.call_args_list]
+    if not is_merged:
+        # the table gets recreated and fully loaded.
+        assert mock_to_sql.call_args.kwargs["if_exists"] == "replace"
+        assert mock_copy.call_args.args[0] is df
+        assert statements == list()
+        return
+
+    staged_rows, staging_table, _ = mock_copy.call_args.args
+    assert staging_table == "db.sand.lookup__sheetwork_stg"
+    # deleted keys are the ones read from the table.
+    assert staged_rows["id"].tolist() == ["2", "4", 3]
+    assert staged_rows["_sheetwork_deleted"].tolist() == [False, False, True]
+    # the files are copied by position, in the order of the columns of the sheet.
+    assert staged_rows.columns.tolist() == ["id", "name", ROW_HASH_COLUMN, "_sheetwork_deleted"]
+    assert statements[0] == (
+        "create or replace temporary table db.sand.lookup__sheetwork_stg as "
+        "select id, name, _sheetwork_row_hash from db.sand.lookup limit 0"
+    )
+    assert statements[2] == (
+        "merge into db.sand.lookup t using db.sand.lookup__sheetwork_stg s on t.id = s.id "
+        "when matched and s._sheetwork_deleted then delete "
+        "when matched then update set t.name = s.name, "
+        "t._sheetwork_row_hash = s._sheetwork_row_hash "
+        "when not matched and not s._sheetwork_deleted then "
+        "insert (id, name, _sheetwork_row_hash) values (s.id, s.name, s._sheetwork_row_hash)"
+    )
+    assert statements[3] == "drop table db.sand.lookup__sheetwork_stg"
+
+
+@pytest.mark.parametrize(
+    "table_exists, is_valid_load", [(True, True), (False, True), (True, False)]
+)
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_swap_into_table(datafiles, table_exists, is_valid_load):
+    import mock
+
+    from sheetwork.core.exceptions import TableValidationError
+
+    adapter = make_adapter(datafiles)
+    adapter.config = mock.Mock(target_table="lookup", sheet_columns=dict())
+    adapter._database = "db"
+    adapter.con = mock.Mock()
+    df = pandas.DataFrame({"id": ["1", "2"], "name": ["a", "b"]})
+    inspector = mock.Mock()
+    inspector.has_table.return_value = table_exists
+    counts = (2, 2) if is_valid_load else (1, 2)
+
+    with mock.patch("sqlalchemy.inspect", return_value=inspector), mock.patch.object(
+        pandas.DataFrame, "to_sql"
+    ) as mock_to_sql, mock.patch.object(adapter, "_copy_via_stage") as mock_copy, mock.patch.object(
+        adapter, "_count_rows_and_columns", return_value=counts
+    ):
+        if is_valid_load:
+            adapter._swap_into_table(df, "sand", str(datafiles))
+        else:
+            with pytest.raises(TableValidationError):
+                adapter._swap_into_table(df, "sand", str(datafiles))
+
+    assert mock_to_sql.call_args.kwargs["name"] == "lookup__sheetwork_tmp"
+    assert mock_copy.call_args.args[1] == "db.sand.lookup__sheetwork_tmp"
+    statements = [call.args[0] for call in adapter.con.execute.call_args_list]
+    expected_statements = {
+        (True, True): ["alter table db.sand.lookup swap with db.sand.lookup__sheetwork_tmp"],
+        (False, True): ["alter table db.sand.lookup__sheetwork_tmp rename to db.sand.lookup"],
+        (True, False): list(),
+    }[(table_exists, is_valid_load)]
+    # the swap table is always cleaned up, the live table is only touched by a valid load.
+    assert statements == expected_statements + [
+        "drop table if exists db.sand.lookup__sheetwork_tmp"
+    ]
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_sum_rows_loaded(datafiles):
+    adapter = make_adapter(datafiles)
+    columns = ["file", "status", "rows_parsed", "rows_loaded"]
+    copy_results = [("a_00000.csv.gz", "LOADED", 3, 3), ("a_00001.csv.gz", "LOADED", 2, 2)]
+    assert adapter._sum_rows_loaded(columns, copy_results) == 5
+    # copy into only returns a status when there was nothing to load.
+    assert (
+        adapter._sum_rows_loaded(["status"], [("Copy executed with 0 files processed.",)]) is None
+    )
+
+
+@pytest.mark.parametrize("rows_loaded", [None, 2])
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_check_table(datafiles, rows_loaded):
+    import mock
+
+    adapter = make_adapter(datafiles)
+    adapter._database = "db"
+    if rows_loaded is not None:
+        adapter.rows_loaded[("sand", "lookup")] = rows_loaded
+    con = mock.Mock()
+    con.execute.return_value.first.return_value = (7, 3)
+    con.execute.return_value.scalar.return_value = 3
+
+    with mock.patch.object(adapter.engine, "connect", return_value=con):
+        num_columns, num_rows = adapter.check_table("sand", "lookup")
+
+    # a single parameterised query whatever the row count is known or not.
+    assert con.execute.call_count == 1
+    assert con.execute.call_args.kwargs == dict(schema="SAND", table="LOOKUP")
+    assert (num_columns, num_rows) == (3, rows_loaded or 7)
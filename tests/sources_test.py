@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pandas
+import pytest
+from pandas.testing import assert_frame_equal
+
+
+def test_csv_source(tmp_path):
+    from sheetwork.core.sources import CsvSource
+
+    Path(tmp_path, "sheet.csv").write_text("a;b;c\n1;x;\n2;y;z\n3;z;\n")
+    source = CsvSource(dict(type="csv", path="sheet.csv", separator=";"), tmp_path)
+
+    assert source.location == str(Path(tmp_path, "sheet.csv"))
+    # values come as text with empty cells left empty, like they do from Google Sheets.
+    assert_frame_equal(
+        source.make_df(),
+        pandas.DataFrame({"a": ["1", "2", "3"], "b": ["x", "y", "z"], "c": ["", "z", ""]}),
+    )
+    assert_frame_equal(
+        source.make_df(included_columns=["c", "a", "missing"], skip_rows=1),
+        pandas.DataFrame({"a": ["2", "3"], "c": ["z", ""]}),
+    )
+
+
+def test_file_source_revision(tmp_path):
+    import os
+
+    from sheetwork.core.exceptions import SheetLoadingError
+    from sheetwork.core.sources import CsvSource
+
+    path = Path(tmp_path, "sheet.csv")
+    source = CsvSource(dict(type="csv", path=str(path)), Path("elsewhere"))
+    with pytest.raises(SheetLoadingError):
+        source.get_workbook_revision()
+
+    path.write_text("a\n1\n")
+    revision = source.get_workbook_revision()
+    assert revision == source.get_workbook_revision()
+    path.write_text("a\n1\n2\n")
+    os.utime(path, ns=(0, 0))
+    assert source.get_workbook_revision() != revision
+
+
+def test_parquet_source(tmp_path):
+    pytest.importorskip("pyarrow")
+    from sheetwork.core.sources import ParquetSource
+
+    df = pandas.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    df.to_parquet(Path(tmp_path, "sheet.parquet"), index=False)
+    source = ParquetSource(dict(type="parquet", path="sheet.parquet"), tmp_path)
+
+    assert_frame_equal(source.make_df(), df)
+    assert_frame_equal(
+        source.make_df(included_columns=["b"], skip_rows=2), pandas.DataFrame({"b": ["z"]})
+    )
+
+
+def test_excel_source_missing_dependency(tmp_path):
+    import mock
+
+    from sheetwork.core.exceptions import MissingDependencyError
+    from sheetwork.core.sources import ExcelSource
+
+    source = ExcelSource(dict(type="excel", path="sheet.ods"), tmp_path, worksheet="Sheet1")
+    with mock.patch("importlib.util.find_spec", return_value=None):
+        with pytest.raises(MissingDependencyError, match="odf"):
+            source.make_df()
+
+
+def test_dataframe_source():
+    from sheetwork.core.exceptions import SheetLoadingError
+    from sheetwork.core.sources import DataFrameSource, register_dataframe
+
+    source = DataFrameSource(dict(type="dataframe", name="registered"), Path("."))
+    with pytest.raises(SheetLoadingError):
+        source.make_df()
+
+    df = pandas.DataFrame({"a": ["1", "2"], "b": ["x", "y"]})
+    register_dataframe("registered", df)
+    assert source.location == "dataframe:registered"
+    assert source.get_workbook_revision() == str()
+    # the registered frame is never handed over to be cleaned in place.
+    assert source.make_df() is not df
+    assert_frame_equal(source.make_df(), df)
+    assert_frame_equal(
+        source.make_df(included_columns=["b"], skip_rows=1), pandas.DataFrame({"b": ["y"]})
+    )
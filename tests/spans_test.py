@@ -0,0 +1,80 @@
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+
+
+def test_span_recorder_nests_spans():
+    from sheetwork.core.spans import SpanRecorder
+
+    recorder = SpanRecorder()
+    with recorder.span("run", sheet_name="a_sheet"):
+        with recorder.span("load_sheet") as load_span:
+            load_span.rows = 10
+        for chunk_number in range(2):
+            with recorder.span("put") as put_span:
+                put_span.num_bytes = 100
+
+    assert [(record.sheet_name, record.path) for record in recorder.records] == [
+        ("a_sheet", "run.load_sheet"),
+        ("a_sheet", "run.put"),
+        ("a_sheet", "run.put"),
+        ("a_sheet", "run"),
+    ]
+    # spans are closed even when what they wrap blows up
+    with pytest.raises(ValueError):
+        with recorder.span("failing"):
+            raise ValueError()
+    assert recorder.records[-1].path == "failing"
+    assert recorder.current_context().path == str()
+
+    summary = recorder.summarise()
+    assert list(summary.keys())[:3] == [
+        ("a_sheet", "run"),
+        ("a_sheet", "run.load_sheet"),
+        ("a_sheet", "run.put"),
+    ]
+    assert summary[("a_sheet", "run.put")]["calls"] == 2
+    assert summary[("a_sheet", "run.put")]["num_bytes"] == 200
+    assert summary[("a_sheet", "run.load_sheet")]["rows"] == 10
+    assert "load_sheet" in recorder.make_summary_table()
+
+
+def test_span_recorder_attaches_spans_from_other_threads():
+    from sheetwork.core.spans import SpanRecorder
+
+    recorder = SpanRecorder()
+
+    def serialise(parent):
+        with recorder.span("serialise", parent=parent):
+            pass
+
+    with recorder.span("upload", sheet_name="a_sheet"):
+        writer = threading.Thread(target=serialise, args=(recorder.current_context(),))
+        writer.start()
+        writer.join()
+
+    assert [(record.sheet_name, record.path) for record in recorder.records] == [
+        ("a_sheet", "upload.serialise"),
+        ("a_sheet", "upload"),
+    ]
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_span_recorder_writes_json(datafiles):
+    from sheetwork.core.spans import SpanRecorder
+
+    recorder = SpanRecorder()
+    with recorder.span("run", sheet_name="a_sheet") as run_span:
+        run_span.rows = 3
+    spans_path = Path(datafiles, "logs", "sheetwork_spans.json")
+    recorder.write_json(spans_path)
+
+    spans = json.loads(spans_path.read_text())["spans"]
+    assert len(spans) == 1
+    assert spans[0]["path"] == "run"
+    assert spans[0]["rows"] == 3
+    assert set(spans[0]) >= {"wall_time", "cpu_time", "num_bytes", "peak_rss_delta"}
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+import pytest
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_state_store(datafiles):
+    from sheetwork.core.state import StateStore
+
+    state_path = Path(datafiles, "state_subdir", "state.json")
+    store = StateStore(state_path)
+    assert store.get("missing_key", "default") == "default"
+
+    store.set("sheet_key/worksheet", {"config_hash": "42"})
+    store.set("other_key", "value")
+    assert state_path.is_file()
+    assert StateStore(state_path).get("sheet_key/worksheet") == {"config_hash": "42"}
+    assert StateStore(state_path).get("other_key") == "value"
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_state_store_ignores_corrupted_file(datafiles):
+    from sheetwork.core.state import StateStore
+
+    state_path = Path(datafiles, "corrupted_state.json")
+    state_path.write_text("{not json")
+    store = StateStore(state_path)
+    assert store.get("any_key") is None
+    store.set("any_key", 1)
+    assert store.get("any_key") == 1
@@ -0,0 +1,112 @@
+import numpy
+import pandas
+import pytest
+
+
+def test_add_row_hashes():
+    from sheetwork.core.sync import ROW_HASH_COLUMN, add_row_hashes
+
+    df = pandas.DataFrame({"id": ["1", "2", "1"], "name": ["a", "b", "a"]})
+    hashed_df = add_row_hashes(df)
+
+    assert ROW_HASH_COLUMN not in df.columns
+    assert hashed_df.columns.tolist() == ["id", "name", ROW_HASH_COLUMN]
+    assert hashed_df[ROW_HASH_COLUMN].dtype == "int64"
+    hashes = hashed_df[ROW_HASH_COLUMN].tolist()
+    assert hashes[0] == hashes[2]
+    assert hashes[0] != hashes[1]
+
+    add_row_hashes(df, inplace=True)
+    assert df[ROW_HASH_COLUMN].tolist() == hashes
+
+
+def test_compute_delta():
+    from sheetwork.core.sync import ROW_HASH_COLUMN, add_row_hashes, compute_delta
+
+    existing = add_row_hashes(pandas.DataFrame({"id": ["1", "2", "3"], "name": ["a", "b", "c"]}))
+    # keys come back typed from the database.
+    existing = existing[["id", ROW_HASH_COLUMN]].assign(id=[1, 2, 3])
+    df = add_row_hashes(pandas.DataFrame({"id": ["1", "2", "4"], "name": ["a", "B", "d"]}))
+
+    delta = compute_delta(df, existing, ["id"])
+
+    assert delta.upserts["id"].tolist() == ["2", "4"]
+    assert delta.deletes.to_dict("list") == {"id": [3]}
+    assert (delta.num_inserted, delta.num_updated) == (1, 1)
+    assert compute_delta(df, df[["id", ROW_HASH_COLUMN]], ["id"]).is_empty
+
+
+def test_compute_delta_duplicated_keys():
+    from sheetwork.core.exceptions import DuplicatedMergeKeysError
+    from sheetwork.core.sync import add_row_hashes, compute_delta
+
+    df = add_row_hashes(pandas.DataFrame({"id": ["1", "1"], "name": ["a", "b"]}))
+    with pytest.raises(DuplicatedMergeKeysError):
+        compute_delta(df, df, ["id"])
+
+
+def test_compute_delta_compares_typed_keys():
+    import datetime
+    import decimal
+
+    from sheetwork.core.sync import ROW_HASH_COLUMN, add_row_hashes, compute_delta
+    from sheetwork.core.utils import cast_pandas_dtypes
+
+    column_datatypes = dict(id="int", amount="numeric", day="date", name="varchar")
+    merge_keys = ["id", "amount", "day", "name"]
+    df = cast_pandas_dtypes(
+        pandas.DataFrame(
+            {
+                "id": ["1", "2"],
+                "amount": ["1.0", "2.5"],
+                "day": ["2021-01-01", "2021-01-02"],
+                "name": ["a", None],
+                "value": ["x", "y"],
+            }
+        ),
+        column_datatypes,
+    )
+    df = add_row_hashes(df)
+    # what the warehouse hands back for the same keys.
+    existing = pandas.DataFrame(
+        {
+            "id": [decimal.Decimal("1"), decimal.Decimal("2")],
+            "amount": [decimal.Decimal("1.000000000000000000"), decimal.Decimal("2.5")],
+            "day": [datetime.date(2021, 1, 1), datetime.date(2021, 1, 2)],
+            "name": ["a", numpy.nan],
+            ROW_HASH_COLUMN: df[ROW_HASH_COLUMN].tolist(),
+        }
+    )
+
+    assert compute_delta(df, existing, merge_keys, column_datatypes).is_empty
+    delta = compute_delta(df, existing.iloc[[0]], merge_keys, column_datatypes)
+    assert delta.upserts["id"].tolist() == ["2"]
+    assert delta.deletes.empty
+
+
+def test_compute_delta_missing_merge_key():
+    from sheetwork.core.exceptions import SheetWorkConfigError
+    from sheetwork.core.sync import add_row_hashes, compute_delta
+
+    df = add_row_hashes(pandas.DataFrame({"id": ["1"], "name": ["a"]}))
+    with pytest.raises(SheetWorkConfigError, match="not_a_column"):
+        compute_delta(df, df, ["id", "not_a_column"])
+
+
+def test_make_staged_rows_keeps_integers():
+    from sheetwork.core.sync import DELETED_FLAG_COLUMN, ROW_HASH_COLUMN, RowDelta, make_staged_rows
+
+    upserts = pandas.DataFrame({"id": ["2"], "score": [5], ROW_HASH_COLUMN: [42]})
+    deletes = pandas.DataFrame({"id": [3]})
+
+    staged_rows = make_staged_rows(RowDelta(upserts, deletes, 0, 1))
+
+    assert staged_rows.columns.tolist() == ["id", "score", ROW_HASH_COLUMN, DELETED_FLAG_COLUMN]
+    assert staged_rows[DELETED_FLAG_COLUMN].tolist() == [False, True]
+    assert staged_rows[ROW_HASH_COLUMN].tolist() == [42, 0]
+    # the deleted row has no score, which must not turn 5 into 5.0.
+    assert staged_rows["score"].dtype == "Int64"
+    assert staged_rows.to_csv(index=False, header=False).splitlines() == [
+        "2,5,42,False",
+        "3,,0,True",
+    ]
@@ -56,17 +56,6 @@ def test_check_dupe_cols():
         dupes = check_dupe_cols(list_with_dupe)
 
 
-def test_check_and_compare_version(mocker):
-    from sheetwork.core.utils import check_and_compare_version
-
-    # mock the call to pypi
-    mocker.patch("luddite.get_version_pypi", return_value="1.0.0")
-    dummy_version = "0.0.0"
-    needs_update, pypi_version = check_and_compare_version(dummy_version)
-    assert needs_update is True
-    assert pypi_version == "1.0.0"
-
-
 @pytest.mark.parametrize("scenario", ["normal", "unsupported_dtypes", "column_not_in_df"])
 def test_cast_pandas_dtypes(scenario):
     from sheetwork.core.utils import cast_pandas_dtypes
@@ -80,6 +69,12 @@ def test_cast_pandas_dtypes(scenario):
         expected_cast = generate_test_df(CAST_DF)
         assert cast_df.to_dict() == expected_cast.to_dict()
 
+        # casting in place gives the same frame, and gives it in the very same object
+        to_cast_inplace = generate_test_df(TO_CAST_DF)
+        cast_df = cast_pandas_dtypes(to_cast_inplace, casting_dict, inplace=True)
+        assert cast_df is to_cast_inplace
+        assert cast_df.to_dict() == expected_cast.to_dict()
+
     elif scenario == "unsupported_dtypes":
         casting_dict = {"col_int": "not_allowes_dtype"}
         with pytest.raises(UnsupportedDataTypeError):
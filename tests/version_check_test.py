@@ -0,0 +1,75 @@
+import time
+from pathlib import Path
+
+import pytest
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_check_and_compare_version(datafiles, mocker, monkeypatch):
+    from sheetwork.core.version_check import SKIP_VERSION_CHECK_ENV_VAR, check_and_compare_version
+
+    monkeypatch.delenv(SKIP_VERSION_CHECK_ENV_VAR, raising=False)
+    cache_path = Path(datafiles, "version_check.json")
+
+    # mock the call to pypi
+    mocked_pypi = mocker.patch("luddite.get_version_pypi", return_value="1.0.0")
+    dummy_version = "0.0.0"
+    needs_update, pypi_version = check_and_compare_version(dummy_version, cache_path=cache_path)
+    assert needs_update is True
+    assert pypi_version == "1.0.0"
+
+    # the answer of pypi is cached
+    mocked_pypi.return_value = "2.0.0"
+    assert check_and_compare_version("1.0.0", cache_path=cache_path) == (False, "1.0.0")
+    assert mocked_pypi.call_count == 1
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_check_and_compare_version_refreshes_stale_cache(datafiles, mocker, monkeypatch):
+    import sheetwork.core.version_check as version_check
+    from sheetwork.core.state import StateStore
+
+    monkeypatch.delenv(version_check.SKIP_VERSION_CHECK_ENV_VAR, raising=False)
+    cache_path = Path(datafiles, "version_check.json")
+    StateStore(cache_path).set(
+        version_check.VERSION_CHECK_CACHE_KEY,
+        dict(version="1.0.0", checked_at=time.time() - version_check.VERSION_CHECK_TTL - 1),
+    )
+    mocker.patch("luddite.get_version_pypi", return_value="2.0.0")
+
+    assert version_check.check_and_compare_version("1.0.0", cache_path=cache_path) == (
+        True,
+        "2.0.0",
+    )
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_check_and_compare_version_can_be_skipped(datafiles, mocker, monkeypatch):
+    from sheetwork.core.version_check import SKIP_VERSION_CHECK_ENV_VAR, check_and_compare_version
+
+    monkeypatch.setenv(SKIP_VERSION_CHECK_ENV_VAR, "1")
+    mocked_pypi = mocker.patch("luddite.get_version_pypi", return_value="1.0.0")
+
+    cache_path = Path(datafiles, "version_check.json")
+    assert check_and_compare_version("0.0.0", cache_path=cache_path) == (False, str())
+    assert mocked_pypi.call_count == 0
+    assert not cache_path.exists()
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_check_and_compare_version_gives_up_on_slow_pypi(datafiles, mocker, monkeypatch):
+    import sheetwork.core.version_check as version_check
+
+    monkeypatch.delenv(version_check.SKIP_VERSION_CHECK_ENV_VAR, raising=False)
+    monkeypatch.setattr(version_check, "VERSION_CHECK_TIMEOUT", 0.1)
+    mocker.patch("luddite.get_version_pypi", side_effect=lambda name: time.sleep(5) or "1.0.0")
+
+    start = time.perf_counter()
+    cache_path = Path(datafiles, "version_check.json")
+    assert version_check.check_and_compare_version("0.0.0", cache_path=cache_path) == (
+        False,
+        str(),
+    )
+    assert time.perf_counter() - start < 2
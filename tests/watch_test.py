@@ -0,0 +1,206 @@
+import time
+from pathlib import Path
+
+import mock
+import pytest
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+SHEET_KEYS = ["10J52dhgTRqtI_lm4bf9B02nQu4zu5u6r0h2VIDTjRXg", "sample"]
+WORKBOOK_KEY = "16nYKVY5UEKspYGbcMb5DG2GrOla-8HrvNOPIutKfdV4"
+
+
+def make_watch_task(datafiles):
+    from sheetwork.core.main import handle, parser
+
+    return handle(
+        parser,
+        [
+            "watch",
+            "--max-workers",
+            "1",
+            "--poll-interval",
+            "5",
+            "--debounce",
+            "10",
+            "--project-dir",
+            str(datafiles),
+            "--profile-dir",
+            str(datafiles),
+            "--sheet-config-dir",
+            str(datafiles),
+        ],
+        run_task=False,
+    )
+
+
+def make_server():
+    from tests.fake_google import FakeGoogleServer, FakeSpreadsheet
+
+    server = FakeGoogleServer()
+    for sheet_key in SHEET_KEYS + [WORKBOOK_KEY, "not_watched"]:
+        server.add_spreadsheet(sheet_key, FakeSpreadsheet.synthetic(rows=1))
+    return server
+
+
+def wait_for_uploads(task, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with task._lock:
+            if not task.in_flight:
+                return
+        time.sleep(0.01)
+    raise AssertionError("uploads did not finish in time")
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_watch(datafiles):
+    from sheetwork.core.adapters.base.connection import _ENGINE_REGISTRY
+    from sheetwork.core.sheetwork import SheetBag
+    from sheetwork.core.task.watch import WatchTask
+
+    task = make_watch_task(datafiles)
+    assert isinstance(task, WatchTask)
+    assert task.sheet_names_by_workbook[WORKBOOK_KEY] == [
+        "test_sheet_2",
+        "test_sheet_3",
+        "test_sheet_4",
+    ]
+    ran_sheets = list()
+
+    def mock_run(sheet_bag):
+        assert sheet_bag.google_client_pool is task.google_client_pool
+        ran_sheets.append(sheet_bag.flags.sheet_name)
+
+    with make_server() as server, server.patch_authentication(), mock.patch.object(
+        SheetBag, "run", autospec=True, side_effect=mock_run
+    ):
+        server.touch(WORKBOOK_KEY)
+        task.start(now=0)
+        try:
+            # what changed before the first watch is unknown, every workbook gets checked.
+            assert task.page_token == "1"
+            assert set(task.pending_workbooks) == set(SHEET_KEYS + [WORKBOOK_KEY])
+            task.tick(10)
+            wait_for_uploads(task)
+            assert len(ran_sheets) == sum(map(len, task.sheet_names_by_workbook.values()))
+            assert task.pending_workbooks == dict()
+
+            # a burst of edits is uploaded once, after the workbook is left alone.
+            ran_sheets.clear()
+            server.touch(WORKBOOK_KEY)
+            server.touch("not_watched")
+            task.tick(15)
+            server.touch(WORKBOOK_KEY)
+            server.touch(WORKBOOK_KEY)
+            task.tick(20)
+            task.tick(29)
+            assert list(task.pending_workbooks) == [WORKBOOK_KEY]
+            assert ran_sheets == list()
+            task.tick(30)
+            wait_for_uploads(task)
+            assert ran_sheets == ["test_sheet_2", "test_sheet_3", "test_sheet_4"]
+            assert all(result.succeeded for result in task.results.values())
+        finally:
+            task.shutdown()
+        assert task.changes_store.get(task._state_key) == dict(
+            page_token="5", pending_sheet_keys=list()
+        )
+    # the pooled connections are closed with the daemon.
+    assert _ENGINE_REGISTRY == dict()
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_watch_resumes_from_saved_state(datafiles):
+    from sheetwork.core.sheetwork import SheetBag
+
+    task = make_watch_task(datafiles)
+    with make_server() as server, server.patch_authentication(), mock.patch.object(
+        SheetBag, "run", autospec=True
+    ) as sheet_bag_run:
+        task.start(now=0)
+        server.touch("sample")
+        # stopped before the workbooks were uploaded, they are kept for the next watch.
+        task.tick(1)
+        task.shutdown()
+        assert sheet_bag_run.call_count == 0
+
+        server.touch(WORKBOOK_KEY)
+        restarted_task = make_watch_task(datafiles)
+        restarted_task.start(now=0)
+        try:
+            assert restarted_task.page_token == "1"
+            assert set(restarted_task.pending_workbooks) == set(SHEET_KEYS + [WORKBOOK_KEY])
+            restarted_task.poll_changes(now=1)
+            assert restarted_task.page_token == "2"
+            assert restarted_task.pending_workbooks[WORKBOOK_KEY].last_changed_at == 1
+        finally:
+            restarted_task.shutdown()
+
+
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_watch_restarts_expired_feed(datafiles):
+    from sheetwork.core.sheetwork import SheetBag
+
+    task = make_watch_task(datafiles)
+    with make_server() as server, server.patch_authentication(), mock.patch.object(
+        SheetBag, "run", autospec=True
+    ):
+        server.touch("sample")
+        task.start(now=0)
+        try:
+            task.pending_workbooks.clear()
+            task.page_token = "expired"
+            task.poll_changes(now=1)
+            assert task.page_token == "1"
+            assert set(task.pending_workbooks) == set(SHEET_KEYS + [WORKBOOK_KEY])
+        finally:
+            task.shutdown()
+
+
+@pytest.mark.parametrize("error_status", [403, None])
+@pytest.mark.datafiles(FIXTURE_DIR)
+def test_watch_survives_feed_errors(datafiles, error_status):
+    import requests
+    from gspread.exceptions import APIError
+
+    from sheetwork.core.clients.google import GoogleSpreadsheet
+    from sheetwork.core.sheetwork import SheetBag
+
+    if error_status:
+        response = requests.Response()
+        response.status_code = error_status
+        response._content = b'{"error": {"code": 403, "message": "denied", "status": "DENIED"}}'
+        error = APIError(response)
+    else:
+        error = requests.ConnectionError("connection reset")
+    list_changed_files = GoogleSpreadsheet.list_changed_files
+    feed_calls = list()
+
+    def failing_once(drive, page_token):
+        feed_calls.append(page_token)
+        if len(feed_calls) == 1:
+            raise error
+        return list_changed_files(drive, page_token)
+
+    task = make_watch_task(datafiles)
+    with make_server() as server, server.patch_authentication(), mock.patch.object(
+        SheetBag, "run", autospec=True
+    ), mock.patch.object(
+        GoogleSpreadsheet, "list_changed_files", autospec=True, side_effect=failing_once
+    ):
+        task.start(now=0)
+        try:
+            task.pending_workbooks.clear()
+            server.touch("sample")
+            # the failed poll neither stops the watch nor loses its place in the feed.
+            task.tick(1)
+            assert task.page_token == "0"
+            assert task.pending_workbooks == dict()
+            task.tick(2)
+            assert task.pending_workbooks == dict()
+            task.tick(6)
+            assert feed_calls == ["0", "0"]
+            assert task.page_token == "1"
+            assert list(task.pending_workbooks) == ["sample"]
+        finally:
+            task.shutdown()